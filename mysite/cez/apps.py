@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CezConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cez'
+
+    def ready(self):
+        import cez.signals
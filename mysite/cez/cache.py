@@ -0,0 +1,81 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Czas życia zapamiętanego fragmentu treści kursu (w sekundach)
+COURSE_FRAGMENT_TIMEOUT = 60 * 60
+
+
+def course_version_key(course_id):
+    """
+        Zwraca klucz pamięci podręcznej z licznikiem wersji kursu.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            str: Klucz pamięci podręcznej.
+    """
+    return f'course:{course_id}:version'
+
+
+def _new_version():
+    # Wartość początkowa różni się między kursami o tym samym identyfikatorze
+    # (np. po usunięciu kursu), dzięki czemu stare fragmenty nie są odczytywane ponownie.
+    return time.time_ns()
+
+
+def get_course_version(course_id):
+    """
+        Zwraca bieżącą wersję kursu używaną w kluczach pamięci podręcznej.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            int: Wersja kursu.
+    """
+    key = course_version_key(course_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def reset_course_version(course_id):
+    """
+        Ustawia nową, unikalną wersję kursu (np. dla nowo utworzonego kursu).
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+    """
+    cache.set(course_version_key(course_id), _new_version(), None)
+
+
+def _bump(course_ids):
+    for course_id in course_ids:
+        try:
+            cache.incr(course_version_key(course_id))
+        except ValueError:
+            reset_course_version(course_id)
+
+
+def bump_course_versions(course_ids):
+    """
+        Zmienia wersję podanych kursów, unieważniając zapamiętane fragmenty.
+
+        Argumenty:
+            course_ids (Iterable[int]): Identyfikatory kursów.
+
+        Opis działania:
+            Wersja zmieniana jest od razu oraz ponownie po zatwierdzeniu transakcji,
+            tak aby fragment wyrenderowany z danych sprzed zatwierdzenia nie pozostał
+            zapamiętany pod nową wersją.
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+    _bump(course_ids)
+    transaction.on_commit(lambda: _bump(course_ids))
@@ -0,0 +1,197 @@
+import hashlib
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, F, Count, FloatField
+from django.db.models.functions import Cast
+
+from .models import Course
+
+# Liczba kursów na jednej stronie katalogu
+CATALOG_PAGE_SIZE = 12
+
+# Czas przechowywania liczników kursów dla stopni i semestrów (w sekundach)
+FACET_CACHE_TIMEOUT = 10 * 60
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+DEGREE_CHOICES = (
+    (1, 'Stopień 1'),
+    (2, 'Stopień 2'),
+    (3, 'Stopień 3'),
+    (4, 'Studia Podyplomowe'),
+    (5, 'Przedmioty Obieralne'),
+)
+
+SEMESTER_CHOICES = tuple((number, f'Semestr {number}') for number in range(1, 8))
+
+
+def full_text_search_enabled():
+    """
+        Sprawdza, czy baza danych obsługuje wyszukiwanie pełnotekstowe (PostgreSQL).
+
+        Zwraca:
+            bool: True dla PostgreSQL.
+    """
+    return connection.vendor == 'postgresql'
+
+
+def _terms(text):
+    return re.findall(r'\w+', text or '')
+
+
+def _text_filter(qs, text):
+    terms = _terms(text)
+    if not terms:
+        return qs, False
+    if full_text_search_enabled():
+        # Każde słowo dopasowywane jest jako przedrostek ("mat" znajduje "matematyka")
+        query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+        # ts_rank zwraca float4; rzutowanie na float8 sprawia, że wartość w kursorze (float
+        # w Pythonie) porównywana jest z trafnością bez utraty precyzji
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+        qs = qs.filter(search_vector=query).annotate(rank=rank)
+        return qs, True
+    lookup = Q()
+    for term in terms:
+        lookup &= Q(title__icontains=term) | Q(description__icontains=term)
+    return qs.filter(lookup), False
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _catalog_query(text, degree_id, semester_id, after):
+    qs = Course.objects.select_related('teacher', 'semester', 'degree')
+    degree_id, semester_id = _parse_id(degree_id), _parse_id(semester_id)
+    if degree_id is not None:
+        qs = qs.filter(degree_id=degree_id)
+    if semester_id is not None:
+        qs = qs.filter(semester_id=semester_id)
+    qs, ranked = _text_filter(qs, text)
+
+    try:
+        if ranked:
+            if after:
+                rank, course_id = after.split('_')
+                rank, course_id = float(rank), int(course_id)
+                qs = qs.filter(Q(rank__lt=rank) | Q(rank=rank, id__gt=course_id))
+            qs = qs.order_by('-rank', 'id')
+        else:
+            if after:
+                qs = qs.filter(id__gt=int(after))
+            qs = qs.order_by('id')
+    except ValueError:
+        return None, ranked
+    return qs, ranked
+
+
+def _page(courses, ranked, limit):
+    cursor = None
+    if len(courses) > limit:
+        last = courses[limit - 1]
+        cursor = f'{last.rank!r}_{last.id}' if ranked else str(last.id)
+    return courses[:limit], cursor
+
+
+def catalog_page(text=None, degree_id=None, semester_id=None, after=None, limit=CATALOG_PAGE_SIZE):
+    """
+        Zwraca stronę katalogu kursów.
+
+        Argumenty:
+            text (str): Wyszukiwany tekst (tytuł lub opis kursu).
+            degree_id (str): Identyfikator stopnia.
+            semester_id (str): Identyfikator semestru.
+            after (str): Kursor zwrócony dla poprzedniej strony.
+            limit (int): Liczba kursów na stronie.
+
+        Zwraca:
+            tuple: Lista kursów oraz kursor następnej strony (None dla ostatniej strony).
+
+        Opis działania:
+            Kursy pobierane są jednym zapytaniem wraz z nauczycielem, semestrem i stopniem.
+            Stronicowanie odbywa się według klucza, a nie przesunięcia: bez wyszukiwanego
+            tekstu według identyfikatora, a z tekstem na PostgreSQL według trafności
+            (ts_rank, indeks GIN na search_vector), a następnie identyfikatora.
+    """
+    qs, ranked = _catalog_query(text, degree_id, semester_id, after)
+    if qs is None:
+        return [], None
+    return _page(list(qs[:limit + 1]), ranked, limit)
+
+
+def _version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, 1, None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def invalidate_catalog():
+    """
+        Unieważnia zapamiętane liczniki katalogu (po zapisaniu lub usunięciu kursu).
+    """
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 1, None)
+
+
+def _facet_queries(text):
+    normalized = ' '.join(term.lower() for term in _terms(text))
+    key = f'catalog:facets:{_version()}:{hashlib.md5(normalized.encode("utf-8")).hexdigest()}'
+    qs, _ = _text_filter(Course.objects.all(), normalized)
+    return key, {
+        field: qs.order_by().values_list(f'{field}_id').annotate(count=Count('id'))
+        for field in ('degree', 'semester')
+    }
+
+
+def facet_counts(text=None):
+    """
+        Zwraca liczbę kursów dla każdego stopnia i semestru.
+
+        Argumenty:
+            text (str): Wyszukiwany tekst, dla którego liczone są kursy.
+
+        Zwraca:
+            dict: Słowniki {'degree': {id: liczba}, 'semester': {id: liczba}}.
+
+        Opis działania:
+            Liczniki zapamiętywane są dla każdego wyszukiwanego tekstu na FACET_CACHE_TIMEOUT
+            sekund i unieważniane po każdej zmianie kursów (invalidate_catalog).
+    """
+    key, querysets = _facet_queries(text)
+    counts = cache.get(key)
+    if counts is None:
+        counts = {field: dict(qs) for field, qs in querysets.items()}
+        cache.set(key, counts, FACET_CACHE_TIMEOUT)
+    return counts
+
+
+def facet_options(choices, counts, selected):
+    """
+        Łączy etykiety stopni lub semestrów z liczbą kursów.
+
+        Argumenty:
+            choices (tuple): Pary (identyfikator, etykieta).
+            counts (dict): Liczba kursów dla identyfikatorów.
+            selected (str): Wybrany identyfikator.
+
+        Zwraca:
+            list: Słowniki z kluczami 'value', 'label', 'count' i 'selected'.
+    """
+    selected = _parse_id(selected)
+    return [{
+        'value': value,
+        'label': label,
+        'count': counts.get(value, 0),
+        'selected': value == selected,
+    } for value, label in choices]
@@ -0,0 +1,339 @@
+import csv
+import logging
+import posixpath
+import re
+import zipfile
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .gradebook import course_assignments, course_students
+from .models import RateSubmission, Submission
+
+# Liczba wierszy pobieranych z bazy danych w jednej porcji (kursor po stronie serwera)
+EXPORT_CHUNK_SIZE = 2000
+
+logger = logging.getLogger(__name__)
+
+# Rozmiar (w bajtach), po którego przekroczeniu porcja pliku wysyłana jest do klienta
+EXPORT_FLUSH_SIZE = 64 * 1024
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'zip': 'application/zip',
+}
+
+# Znaki sterujące niedozwolone w XML
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Grades" sheetId="1" r:id="rId1"/></sheets>'
+     '</workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+)
+
+
+def _by_student(queryset):
+    # Wiersze (id studenta, id zadania, wartość...) posortowane według studenta i zadania;
+    # dla powtórzonej pary (student, zadanie) obowiązuje ostatni wiersz.
+    rows = queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for student_id, group in groupby(rows, key=lambda row: row[0]):
+        yield student_id, {row[1]: row[2:] for row in group}
+
+
+def _merge(students, *streams):
+    # Złączenie strumienia studentów ze strumieniami _by_student (wszystkie posortowane według studenta)
+    current = [next(stream, None) for stream in streams]
+    for student in students:
+        values = []
+        for index, stream in enumerate(streams):
+            while current[index] is not None and current[index][0] < student['pk']:
+                current[index] = next(stream, None)
+            if current[index] is not None and current[index][0] == student['pk']:
+                values.append(current[index][1])
+                current[index] = next(stream, None)
+            else:
+                values.append({})
+        yield student, values
+
+
+def _format_date(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def gradebook_export_rows(course_id):
+    """
+        Zwraca wiersze eksportu ocen kursu: nagłówek, a następnie jeden wiersz na studenta.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            generator: Listy wartości. Dla każdego zadania eksportowana jest ocena, komentarz
+            oraz data przesłania rozwiązania.
+
+        Opis działania:
+            Zadania kursu pobierane są jednym zapytaniem. Studenci, oceny i zgłoszenia
+            odczytywane są kursorami (QuerySet.iterator, na PostgreSQL kursory po stronie
+            serwera) posortowanymi według studenta i łączone w locie, więc pamięć nie zależy
+            od liczby studentów.
+    """
+    assignments = list(course_assignments(course_id))
+    assignment_ids = [assignment['pk'] for assignment in assignments]
+    header = ['Username', 'First name', 'Last name', 'Email']
+    for assignment in assignments:
+        header += [f'{assignment["title"]} - grade', f'{assignment["title"]} - comment',
+                   f'{assignment["title"]} - submitted']
+    yield header
+
+    students = course_students(course_id).order_by('pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    ratings = _by_student(
+        RateSubmission.objects.filter(assignment_id__in=assignment_ids)
+        .order_by('student_id', 'assignment_id', '-pk')
+        .values_list('student_id', 'assignment_id', 'grade', 'comment')
+    )
+    submissions = _by_student(
+        Submission.objects.filter(assignment_id__in=assignment_ids)
+        .order_by('student_id', 'assignment_id', 'submission_date')
+        .values_list('student_id', 'assignment_id', 'submission_date')
+    )
+    for student, (rated, submitted) in _merge(students, ratings, submissions):
+        row = [student['username'], student['first_name'], student['last_name'], student['email']]
+        for assignment_id in assignment_ids:
+            grade, comment = rated.get(assignment_id, (None, ''))
+            (submission_date,) = submitted.get(assignment_id, (None,))
+            row += [grade, comment, _format_date(submission_date)]
+        yield row
+
+
+class _Buffer:
+    # Bufor zapisu: csv.writer i zipfile zapisują do niego, a generator oddaje zebrane porcje
+    def __init__(self, empty):
+        self.empty = empty
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = self.empty.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def stream_csv(rows):
+    """
+        Zapisuje wiersze w formacie CSV, porcjami.
+
+        Argumenty:
+            rows (Iterable[list]): Wiersze do zapisania.
+
+        Zwraca:
+            generator: Kolejne porcje pliku CSV (z BOM, aby Excel rozpoznał kodowanie UTF-8).
+    """
+    buffer = _Buffer('')
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    for row in rows:
+        writer.writerow(row)
+        if buffer.size >= EXPORT_FLUSH_SIZE:
+            yield buffer.take()
+    yield buffer.take()
+
+
+async def _aiterate(chunks):
+    # Każda porcja pobierana jest osobnym przejściem do wątku, zawsze tego samego
+    # (thread_sensitive), w którym otwarto kursory bazy danych generatora
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def streaming_content(request, chunks):
+    """
+        Przygotowuje porcje pliku do wysłania jako StreamingHttpResponse.
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+            chunks (Iterator): Generator porcji pliku (np. stream_csv, stream_zip).
+
+        Zwraca:
+            Iterator: Dla żądań ASGI - iterator asynchroniczny, w pozostałych przypadkach
+            niezmieniony generator.
+
+        Opis działania:
+            Pod ASGI StreamingHttpResponse odczytuje iterator synchroniczny w całości
+            (sync_to_async(list)) przed wysłaniem pierwszego bajtu, więc cały plik trafiałby
+            do pamięci. Iterator asynchroniczny pobiera kolejne porcje dopiero wtedy, gdy
+            poprzednie zostały wysłane.
+    """
+    if isinstance(request, ASGIRequest):
+        return _aiterate(chunks)
+    return chunks
+
+
+def _column(index):
+    name = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _cell(reference, value):
+    if value is None or value == '':
+        return ''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(number, values):
+    cells = ''.join(_cell(f'{_column(index)}{number}', value) for index, value in enumerate(values))
+    return f'<row r="{number}">{cells}</row>'.encode('utf-8')
+
+
+def stream_xlsx(rows):
+    """
+        Zapisuje wiersze jako arkusz XLSX, porcjami.
+
+        Argumenty:
+            rows (Iterable[list]): Wiersze do zapisania.
+
+        Zwraca:
+            generator: Kolejne porcje pliku XLSX.
+
+        Opis działania:
+            Plik XLSX to archiwum ZIP z plikami XML. Archiwum zapisywane jest do bufora bez
+            możliwości przewijania, więc zipfile umieszcza rozmiary plików po ich treści
+            (deskryptory danych), a arkusz może być kompresowany i wysyłany wiersz po wierszu.
+    """
+    buffer = _Buffer(b'')
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS:
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            for number, values in enumerate(rows, 1):
+                sheet.write(_row(number, values))
+                if buffer.size >= EXPORT_FLUSH_SIZE:
+                    yield buffer.take()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.take()
+
+
+def submission_files(assignment_id, ungraded=False):
+    """
+        Zwraca pliki rozwiązań zadania wraz z nazwami, pod którymi trafią do archiwum.
+
+        Argumenty:
+            assignment_id (int): Identyfikator zadania.
+            ungraded (bool): Określa, czy pominąć rozwiązania studentów, którzy mają już ocenę.
+
+        Zwraca:
+            generator: Pary (nazwa w archiwum, FieldFile). Nazwa ma postać
+            '<nazwisko>_<imię>_<login>/<nazwa pliku>'.
+
+        Opis działania:
+            Zgłoszenia odczytywane są kursorem (QuerySet.iterator) razem ze studentami,
+            więc pamięć nie zależy od liczby zgłoszeń.
+    """
+    submissions = (Submission.objects.filter(assignment_id=assignment_id).exclude(file='')
+                   .select_related('student')
+                   .only('file', 'student__username', 'student__first_name', 'student__last_name')
+                   .order_by('student__last_name', 'student__first_name', 'student_id', 'pk'))
+    if ungraded:
+        submissions = submissions.exclude(Exists(RateSubmission.objects.filter(
+            assignment_id=assignment_id, student_id=OuterRef('student_id'))))
+    used = set()
+    for submission in submissions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        student = submission.student
+        folder = get_valid_filename(f'{student.last_name} {student.first_name} {student.username}'.strip())
+        member = f'{folder}/{posixpath.basename(submission.file.name)}'
+        if member in used:
+            member = f'{folder}/{submission.pk}-{posixpath.basename(submission.file.name)}'
+        used.add(member)
+        yield member, submission.file
+
+
+def stream_zip(files):
+    """
+        Zapisuje pliki z magazynu plików jako archiwum ZIP, porcjami.
+
+        Argumenty:
+            files (Iterable[tuple]): Pary (nazwa w archiwum, plik).
+
+        Zwraca:
+            generator: Kolejne porcje archiwum ZIP.
+
+        Opis działania:
+            Tak jak w stream_xlsx archiwum zapisywane jest do bufora bez możliwości
+            przewijania, a każdy plik kopiowany jest z magazynu porcjami - ani archiwum,
+            ani żaden z plików nie jest w całości przechowywany w pamięci, o ile odpowiedź
+            oddaje porcje na bieżąco (pod ASGI - przez streaming_content). Pliki, których
+            brakuje w magazynie, są pomijane.
+    """
+    buffer = _Buffer(b'')
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for member, file in files:
+            try:
+                source = file.storage.open(file.name, 'rb')
+            except OSError:
+                logger.warning(f'Stored file {file.name} is missing, skipped in archive.')
+                continue
+            with source, archive.open(member, 'w', force_zip64=True) as target:
+                for chunk in source.chunks(EXPORT_FLUSH_SIZE):
+                    target.write(chunk)
+                    if buffer.size >= EXPORT_FLUSH_SIZE:
+                        yield buffer.take()
+    yield buffer.take()
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Submission, Topic, Assignment, File, Course, Enrollment, RateSubmission, CourseFile
+from .validators import validate_file_size
 
 class SubmissionForm(forms.ModelForm):
     """
@@ -18,6 +19,9 @@ class SubmissionForm(forms.ModelForm):
             'file': forms.FileInput(attrs={'class': 'custom_file_input'}),
         }
 
+    def clean_file(self):
+        return validate_file_size(self.cleaned_data['file'])
+
 class CourseForm(forms.ModelForm):
     """
        Formularz do tworzenia kursu.
@@ -45,6 +49,13 @@ class CourseForm(forms.ModelForm):
             'access_key': forms.PasswordInput(attrs={'class': 'custom_access_key_input'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Lista wyboru odczytuje opcje dwukrotnie (atrybut required i renderowanie opcji),
+        # a każde odczytanie wykonuje zapytanie - opcje pobierane są więc raz
+        for name in ('semester', 'degree'):
+            self.fields[name].choices = list(self.fields[name].choices)
+
 class AccessKeyForm(forms.ModelForm):
     """
         Formularz do wprowadzenia klucza dostępu.
@@ -148,6 +159,9 @@ class CourseFileForm(forms.ModelForm):
         model = CourseFile
         fields = ['name','file']
 
+    def clean_file(self):
+        return validate_file_size(self.cleaned_data['file'])
+
 class RateSubmissionForm(forms.ModelForm):
     """
         Formularz do oceniania zadania przez nauczyciela.
@@ -166,6 +180,25 @@ class RateSubmissionForm(forms.ModelForm):
             'comment': forms.Textarea(attrs={'class': 'custom_comment_textarea', 'placeholder': 'Wprowadź komentarz'}),
         }
 
+class BulkGradeForm(forms.Form):
+    """
+        Formularz oceny jednego zgłoszenia w kolejce oceniania.
+
+        Pola:
+            submission (IntegerField): Ukryte pole z identyfikatorem zgłoszenia.
+            grade (FloatField): Pole do wprowadzenia oceny (puste pole pomija zgłoszenie).
+            comment (CharField): Pole do wprowadzenia komentarza.
+
+    """
+    submission = forms.IntegerField(widget=forms.HiddenInput)
+    grade = forms.FloatField(required=False, widget=forms.NumberInput(
+        attrs={'class': 'custom_grade_input', 'placeholder': 'Ocena', 'step': 'any'}))
+    comment = forms.CharField(required=False, max_length=1024, widget=forms.TextInput(
+        attrs={'class': 'custom_comment_input', 'placeholder': 'Komentarz'}))
+
+
+BulkGradeFormSet = forms.formset_factory(BulkGradeForm, extra=0)
+
 class TopicForm(forms.ModelForm):
     """
         Formularz do tworzenia nowego tematu.
@@ -0,0 +1,195 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import get_course_version
+from .models import Assignment, Course, RateSubmission
+
+# Czas przechowywania dziennika ocen kursu w pamięci podręcznej (w sekundach)
+GRADEBOOK_CACHE_TIMEOUT = 60 * 60
+
+
+def gradebook_version_key(course_id):
+    """
+        Zwraca klucz pamięci podręcznej z licznikiem wersji ocen kursu.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            str: Klucz pamięci podręcznej.
+    """
+    return f'gradebook:{course_id}:version'
+
+
+def _version(course_id):
+    key = gradebook_version_key(course_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(course_ids):
+    for course_id in course_ids:
+        try:
+            cache.incr(gradebook_version_key(course_id))
+        except ValueError:
+            cache.set(gradebook_version_key(course_id), 1, None)
+
+
+def invalidate_gradebooks(course_ids):
+    """
+        Unieważnia zapamiętane dzienniki ocen podanych kursów (po zmianie oceny).
+
+        Argumenty:
+            course_ids (Iterable[int]): Identyfikatory kursów.
+
+        Opis działania:
+            Tak jak w bump_course_versions wersja zmieniana jest od razu oraz ponownie
+            po zatwierdzeniu transakcji.
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+    _bump(course_ids)
+    transaction.on_commit(lambda: _bump(course_ids))
+
+
+def course_assignments(course_id):
+    """
+        Zwraca zadania kursu w kolejności terminów.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            QuerySet: Słowniki z kluczami 'pk', 'title' i 'due_date'.
+    """
+    return (Assignment.objects.filter(topic__course=course_id)
+            .order_by('due_date', 'pk').values('pk', 'title', 'due_date').distinct())
+
+
+def course_students(course_id):
+    """
+        Zwraca studentów zapisanych na kurs (bez nauczycieli).
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            QuerySet: Słowniki z kluczami 'pk', 'first_name', 'last_name', 'username' i 'email'.
+    """
+    return (User.objects.filter(enrollment__course_id=course_id)
+            .exclude(groups__name='Nauczyciel')
+            .values('pk', 'first_name', 'last_name', 'username', 'email').distinct())
+
+
+def _build(course_id):
+    assignments = list(course_assignments(course_id))
+    students = list(course_students(course_id).order_by('last_name', 'first_name', 'pk'))
+    grades = {}
+    # Jedno zapytanie o wszystkie oceny kursu; przy kilku ocenach tego samego zadania
+    # (od różnych nauczycieli) obowiązuje pierwsza wystawiona, tak jak dotychczas.
+    rated = (RateSubmission.objects
+             .filter(assignment__in=Assignment.objects.filter(topic__course=course_id).values('pk'))
+             .order_by('-pk').values_list('student_id', 'assignment_id', 'grade'))
+    for student_id, assignment_id, grade in rated:
+        grades[student_id, assignment_id] = grade
+    return {
+        'assignments': assignments,
+        'students': students,
+        'grades': grades,
+    }
+
+
+def course_gradebook(course_id):
+    """
+        Zwraca macierz ocen kursu (studenci x zadania).
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            dict: Zadania kursu ('assignments'), zapisani studenci ('students') oraz oceny
+            ('grades') w postaci słownika {(id studenta, id zadania): ocena}.
+
+        Opis działania:
+            Macierz wyznaczana jest trzema zapytaniami niezależnie od liczby zadań i studentów
+            i zapamiętywana. Klucz zawiera wersję kursu (zmienianą po zmianie zadań, tematów
+            i zapisów) oraz wersję ocen (zmienianą po zapisaniu lub usunięciu oceny).
+    """
+    key = f'gradebook:{course_id}:{get_course_version(course_id)}:{_version(course_id)}'
+    gradebook = cache.get(key)
+    if gradebook is None:
+        gradebook = _build(course_id)
+        cache.set(key, gradebook, GRADEBOOK_CACHE_TIMEOUT)
+    return gradebook
+
+
+def student_grades(course_id, student_id):
+    """
+        Zwraca oceny studenta ze wszystkich zadań kursu.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+            student_id (int): Identyfikator użytkownika.
+
+        Zwraca:
+            list: Pary (zadanie, ocena), gdzie ocena to None dla zadań bez oceny.
+    """
+    gradebook = course_gradebook(course_id)
+    grades = gradebook['grades']
+    return [(assignment, grades.get((student_id, assignment['pk'])))
+            for assignment in gradebook['assignments']]
+
+
+def gradebook_rows(gradebook):
+    """
+        Zwraca wiersze dziennika ocen do wyświetlenia w tabeli.
+
+        Argumenty:
+            gradebook (dict): Macierz ocen zwrócona przez course_gradebook.
+
+        Zwraca:
+            list: Pary (student, lista ocen w kolejności zadań).
+    """
+    grades = gradebook['grades']
+    return [(student, [grades.get((student['pk'], assignment['pk'])) for assignment in gradebook['assignments']])
+            for student in gradebook['students']]
+
+
+def save_grades(assignment_id, teacher, grades):
+    """
+        Zapisuje oceny wielu studentów za zadanie w jednej transakcji.
+
+        Argumenty:
+            assignment_id (int): Identyfikator zadania.
+            teacher (Profile): Profil oceniającego nauczyciela.
+            grades (Iterable[tuple]): Trójki (id studenta, ocena, komentarz).
+
+        Zwraca:
+            int: Liczba zapisanych ocen.
+
+        Opis działania:
+            Oceny zapisywane są jednym zapytaniem INSERT ... ON CONFLICT DO UPDATE
+            (bulk_create z update_conflicts) - istniejące oceny nauczyciela są aktualizowane,
+            a brakujące tworzone. bulk_create nie wysyła sygnałów post_save, dlatego dzienniki
+            ocen kursów unieważniane są tutaj.
+    """
+    ratings = [RateSubmission(assignment_id=assignment_id, teacher=teacher, student_id=student_id,
+                              grade=grade, comment=comment)
+               for student_id, grade, comment in grades]
+    if not ratings:
+        return 0
+    with transaction.atomic():
+        RateSubmission.objects.bulk_create(
+            ratings,
+            update_conflicts=True,
+            unique_fields=['assignment', 'teacher', 'student'],
+            update_fields=['grade', 'comment'],
+        )
+        invalidate_gradebooks(Course.objects.filter(topics__assignments=assignment_id)
+                              .values_list('pk', flat=True).distinct())
+    return len(ratings)
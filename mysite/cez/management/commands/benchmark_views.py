@@ -0,0 +1,134 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from asgiref.sync import ThreadSensitiveContext, async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory
+from django.urls import resolve
+from django.utils.functional import SimpleLazyObject
+
+# Adresy mierzone domyślnie
+DEFAULT_PATHS = ('/', '/courses/', '/chat/')
+
+
+def _as_sync_view(view):
+    # Tak Django wywołuje widok synchroniczny pod ASGI: cały widok, razem z oczekiwaniem
+    # na bazę danych, wykonywany jest w wątku roboczym
+    return sync_to_async(async_to_sync(view) if iscoroutinefunction(view) else view)
+
+
+class Command(BaseCommand):
+    """
+        Polecenie porównujące obsługę współbieżnych żądań przez widoki synchroniczne
+        i asynchroniczne.
+
+        Każdy adres wywoływany jest --requests razy przy --concurrency żądaniach naraz,
+        najpierw jako widok synchroniczny (widok asynchroniczny opakowany tak, jak Django
+        wywołuje widoki synchroniczne pod ASGI), a następnie - jeśli widok jest asynchroniczny -
+        bezpośrednio. Każde żądanie ma własny kontekst wątków (ThreadSensitiveContext), tak jak
+        w ASGIHandler.
+        Opcja --db-latency dodaje opóźnienie do każdego zapytania, symulując czas
+        odpowiedzi serwera bazy danych w sieci.
+
+        Wypisywana jest przepustowość, opóźnienie (mediana i 95. percentyl), największa
+        liczba jednocześnie obsługiwanych żądań i wątków procesu oraz liczba żądań
+        przypadających na wątek.
+    """
+    help = 'Compares throughput and threads per in-flight request of sync and async views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+        parser.add_argument('--user', required=True, help='Username the requests are made as.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per path and mode.')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--db-latency', type=float, default=0.002,
+                            help='Seconds added to every database query.')
+
+    def handle(self, *args, **options):
+        try:
+            user_id = User.objects.get(username=options['user']).pk
+        except User.DoesNotExist:
+            raise CommandError(f'User {options["user"]} does not exist.')
+
+        latency = options['db_latency']
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        if latency:
+            connection_created.connect(add_latency, weak=False)
+        try:
+            self.stdout.write(f'{"path":<16}{"mode":<7}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}'
+                              f'{"in-flight":>11}{"threads":>9}{"req/thread":>12}')
+            for path in options['paths']:
+                modes = ('sync', 'async') if iscoroutinefunction(resolve(path).func) else ('sync',)
+                for mode in modes:
+                    # Pętla zdarzeń bez nadrzędnego wątku synchronicznego, tak jak w serwerze ASGI
+                    result = asyncio.run(self.run(path, mode, user_id, options['requests'],
+                                                  options['concurrency']))
+                    self.stdout.write(
+                        f'{path:<16}{mode:<7}{result["throughput"]:>8.1f}{result["p50"]:>9.1f}'
+                        f'{result["p95"]:>9.1f}{result["in_flight"]:>11}{result["threads"]:>9}'
+                        f'{result["in_flight"] / result["threads"]:>12.2f}')
+        finally:
+            connection_created.disconnect(add_latency)
+
+    async def run(self, path, mode, user_id, requests, concurrency):
+        match = resolve(path)
+        view = match.func if mode == 'async' else _as_sync_view(match.func)
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        in_flight = peak_in_flight = 0
+        baseline_threads = threading.active_count()
+        peak_threads = 0
+
+        async def one():
+            nonlocal in_flight, peak_in_flight
+            async with semaphore:
+                request = factory.get(path)
+                # Tak jak AuthenticationMiddleware - użytkownik wczytywany jest przy pierwszym użyciu
+                request.user = SimpleLazyObject(lambda: User.objects.get(pk=user_id))
+                in_flight += 1
+                peak_in_flight = max(peak_in_flight, in_flight)
+                started = time.perf_counter()
+                async with ThreadSensitiveContext():
+                    response = await view(request, *match.args, **match.kwargs)
+                    # Tak jak po wysłaniu odpowiedzi (sygnał request_finished)
+                    await sync_to_async(close_old_connections)()
+                latencies.append(time.perf_counter() - started)
+                in_flight -= 1
+                if response.status_code != 200:
+                    raise CommandError(f'{path} returned {response.status_code}.')
+
+        async def sample_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, threading.active_count() - baseline_threads)
+                await asyncio.sleep(0.005)
+
+        sampler = asyncio.ensure_future(sample_threads())
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one() for _ in range(requests)))
+        finally:
+            sampler.cancel()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'throughput': requests / elapsed,
+            'p50': statistics.median(latencies) * 1000,
+            'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+            'in_flight': peak_in_flight,
+            'threads': max(peak_threads, 1),
+        }
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from cez.models import File, CourseFile, Submission
+from cez.storage import adopt_stored_files
+
+
+class Command(BaseCommand):
+    """
+        Polecenie przenoszące pliki kursów i zgłoszeń do magazynu adresowanego treścią.
+
+        Pliki przesłane przed wprowadzeniem magazynu nie mają wpisów Blob. Polecenie
+        oblicza ich skróty, usuwa powtórzone kopie i rejestruje pozostałe pliki. Można
+        je uruchamiać wielokrotnie - pliki już zarejestrowane są pomijane.
+    """
+    help = 'Registers stored course files and submissions by content hash and removes duplicate copies.'
+
+    def handle(self, *args, **options):
+        adopted, merged = adopt_stored_files([File, CourseFile, Submission])
+        self.stdout.write(f'Registered {adopted} stored files, removed {merged} duplicates.')
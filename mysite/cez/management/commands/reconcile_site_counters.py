@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from cez.stats import reconcile_counters
+
+
+class Command(BaseCommand):
+    """
+        Polecenie uzgadniające liczniki strony głównej z liczbą obiektów w bazie danych.
+
+        Liczniki zmieniane są przez sygnały przy tworzeniu i usuwaniu obiektów. Zmiany
+        wykonane z pominięciem sygnałów korygowane są przez okresowe uruchamianie polecenia
+        (np. raz na godzinę z harmonogramu cron).
+    """
+    help = 'Recounts the homepage site counters and fixes any drift.'
+
+    def handle(self, *args, **options):
+        corrected = reconcile_counters()
+        for name, previous in corrected.items():
+            self.stdout.write(f'Counter {name} corrected (was {previous}).')
+        self.stdout.write(f'Reconciled site counters, {len(corrected)} corrected.')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from cez.models import Course
+from cez.renditions import render_course_image
+
+
+class Command(BaseCommand):
+    """
+        Polecenie tworzące brakujące wersje obrazów kursów.
+
+        Przydatne po wdrożeniu wersji obrazów dla kursów utworzonych wcześniej.
+        Obrazy nowych kursów przetwarzane są automatycznie w tle.
+    """
+    help = 'Renders missing responsive course image renditions.'
+
+    def handle(self, *args, **options):
+        courses = (Course.objects.filter(image_hash='')
+                   .exclude(image='').exclude(image__isnull=True)
+                   .values_list('pk', 'image'))
+        count = 0
+        for course_id, image in courses.iterator():
+            try:
+                render_course_image(course_id, image)
+                count += 1
+            except Exception as e:
+                self.stderr.write(f'Course {course_id}: {e}')
+        self.stdout.write(f'Processed {count} course images.')
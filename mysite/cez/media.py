@@ -0,0 +1,201 @@
+import mimetypes
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.encoding import filepath_to_uri
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+from .exports import streaming_content
+from .models import Blob, Course, Submission
+
+# Rozmiar porcji (w bajtach), w jakich plik odczytywany jest przy wysyłaniu pod ASGI
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+# Katalogi plików dostępnych tylko dla uprawnionych użytkowników (pliki kursów i rozwiązania)
+PROTECTED_MEDIA_DIRS = ('pdf_files/', 'temp/')
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_protected(name):
+    """
+        Sprawdza, czy plik wymaga sprawdzenia uprawnień przed pobraniem.
+
+        Argumenty:
+            name (str): Nazwa pliku w magazynie plików.
+
+        Zwraca:
+            bool: True dla plików kursów i rozwiązań.
+    """
+    return name.startswith(PROTECTED_MEDIA_DIRS)
+
+
+def can_access(user, name):
+    """
+        Sprawdza, czy użytkownik może pobrać plik kursu lub rozwiązanie.
+
+        Argumenty:
+            user (User): Użytkownik.
+            name (str): Nazwa pliku w magazynie plików.
+
+        Zwraca:
+            bool: True dla plików kursu - dla nauczyciela prowadzącego kurs i zapisanych na niego
+            studentów, a dla rozwiązań - dla ich autora i nauczyciela prowadzącego kurs zadania.
+    """
+    if not user.is_authenticated:
+        return False
+    return (Submission.objects.filter(Q(student=user) | Q(assignment__topics__course__teacher__user=user),
+                                      file=name).exists()
+            or Course.objects.filter(Q(enrollment__student=user) | Q(teacher__user=user),
+                                     topics__files__file=name).exists())
+
+
+def parse_range(header, size):
+    """
+        Odczytuje zakres bajtów z nagłówka Range.
+
+        Argumenty:
+            header (str): Wartość nagłówka Range.
+            size (int): Rozmiar pliku w bajtach.
+
+        Zwraca:
+            tuple: Pierwszy i ostatni bajt zakresu, None dla zakresu niemożliwego do spełnienia
+            lub ... (Ellipsis), gdy nagłówek należy pominąć i wysłać cały plik (brak nagłówka,
+            niepoprawna składnia lub kilka zakresów).
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return ...
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return ...
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first > last:
+        return None if first >= size else ...
+    return first, last
+
+
+class _RangeFile:
+    # Plik ograniczony do zakresu bajtów; fileno() pozwala serwerowi WSGI (np. gunicorn)
+    # wysłać zakres funkcją os.sendfile od bieżącej pozycji pliku.
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _chunks(file):
+    try:
+        while data := file.read(MEDIA_CHUNK_SIZE):
+            yield data
+    finally:
+        file.close()
+
+
+def _validators(storage, name):
+    blob = Blob.objects.filter(name=name).values_list('sha256', flat=True).first()
+    modified = storage.get_modified_time(name)
+    size = storage.size(name)
+    etag = quote_etag(blob or f'{int(modified.timestamp()):x}-{size:x}')
+    return etag, modified.timestamp(), size
+
+
+def serve(request, storage, name):
+    """
+        Wysyła plik z magazynu plików z obsługą żądań warunkowych i zakresów bajtów.
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+            storage (Storage): Magazyn plików.
+            name (str): Nazwa pliku w magazynie.
+
+        Zwraca:
+            HttpResponse: Odpowiedź z plikiem (200 lub 206), 304, 412, 416 lub przekierowanie.
+
+        Wyjątki:
+            Http404: Jeśli plik nie istnieje.
+
+        Opis działania:
+            Gdy ustawiono MEDIA_OFFLOAD, treść pliku wysyła serwer frontowy: nginx
+            (nagłówek X-Accel-Redirect ze ścieżką MEDIA_ACCEL_PREFIX) lub Apache (X-Sendfile),
+            i on obsługuje zakresy bajtów - to zalecane ustawienie produkcyjne. W przeciwnym razie
+            plik z lokalnego dysku wysyła Django: pod ASGI porcjami iteratorem asynchronicznym
+            (cez.exports.streaming_content), bo FileResponse zostałby odczytany w całości do
+            pamięci przed wysłaniem, a pod WSGI jako FileResponse, który serwer może skopiować
+            funkcją os.sendfile (wsgi.file_wrapper). Plik spoza lokalnego dysku (np. Google Cloud Storage) jest pobierany
+            bezpośrednio z magazynu przez przekierowanie na jego (podpisany) adres.
+
+            ETag plików z magazynu adresowanego treścią to skrót SHA-256 ich zawartości,
+            a pozostałych - czas modyfikacji i rozmiar.
+    """
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        return HttpResponseRedirect(storage.url(name))
+    if not storage.exists(name):
+        raise Http404
+
+    etag, modified, size = _validators(storage, name)
+    response = get_conditional_response(request, etag=etag, last_modified=int(modified))
+    if response is not None:
+        return response
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    offload = getattr(settings, 'MEDIA_OFFLOAD', None)
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + filepath_to_uri(name)
+        else:
+            response['X-Sendfile'] = path
+    else:
+        byte_range = ...
+        if_range = request.headers.get('If-Range')
+        if not if_range or if_range == etag or parse_http_date_safe(if_range) == int(modified):
+            byte_range = parse_range(request.headers.get('Range'), size)
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        file = open(path, 'rb')
+        first, last = (0, size - 1) if byte_range is ... else byte_range
+        status = 200 if byte_range is ... else 206
+        file.seek(first)
+        content = _RangeFile(file, last - first + 1)
+        if isinstance(request, ASGIRequest):
+            response = StreamingHttpResponse(streaming_content(request, _chunks(content)), status=status,
+                                             content_type=content_type)
+        else:
+            response = FileResponse(content, status=status, content_type=content_type)
+        response['Content-Length'] = last - first + 1
+        if status == 206:
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(False, posixpath.basename(name))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    return response
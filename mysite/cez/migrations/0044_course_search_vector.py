@@ -0,0 +1,60 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:22
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Dokument wyszukiwania kursu: tytuł (waga A) i opis (waga B), konfiguracja 'simple'
+# (bez słownika języka - tytuły kursów są w języku polskim i angielskim).
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION cez_course_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS cez_course_search_vector_trigger ON cez_course;
+CREATE TRIGGER cez_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON cez_course
+    FOR EACH ROW EXECUTE PROCEDURE cez_course_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS cez_course_search_vector_idx ON cez_course USING gin (search_vector);
+
+UPDATE cez_course SET title = title;
+"""
+
+DROP_TRIGGER = """
+DROP INDEX IF EXISTS cez_course_search_vector_idx;
+DROP TRIGGER IF EXISTS cez_course_search_vector_trigger ON cez_course;
+DROP FUNCTION IF EXISTS cez_course_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cez', '0043_course_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
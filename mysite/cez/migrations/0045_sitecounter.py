@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+COUNTED_MODELS = (
+    ('courses', 'cez', 'Course'),
+    ('users', 'auth', 'User'),
+    ('topics', 'cez', 'Topic'),
+)
+
+
+def create_counters(apps, schema_editor):
+    SiteCounter = apps.get_model('cez', 'SiteCounter')
+    for name, app_label, model_name in COUNTED_MODELS:
+        value = apps.get_model(app_label, model_name).objects.count()
+        SiteCounter.objects.create(name=name, value=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('cez', '0044_course_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:28
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_ratings(apps, schema_editor):
+    # Pozostawia pierwszą wystawioną ocenę, tak jak wyświetlały ją dotychczas widoki
+    RateSubmission = apps.get_model('cez', 'RateSubmission')
+    duplicates = (RateSubmission.objects.values('assignment', 'teacher', 'student')
+                  .annotate(first=Min('pk'), count=models.Count('pk')).filter(count__gt=1))
+    for duplicate in duplicates:
+        (RateSubmission.objects
+         .filter(assignment=duplicate['assignment'], teacher=duplicate['teacher'], student=duplicate['student'])
+         .exclude(pk=duplicate['first']).delete())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cez', '0045_sitecounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_ratings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ratesubmission',
+            constraint=models.UniqueConstraint(fields=('assignment', 'teacher', 'student'), name='cez_ratesubmission_unique_rating'),
+        ),
+    ]
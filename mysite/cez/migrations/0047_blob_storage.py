@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:34
+
+import cez.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cez', '0046_ratesubmission_unique_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='coursefile',
+            name='file',
+            field=models.FileField(max_length=255, storage=cez.storage.get_blob_storage, upload_to='pdf_files/'),
+        ),
+        migrations.AlterField(
+            model_name='file',
+            name='file',
+            field=models.FileField(max_length=255, storage=cez.storage.get_blob_storage, upload_to='pdf_files/'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='file',
+            field=models.FileField(max_length=255, storage=cez.storage.get_blob_storage, upload_to='temp'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:37
+
+import cez.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cez', '0047_blob_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='coursefile',
+            name='file',
+            field=models.FileField(db_index=True, max_length=255, storage=cez.storage.get_blob_storage, upload_to='pdf_files/'),
+        ),
+        migrations.AlterField(
+            model_name='file',
+            name='file',
+            field=models.FileField(db_index=True, max_length=255, storage=cez.storage.get_blob_storage, upload_to='pdf_files/'),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='file',
+            field=models.FileField(db_index=True, max_length=255, storage=cez.storage.get_blob_storage, upload_to='temp'),
+        ),
+    ]
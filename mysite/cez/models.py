@@ -1,12 +1,13 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from users.models import Profile
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta
 import shutil
 import os
-from PIL import Image
-from django.core.files.storage import default_storage as storage
-from io import BytesIO
+from mysite.tasks import run_in_background
+from . import renditions
+from .storage import get_blob_storage
 
 class Topic(models.Model):
     """
@@ -41,7 +42,7 @@ class File(models.Model):
            __str__(): Zwraca czytelną reprezentację pliku, czyli jego nazwę.
 
     """
-    file = models.FileField(upload_to='pdf_files/')
+    file = models.FileField(upload_to='pdf_files/', storage=get_blob_storage, max_length=255, db_index=True)
 
     def __str__(self):
         return f"{self.file.name}"
@@ -59,7 +60,7 @@ class CourseFile(models.Model):
 
     """
     name = models.CharField(max_length=64, blank=False)
-    file = models.FileField(upload_to='pdf_files/')
+    file = models.FileField(upload_to='pdf_files/', storage=get_blob_storage, max_length=255, db_index=True)
 
     def __str__(self):
         return f"{self.name}"
@@ -103,7 +104,7 @@ class Submission(models.Model):
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, null=True)
     student = models.ForeignKey(User, on_delete=models.CASCADE)
     submission_date = models.DateTimeField(auto_now_add=True)
-    file = models.FileField(upload_to='temp')
+    file = models.FileField(upload_to='temp', storage=get_blob_storage, max_length=255, db_index=True)
 
     # '''W dalszej części jeżeli będzie potrzeba to plik będzie zapisywany do folderu danego zadania'''
     # def save(self, *args, **kwargs ):
@@ -129,6 +130,9 @@ class RateSubmission(models.Model):
            grade (FloatField): Ocena wystawiona przez nauczyciela, domyślnie ustawiona na 0.
            comment (CharField): Komentarz do oceny, maksymalnie 1024 znaki.
 
+       Nauczyciel może wystawić studentowi jedną ocenę za zadanie (ograniczenie unikalności
+       umożliwia zapisywanie wielu ocen jednym zapytaniem INSERT ... ON CONFLICT).
+
     """
     assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, null=True)
     teacher = models.ForeignKey(Profile, on_delete=models.CASCADE)
@@ -136,6 +140,12 @@ class RateSubmission(models.Model):
     grade = models.FloatField(default=0)
     comment = models.CharField(max_length=1024)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['assignment', 'teacher', 'student'],
+                                    name='cez_ratesubmission_unique_rating'),
+        ]
+
 
 class Semester(models.Model):
     """
@@ -180,11 +190,18 @@ class Course(models.Model):
            semester (ForeignKey): Powiązanie z modelem Semester, określa semestr, do którego przypisany jest kurs.
            degree (ForeignKey): Powiązanie z modelem Degree, określa stopień naukowy, do którego przypisany jest kurs.
            image (ImageField): Obraz reprezentujący kurs.
+           image_hash (CharField): Skrót SHA-256 obrazu, dla którego utworzono wersje o różnych rozmiarach.
+           image_widths (JSONField): Szerokości zapisanych wersji obrazu.
+           image_placeholder (TextField): Rozmyty podgląd obrazu w postaci data URI.
            access_key (CharField): Klucz dostępu do kursu.
+           search_vector (SearchVectorField): Dokument wyszukiwania pełnotekstowego (tytuł i opis),
+               aktualizowany przez wyzwalacz bazy danych PostgreSQL.
 
        Metody:
            __str__(): Zwraca czytelną reprezentację kursu, czyli jego tytuł.
-           save(): Przeskalowuje obraz kursu do odpowiednich wymiarów przed zapisaniem.
+           image_changed(): Sprawdza, czy obraz kursu został zmieniony.
+           image_srcset(extension): Zwraca wartość atrybutu srcset dla wersji obrazu w danym formacie.
+           save(): Zleca w tle utworzenie wersji obrazu, jeśli obraz kursu został zmieniony.
 
     """
     teacher = models.ForeignKey(Profile, on_delete=models.CASCADE)
@@ -194,23 +211,42 @@ class Course(models.Model):
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE, default=1)
     degree = models.ForeignKey(Degree, on_delete=models.CASCADE, default=1)
     image = models.ImageField(upload_to='course_images/', blank=True, null=True, default="course_images/default_course.jpg")
+    image_hash = models.CharField(max_length=64, blank=True, editable=False)
+    image_widths = models.JSONField(default=list, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
     access_key = models.CharField(max_length=50)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_image = self.image.name
+
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        super(Course, self).save(*args, **kwargs)
+    def image_changed(self):
+        return self._state.adding or self.image.name != self._saved_image
 
-        image_read = storage.open(self.image.name, "r")
-        img = Image.open(image_read)
+    def image_srcset(self, extension):
+        if not self.image_widths:
+            return ''
+        return renditions.srcset(self.image.name, self.image_hash, self.image_widths, extension)
 
-        if img.height > 612 or img.width > 408:
-            imageBuffer = BytesIO()
-            output_size = (612, 408)
-            img.thumbnail(output_size)
-            img.save(imageBuffer, img.format)
+    def save(self, *args, **kwargs):
+        changed = self.image_changed()
+        if changed:
+            self.image_hash = ''
+            self.image_widths = []
+            self.image_placeholder = ''
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'image_hash', 'image_widths', 'image_placeholder'}
 
-        image_read.close()
+        super(Course, self).save(*args, **kwargs)
+        self._saved_image = self.image.name
+
+        if changed and self.image.name:
+            run_in_background(renditions.render_course_image, self.pk, self.image.name)
 
 class Enrollment(models.Model):
     """
@@ -229,5 +265,44 @@ class Enrollment(models.Model):
     joined_at = models.DateTimeField(auto_now_add=True)
 
 
+class SiteCounter(models.Model):
+    """
+        Model przechowujący licznik wyświetlany na stronie głównej (np. liczbę kursów).
+
+        Atrybuty:
+            name (CharField): Nazwa licznika.
+            value (BigIntegerField): Wartość licznika.
+
+        Metody:
+            __str__(): Zwraca nazwę i wartość licznika.
+
+    """
+    name = models.CharField(max_length=32, unique=True)
+    value = models.BigIntegerField(default=0)
 
+    def __str__(self):
+        return f'{self.name}: {self.value}'
 
+class Blob(models.Model):
+    """
+        Model reprezentujący plik zapisany w magazynie adresowanym treścią.
+
+        Atrybuty:
+            sha256 (CharField): Skrót SHA-256 zawartości pliku.
+            name (CharField): Nazwa pliku w magazynie plików.
+            size (BigIntegerField): Rozmiar pliku w bajtach.
+            refcount (PositiveIntegerField): Liczba pól plików wskazujących na plik.
+            created (DateTimeField): Data zapisania pliku.
+
+        Metody:
+            __str__(): Zwraca nazwę pliku.
+
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
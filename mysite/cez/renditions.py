@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from PIL import Image, ImageFilter, ImageOps, features
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage as storage
+
+logger = logging.getLogger(__name__)
+
+# Szerokości (w pikselach) zapisywanych wersji obrazu kursu
+RENDITION_WIDTHS = (320, 640, 960)
+
+# Formaty zapisywanych wersji: nowoczesny format oraz format zastępczy
+RENDITION_FORMATS = (('webp', 'WEBP'), ('jpg', 'JPEG')) if features.check('webp') else (('jpg', 'JPEG'),)
+
+# Szerokość rozmytego podglądu osadzanego bezpośrednio w stronie
+PLACEHOLDER_WIDTH = 16
+
+
+def image_hash(source_name):
+    """
+        Oblicza skrót SHA-256 zawartości pliku obrazu.
+
+        Argumenty:
+            source_name (str): Nazwa pliku w magazynie plików.
+
+        Zwraca:
+            str: Skrót zawartości zapisany szesnastkowo.
+    """
+    digest = hashlib.sha256()
+    with storage.open(source_name, 'rb') as source:
+        for chunk in source.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rendition_widths(width):
+    """
+        Zwraca szerokości wersji, które mają sens dla obrazu o podanej szerokości.
+
+        Argumenty:
+            width (int): Szerokość oryginalnego obrazu.
+
+        Zwraca:
+            list: Szerokości nie większe niż oryginał (co najmniej jedna).
+    """
+    widths = [w for w in RENDITION_WIDTHS if w <= width]
+    return widths or [width]
+
+
+def rendition_name(source_name, digest, width, extension):
+    """
+        Zwraca nazwę pliku wersji obrazu zapisanej obok oryginału.
+
+        Argumenty:
+            source_name (str): Nazwa oryginalnego pliku.
+            digest (str): Skrót zawartości oryginału.
+            width (int): Szerokość wersji.
+            extension (str): Rozszerzenie pliku wersji.
+
+        Zwraca:
+            str: Nazwa pliku wersji. Ten sam obraz przesłany wielokrotnie
+            (np. domyślny obraz kursu) korzysta z tych samych wersji.
+    """
+    return f'{os.path.dirname(source_name)}/renditions/{digest[:20]}_{width}w.{extension}'
+
+
+def srcset(source_name, digest, widths, extension):
+    """
+        Buduje wartość atrybutu srcset dla zapisanych wersji obrazu.
+
+        Argumenty:
+            source_name (str): Nazwa oryginalnego pliku.
+            digest (str): Skrót zawartości oryginału.
+            widths (list): Szerokości zapisanych wersji.
+            extension (str): Rozszerzenie wersji.
+
+        Zwraca:
+            str: Wartość atrybutu srcset.
+    """
+    return ', '.join(
+        f'{storage.url(rendition_name(source_name, digest, width, extension))} {width}w'
+        for width in widths
+    )
+
+
+def _encode(img, image_format):
+    buffer = BytesIO()
+    img.save(buffer, image_format, quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def render_renditions(source_name, digest):
+    """
+        Tworzy wersje obrazu o stałych szerokościach oraz rozmyty podgląd.
+
+        Argumenty:
+            source_name (str): Nazwa oryginalnego pliku.
+            digest (str): Skrót zawartości oryginału.
+
+        Zwraca:
+            tuple: Lista szerokości zapisanych wersji oraz podgląd w postaci data URI.
+
+        Opis działania:
+            Obraz jest dekodowany jeden raz. Wersje, które już istnieją w magazynie
+            plików (ten sam skrót zawartości), nie są tworzone ponownie.
+    """
+    with storage.open(source_name, 'rb') as source:
+        img = Image.open(source)
+        img = ImageOps.exif_transpose(img).convert('RGB')
+
+    widths = rendition_widths(img.width)
+    for width in widths:
+        resized = None
+        for extension, image_format in RENDITION_FORMATS:
+            name = rendition_name(source_name, digest, width, extension)
+            if storage.exists(name):
+                continue
+            if resized is None:
+                resized = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+            storage.save(name, ContentFile(_encode(resized, image_format)))
+
+    placeholder = img.resize((PLACEHOLDER_WIDTH, max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))))
+    placeholder = placeholder.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    placeholder.save(buffer, 'JPEG', quality=40)
+    data_uri = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+    return widths, data_uri
+
+
+def render_course_image(course_id, source_name):
+    """
+        Przygotowuje wersje obrazu kursu i zapisuje ich opis w kursie.
+
+        Argumenty:
+            course_id (int): Identyfikator kursu.
+            source_name (str): Nazwa pliku obrazu, dla którego zlecono przetwarzanie.
+
+        Opis działania:
+            Zadanie wykonywane jest w tle (mysite.tasks.run_in_background). Jeśli kurs ma już
+            wersje dla obrazu o tym samym skrócie zawartości, nic nie jest robione. Jeśli ten
+            sam obraz ma już inny kurs, jego wersje są wykorzystywane bez dekodowania obrazu.
+            Kurs aktualizowany jest tylko wtedy, gdy nadal wskazuje na ten sam obraz.
+    """
+    from .models import Course
+
+    digest = image_hash(source_name)
+    if Course.objects.filter(pk=course_id, image=source_name, image_hash=digest).exists():
+        return
+    rendered = (Course.objects.filter(image_hash=digest, image__startswith=os.path.dirname(source_name))
+                .exclude(image_placeholder='')
+                .values_list('image_widths', 'image_placeholder')
+                .first())
+    widths, placeholder = rendered or render_renditions(source_name, digest)
+    Course.objects.filter(pk=course_id, image=source_name).update(
+        image_hash=digest,
+        image_widths=widths,
+        image_placeholder=placeholder,
+    )
+    logger.info(f'Image renditions {widths} rendered for course {course_id}.')
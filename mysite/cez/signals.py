@@ -0,0 +1,264 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from mysite.cache import invalidate
+
+from .cache import bump_course_versions, reset_course_version, course_version_key
+from .catalog import invalidate_catalog
+from .gradebook import invalidate_gradebooks
+from .stats import add_to_counter, SITE_COUNTERS
+from .models import Course, Topic, File, CourseFile, Assignment, Enrollment, RateSubmission, Submission
+
+# Nazwy liczników strony głównej dla modeli
+COUNTER_NAMES = {model: name for name, model in SITE_COUNTERS.items()}
+
+# Przestrzenie nazw pamięci podręcznej (mysite.cache) unieważniane po zmianie modeli
+CACHE_NAMESPACES = {
+    Course: 'course',
+    Topic: 'topic',
+    Assignment: 'assignment',
+    Enrollment: 'enrollment',
+    RateSubmission: 'rating',
+}
+
+# Modele, dla których unieważniany jest tylko zakres studenta, którego dotyczy zmiana
+STUDENT_SCOPED_NAMESPACES = {Enrollment, RateSubmission}
+
+
+def course_ids_for(model, pks):
+    """
+        Zwraca identyfikatory kursów, do których należą podane obiekty.
+
+        Argumenty:
+            model (Model): Klasa modelu (Course, Topic, CourseFile, Assignment lub Enrollment).
+            pks (Iterable[int]): Identyfikatory obiektów.
+
+        Zwraca:
+            list: Identyfikatory kursów.
+    """
+    pks = list(pks or [])
+    if not pks:
+        return []
+    if model is Course:
+        return pks
+    if model is Enrollment:
+        return list(Enrollment.objects.filter(pk__in=pks).values_list('course_id', flat=True))
+    lookups = {
+        Topic: 'topics__in',
+        CourseFile: 'topics__files__in',
+        Assignment: 'topics__assignments__in',
+    }
+    return list(Course.objects.filter(**{lookups[model]: pks}).values_list('pk', flat=True).distinct())
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, **kwargs):
+    """
+        Ustawia nową wersję dla utworzonego kursu lub zmienia wersję zaktualizowanego kursu
+        oraz unieważnia zapamiętane liczniki katalogu kursów.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Course): Zapisany kurs.
+            created (bool): Określa, czy kurs został właśnie utworzony.
+
+    """
+    if created:
+        reset_course_version(instance.pk)
+    else:
+        bump_course_versions([instance.pk])
+    invalidate_catalog()
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    """
+        Usuwa licznik wersji usuniętego kursu i unieważnia zapamiętane liczniki katalogu kursów.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Course): Usunięty kurs.
+
+    """
+    cache.delete(course_version_key(instance.pk))
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=CourseFile)
+@receiver(post_save, sender=Assignment)
+@receiver(post_save, sender=Enrollment)
+@receiver(pre_delete, sender=Topic)
+@receiver(pre_delete, sender=CourseFile)
+@receiver(pre_delete, sender=Assignment)
+@receiver(pre_delete, sender=Enrollment)
+def course_content_changed(sender, instance, **kwargs):
+    """
+        Zmienia wersję kursów, których treść obejmuje zapisany lub usuwany obiekt.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Zapisany lub usuwany obiekt.
+
+        Opis działania:
+            Przy usuwaniu używany jest sygnał pre_delete, ponieważ po usunięciu obiektu
+            jego powiązania z tematami i kursami już nie istnieją.
+    """
+    bump_course_versions(course_ids_for(sender, [instance.pk]))
+
+
+@receiver(m2m_changed, sender=Course.topics.through)
+@receiver(m2m_changed, sender=Topic.files.through)
+@receiver(m2m_changed, sender=Topic.assignments.through)
+def course_relations_changed(sender, instance, action, model, pk_set, **kwargs):
+    """
+        Zmienia wersję kursów po zmianie powiązań kurs - temat - plik/zadanie.
+
+        Argumenty:
+            sender (Model): Model pośredni relacji.
+            instance (Model): Instancja, której relacja została zmieniona.
+            action (str): Rodzaj zmiany.
+            model (Model): Klasa obiektów po drugiej stronie relacji.
+            pk_set (set): Identyfikatory obiektów po drugiej stronie relacji.
+
+        Opis działania:
+            Kursy wyznaczane są wtedy, gdy powiązania jeszcze istnieją, czyli po dodaniu
+            oraz przed usunięciem lub wyczyszczeniem relacji.
+    """
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+    course_ids = set(course_ids_for(type(instance), [instance.pk]))
+    course_ids.update(course_ids_for(model, pk_set))
+    bump_course_versions(course_ids)
+
+
+@receiver(post_save, sender=RateSubmission)
+@receiver(post_delete, sender=RateSubmission)
+def rating_changed(sender, instance, **kwargs):
+    """
+        Unieważnia dzienniki ocen kursów, do których należy oceniane zadanie.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (RateSubmission): Zapisana lub usunięta ocena.
+
+    """
+    if instance.assignment_id is not None:
+        invalidate_gradebooks(course_ids_for(Assignment, [instance.assignment_id]))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Topic)
+def counted_object_created(sender, instance, created, **kwargs):
+    """
+        Zwiększa licznik strony głównej po utworzeniu kursu, użytkownika lub tematu.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Zapisany obiekt.
+            created (bool): Określa, czy obiekt został właśnie utworzony.
+
+    """
+    if created and not kwargs.get('raw'):
+        add_to_counter(COUNTER_NAMES[sender], 1)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Topic)
+def counted_object_deleted(sender, instance, **kwargs):
+    """
+        Zmniejsza licznik strony głównej po usunięciu kursu, użytkownika lub tematu.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Usunięty obiekt.
+
+    """
+    add_to_counter(COUNTER_NAMES[sender], -1)
+
+
+@receiver(pre_save, sender=File)
+@receiver(pre_save, sender=CourseFile)
+@receiver(pre_save, sender=Submission)
+def stored_file_replacing(sender, instance, **kwargs):
+    """
+        Zapamiętuje nazwę dotychczasowego pliku obiektu, którego plik jest zastępowany.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Zapisywany obiekt (File, CourseFile lub Submission).
+
+    """
+    instance._replaced_file = None
+    if instance.pk is None or kwargs.get('raw') or instance.file._committed:
+        return
+    previous = sender.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+    if previous and previous != instance.file.name:
+        instance._replaced_file = previous
+
+
+@receiver(post_save, sender=File)
+@receiver(post_save, sender=CourseFile)
+@receiver(post_save, sender=Submission)
+def stored_file_replaced(sender, instance, **kwargs):
+    """
+        Zwalnia odwołanie do zastąpionego pliku w magazynie plików.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Zapisany obiekt (File, CourseFile lub Submission).
+
+    """
+    previous = getattr(instance, '_replaced_file', None)
+    if previous:
+        instance._replaced_file = None
+        storage = instance.file.storage
+        transaction.on_commit(lambda: storage.delete(previous))
+
+
+@receiver(post_delete, sender=File)
+@receiver(post_delete, sender=CourseFile)
+@receiver(post_delete, sender=Submission)
+def stored_file_deleted(sender, instance, **kwargs):
+    """
+        Zwalnia odwołanie do pliku usuniętego obiektu w magazynie plików.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Usunięty obiekt (File, CourseFile lub Submission).
+
+    """
+    if instance.file.name:
+        name, storage = instance.file.name, instance.file.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Assignment)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_save, sender=RateSubmission)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Assignment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=RateSubmission)
+def cached_model_changed(sender, instance, **kwargs):
+    """
+        Unieważnia wyniki zapamiętane przez cached_query i cached_fragment w przestrzeni
+        nazw zmienionego modelu.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Zapisany lub usunięty obiekt.
+
+    """
+    if sender in STUDENT_SCOPED_NAMESPACES:
+        invalidate(CACHE_NAMESPACES[sender], instance.student_id)
+    else:
+        invalidate(CACHE_NAMESPACES[sender])
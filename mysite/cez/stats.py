@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Course, Topic, SiteCounter
+
+# Liczniki strony głównej i modele, których obiekty zliczają
+SITE_COUNTERS = {
+    'courses': Course,
+    'users': User,
+    'topics': Topic,
+}
+
+STATS_CACHE_KEY = 'site:counters'
+
+# Czas przechowywania liczników w pamięci podręcznej (w sekundach)
+STATS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _invalidate():
+    transaction.on_commit(lambda: cache.delete(STATS_CACHE_KEY))
+
+
+def add_to_counter(name, delta):
+    """
+        Zmienia wartość licznika o podaną liczbę.
+
+        Argumenty:
+            name (str): Nazwa licznika.
+            delta (int): Zmiana wartości (np. 1 po utworzeniu obiektu, -1 po usunięciu).
+
+        Opis działania:
+            Licznik zmieniany jest w bieżącej transakcji, więc wycofanie transakcji wycofuje
+            także zmianę licznika. Zapamiętane liczniki usuwane są z pamięci podręcznej po
+            zatwierdzeniu transakcji. Brakujący licznik jest wyznaczany od nowa.
+    """
+    if not SiteCounter.objects.filter(name=name).update(value=F('value') + delta):
+        reconcile_counters([name])
+        return
+    _invalidate()
+
+
+def reconcile_counters(names=None):
+    """
+        Wyznacza liczniki od nowa na podstawie liczby obiektów w bazie danych.
+
+        Argumenty:
+            names (Iterable[str]): Nazwy liczników (domyślnie wszystkie).
+
+        Zwraca:
+            dict: Nazwy liczników i ich poprzednie wartości (None dla nowych liczników),
+            które różniły się od wyznaczonych.
+
+        Opis działania:
+            Zmiany wykonane z pominięciem sygnałów (np. bulk_create lub QuerySet.update)
+            nie zmieniają liczników, dlatego należy je okresowo uzgadniać poleceniem
+            reconcile_site_counters (np. z harmonogramu cron).
+    """
+    names = list(names or SITE_COUNTERS)
+    previous = dict(SiteCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    corrected = {}
+    for name in names:
+        value = SITE_COUNTERS[name].objects.count()
+        if previous.get(name) != value:
+            SiteCounter.objects.update_or_create(name=name, defaults={'value': value})
+            corrected[name] = previous.get(name)
+    _invalidate()
+    return corrected
+
+
+def site_counters():
+    """
+        Zwraca liczniki strony głównej.
+
+        Zwraca:
+            dict: Nazwy liczników i ich wartości.
+
+        Opis działania:
+            Liczniki odczytywane są z pamięci podręcznej, a po jej unieważnieniu jednym
+            zapytaniem z tabeli liczników - bez zliczania obiektów.
+    """
+    counters = cache.get(STATS_CACHE_KEY)
+    if counters is None:
+        counters = dict(SiteCounter.objects.values_list('name', 'value'))
+        missing = set(SITE_COUNTERS) - set(counters)
+        if missing:
+            reconcile_counters(missing)
+            counters = dict(SiteCounter.objects.values_list('name', 'value'))
+        cache.set(STATS_CACHE_KEY, counters, STATS_CACHE_TIMEOUT)
+    return counters
@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import posixpath
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.encoding import filepath_to_uri
+
+logger = logging.getLogger(__name__)
+
+# Rozmiar porcji (w bajtach), w jakich obliczany jest skrót pliku bez skrótu z przesyłania
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_sha256(content):
+    """
+        Oblicza skrót SHA-256 zawartości pliku.
+
+        Argumenty:
+            content (File): Plik.
+
+        Zwraca:
+            str: Skrót zapisany szesnastkowo.
+
+        Opis działania:
+            Pliki przesłane przez LimitedUploadHandler mają skrót obliczony w trakcie
+            odbierania (atrybut sha256) - wtedy plik nie jest czytany ponownie.
+    """
+    digest = getattr(content, 'sha256', '')
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        sha256.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return sha256.hexdigest()
+
+
+def blob_name(name, digest, max_length=None):
+    """
+        Zwraca nazwę, pod którą zapisywana jest zawartość o podanym skrócie.
+
+        Argumenty:
+            name (str): Nazwa pliku wyznaczona przez pole (katalog upload_to i nazwa pliku).
+            digest (str): Skrót SHA-256 zawartości.
+            max_length (int): Maksymalna długość nazwy.
+
+        Zwraca:
+            str: Nazwa w postaci '<katalog>/<ab>/<skrót>/<nazwa pliku>'. Oryginalna nazwa pliku
+            zostaje zachowana, aby pobierany plik miał czytelną nazwę.
+    """
+    directory, filename = posixpath.split(name)
+    prefix = posixpath.join(directory, digest[:2], digest, '')
+    if max_length and len(prefix) + len(filename) > max_length:
+        stem, extension = posixpath.splitext(filename)
+        filename = stem[:max(max_length - len(prefix) - len(extension), 1)] + extension
+    return prefix + filename
+
+
+class BlobStorage(Storage):
+    """
+        Magazyn plików adresowany treścią, z deduplikacją i licznikiem odwołań.
+
+        Atrybuty:
+            backend (Storage): Magazyn, w którym zapisywane są pliki (domyślnie default_storage).
+
+        Opis działania:
+            Zapisywany plik identyfikowany jest skrótem SHA-256 zawartości. Jeśli plik o tym
+            skrócie jest już w magazynie (model Blob), zwracana jest jego nazwa i zwiększany
+            licznik odwołań - zawartość nie jest wysyłana ponownie. W przeciwnym razie plik
+            zapisywany jest w magazynie pod nazwą zawierającą skrót.
+
+            delete() zmniejsza licznik odwołań; plik usuwany jest z magazynu dopiero po
+            usunięciu ostatniego odwołania (po zatwierdzeniu transakcji). Pliki zapisane przed
+            wprowadzeniem magazynu (bez wpisu Blob) są odczytywane i usuwane jak dotychczas,
+            a polecenie dedupe_stored_files przenosi je do magazynu.
+
+            Pozostałe operacje (open, size, ...) przekazywane są do magazynu backend,
+            więc FieldFile zachowuje dotychczasowy interfejs. Adresy plików wskazują na
+            widok media, który sprawdza uprawnienia przed wysłaniem pliku.
+    """
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or default_storage
+
+    def save(self, name, content, max_length=None):
+        from .models import Blob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = file_sha256(content)
+
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(sha256=digest).first()
+            if blob is not None:
+                Blob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+                logger.debug(f'Reusing stored file {blob.name} for {name}.')
+                return blob.name
+
+        stored = self.backend.save(blob_name(name, digest, max_length), content, max_length=max_length)
+        try:
+            with transaction.atomic():
+                Blob.objects.create(sha256=digest, name=stored, size=content.size, refcount=1)
+        except IntegrityError:
+            # Ta sama zawartość zapisana równocześnie w innym żądaniu - użyj tamtego pliku
+            self.backend.delete(stored)
+            with transaction.atomic():
+                blob = Blob.objects.select_for_update().get(sha256=digest)
+                Blob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            return blob.name
+        return stored
+
+    def delete(self, name):
+        from .models import Blob
+
+        if not name:
+            return
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                self.backend.delete(name)
+                return
+            if blob.refcount > 1:
+                Blob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return
+            blob.delete()
+            transaction.on_commit(lambda: self.backend.delete(name))
+
+    def open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return urljoin(settings.MEDIA_URL, filepath_to_uri(name))
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+blob_storage = BlobStorage()
+
+
+def get_blob_storage():
+    """
+        Zwraca magazyn plików kursów i zgłoszeń (używany w polach FileField).
+
+        Zwraca:
+            BlobStorage: Magazyn adresowany treścią.
+    """
+    return blob_storage
+
+
+def adopt_stored_files(models):
+    """
+        Przenosi do magazynu adresowanego treścią pliki zapisane przed jego wprowadzeniem.
+
+        Argumenty:
+            models (Iterable[Model]): Modele z polem 'file' korzystającym z BlobStorage.
+
+        Zwraca:
+            tuple: Liczba plików dodanych do magazynu oraz liczba usuniętych duplikatów.
+
+        Opis działania:
+            Dla każdej nazwy pliku bez wpisu Blob obliczany jest skrót zawartości. Jeśli
+            magazyn zawiera już plik o tej zawartości, obiekty wskazujące na duplikat
+            przepinane są na istniejący plik, a duplikat usuwany. W przeciwnym razie plik
+            pozostaje pod dotychczasową nazwą i otrzymuje wpis Blob.
+    """
+    from .models import Blob
+
+    references = {}
+    for model in models:
+        for pk, name in model.objects.exclude(file='').values_list('pk', 'file').iterator():
+            references.setdefault(name, []).append((model, pk))
+    known = set(Blob.objects.filter(name__in=references).values_list('name', flat=True))
+
+    adopted = merged = 0
+    for name, owners in references.items():
+        if name in known:
+            continue
+        if not blob_storage.exists(name):
+            logger.warning(f'Stored file {name} is missing, skipping.')
+            continue
+        with blob_storage.open(name) as content:
+            digest = file_sha256(content)
+            size = content.size
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(sha256=digest).first()
+            if blob is None:
+                Blob.objects.create(sha256=digest, name=name, size=size, refcount=len(owners))
+                adopted += 1
+                continue
+            for model, pk in owners:
+                model.objects.filter(pk=pk).update(file=blob.name)
+            Blob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + len(owners))
+            transaction.on_commit(lambda name=name: blob_storage.backend.delete(name))
+            merged += 1
+    return adopted, merged
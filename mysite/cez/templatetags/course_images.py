@@ -0,0 +1,41 @@
+from django import template
+from django.utils.html import format_html
+
+from cez import renditions
+
+register = template.Library()
+
+# Szerokość, z jaką obraz kursu wyświetlany jest na liście kursów (.course img)
+COURSE_IMAGE_SIZES = '300px'
+
+
+@register.simple_tag
+def course_picture(course, alt=''):
+    """
+        Zwraca element <picture> z wersjami obrazu kursu o różnych rozmiarach.
+
+        Argumenty:
+            course (Course): Kurs, którego obraz jest wyświetlany.
+            alt (str): Tekst alternatywny obrazu.
+
+        Zwraca:
+            str: Kod HTML obrazu. Dopóki wersje obrazu nie zostaną utworzone,
+            zwracany jest zwykły element <img> z oryginałem. Źródło WebP dodawane jest tylko
+            wtedy, gdy wersje WebP są tworzone (renditions.RENDITION_FORMATS).
+    """
+    if not course.image:
+        return ''
+    if not course.image_widths:
+        return format_html('<img src="{}" alt="{}" loading="lazy" />', course.image.url, alt)
+    webp = ''
+    if 'webp' in dict(renditions.RENDITION_FORMATS):
+        webp = format_html('<source type="image/webp" srcset="{}" sizes="{}" />',
+                           course.image_srcset('webp'), COURSE_IMAGE_SIZES)
+    return format_html(
+        '<picture>{}'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async" '
+        'style="background-image: url({}); background-size: cover;" />'
+        '</picture>',
+        webp, course.image.url, course.image_srcset('jpg'), COURSE_IMAGE_SIZES, alt,
+        course.image_placeholder,
+    )
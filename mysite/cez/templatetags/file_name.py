@@ -1,6 +1,6 @@
 from django import template
-from django.contrib.auth.models import Group
 import os
+from users.roles import has_role
 
 register = template.Library()
 
@@ -14,5 +14,4 @@ def filepath(value):
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    group = Group.objects.get(name=group_name)
-    return True if group in user.groups.all() else False
\ No newline at end of file
+    return has_role(user, group_name)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import TestCase
+from django.urls import reverse
+
+from cez.models import Course, Degree, Semester, Enrollment, Topic
+from mysite import settings as project_settings
+from mysite.cache import TieredCache, cached_query, cached_fragment, cache_stats, reset_cache_stats
+
+
+class TestTieredCache(TestCase):
+    """
+        Klasa zawierająca testy dwupoziomowej pamięci podręcznej.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, czyszcząca pamięć podręczną i liczniki.
+            test_read_through_tiers(self): Sprawdza odczyt z L1, L2 i zapis wyniku w L1.
+            test_tests_use_private_shared_tier(self): Sprawdza, czy testy nie zapisują skonfigurowanej warstwy L2.
+            test_l1_evicts_least_recently_used(self): Sprawdza usuwanie najdawniej używanych wpisów L1.
+            test_cached_query_invalidated_by_model(self): Sprawdza unieważnienie wyniku po zmianie modelu.
+            test_scoped_invalidation(self): Sprawdza unieważnienie zakresu studenta po zmianie zapisu.
+            test_profile_courses_cached(self): Sprawdza zapamiętywanie kursów użytkownika w profilu.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, czyszcząca pamięć podręczną i liczniki.
+        """
+        cache.clear()
+        reset_cache_stats()
+        self.teacher = User.objects.create_user(username='teacher', password='12345')
+        self.student = User.objects.create_user(username='student', password='12345')
+        self.course = Course.objects.create(teacher=self.teacher.profile, title='Math', description='test',
+                                            access_key='abc', degree=Degree.objects.create(degree='1'),
+                                            semester=Semester.objects.create(semester='1'))
+
+    def test_read_through_tiers(self):
+        """
+                Sprawdza, czy odczyt chybiony w L1 trafia do L2, a wynik zapisywany jest w L1.
+        """
+        caches['shared'].set('demo:key', 'value')
+        self.assertEqual(cache.get('demo:key'), 'value')
+        self.assertEqual(cache.get('demo:key'), 'value')
+        self.assertIsNone(cache.get('demo:other'))
+        self.assertEqual(cache_stats()['demo'], {'l2_hits': 1, 'l1_hits': 1, 'misses': 1})
+
+        cache.set('demo:counter', 1)
+        self.assertEqual(cache.incr('demo:counter'), 2)
+        self.assertEqual(caches['shared'].get('demo:counter'), 2)
+        cache.delete('demo:counter')
+        self.assertIsNone(cache.get('demo:counter'))
+
+    def test_tests_use_private_shared_tier(self):
+        """
+                Sprawdza, czy podczas testów zapisy nie trafiają do skonfigurowanej warstwy L2, z której
+                korzysta serwer działający na tym samym komputerze.
+        """
+        key = f'demo:{uuid.uuid4().hex}'
+        cache.set(key, 1)
+        self.assertEqual(caches['shared'].get(key), 1)
+        configured = FileBasedCache(project_settings.CACHES['shared']['LOCATION'], {})
+        self.assertIsNone(configured.get(key))
+
+    def test_l1_evicts_least_recently_used(self):
+        """
+                Sprawdza, czy po przekroczeniu limitu L1 usuwany jest najdawniej używany wpis.
+        """
+        tiered = TieredCache('test-lru', {'OPTIONS': {'L1_MAX_ENTRIES': 2, 'L1_TIMEOUT': 60}})
+        tiered.set('lru:a', 1)
+        tiered.set('lru:b', 2)
+        tiered.get('lru:a')
+        tiered.set('lru:c', 3)
+        self.assertEqual(cache_stats()['lru']['evictions'], 1)
+        self.assertEqual(tiered.get('lru:a'), 1)
+        self.assertEqual(tiered.get('lru:b'), 2)
+        self.assertEqual(cache_stats()['lru']['l1_hits'], 2)
+        self.assertEqual(cache_stats()['lru']['l2_hits'], 1)
+        tiered.clear()
+
+    def test_cached_query_invalidated_by_model(self):
+        """
+                Sprawdza, czy zapis kursu unieważnia wyniki zależne od przestrzeni nazw 'course'.
+        """
+        titles = lambda: list(Course.objects.values_list('title', flat=True))
+        self.assertEqual(cached_query('course', 'titles', titles), ['Math'])
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_query('course', 'titles', titles), ['Math'])
+        self.course.title = 'Physics'
+        self.course.save()
+        self.assertEqual(cached_query('course', 'titles', titles), ['Physics'])
+
+        render = lambda: f'<p>{Topic.objects.count()}</p>'
+        self.assertEqual(cached_fragment('topic', 'count', render), '<p>0</p>')
+        Topic.objects.create(title='Topic')
+        self.assertEqual(cached_fragment('topic', 'count', render), '<p>1</p>')
+
+    def test_scoped_invalidation(self):
+        """
+                Sprawdza, czy zapis na kurs unieważnia tylko wyniki zapamiętane dla danego studenta.
+        """
+        calls = []
+
+        def build(user_id):
+            calls.append(user_id)
+            return list(Enrollment.objects.filter(student_id=user_id).values_list('course_id', flat=True))
+
+        for user in (self.student, self.teacher):
+            cached_query('enrollment', 'courses', lambda: build(user.pk), scope=user.pk)
+        Enrollment.objects.create(student=self.student, course=self.course, access_key='abc')
+        for user in (self.student, self.teacher):
+            cached_query('enrollment', 'courses', lambda: build(user.pk), scope=user.pk)
+        self.assertEqual(calls, [self.student.pk, self.teacher.pk, self.student.pk])
+
+    def test_profile_courses_cached(self):
+        """
+                Sprawdza, czy lista kursów w profilu jest zapamiętywana i odświeżana po zapisaniu na kurs.
+        """
+        self.client.login(username='student', password='12345')
+        self.assertEqual(list(self.client.get(reverse('profile')).context['courses']), [])
+        Enrollment.objects.create(student=self.student, course=self.course, access_key='abc')
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(list(response.context['courses']), [self.course])
+        self.assertContains(response, 'Math')
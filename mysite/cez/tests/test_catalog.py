@@ -0,0 +1,143 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cez.catalog import catalog_page, facet_counts
+from cez.models import Course, Degree, Semester
+
+
+class TestCourseCatalog(TestCase):
+    """
+        Klasa zawierająca testy katalogu kursów.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca nauczyciela, stopnie i semestry.
+            test_pages_cover_all_courses(self): Sprawdza, czy kolejne strony zawierają każdy kurs dokładnie raz.
+            test_filters_and_search(self): Sprawdza filtrowanie po stopniu, semestrze i tekście.
+            test_ranked_pages_with_tied_ranks(self): Sprawdza stronicowanie wyników wyszukiwania o równej trafności.
+            test_ranked_cursor(self): Sprawdza kursor i kolejność stron według trafności na każdej bazie danych.
+            test_query_count_independent_of_catalog_size(self): Sprawdza stałą liczbę zapytań strony kursów.
+            test_facet_counts_cached_and_invalidated(self): Sprawdza zapamiętywanie i unieważnianie liczników.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca nauczyciela, stopnie i semestry.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username='test', password='12345')
+        self.degrees = [Degree.objects.create(degree=str(number)) for number in (1, 2)]
+        self.semesters = [Semester.objects.create(semester=str(number)) for number in (1, 2)]
+
+    def _courses(self, count, title='Math', degree=0, semester=0):
+        return [Course.objects.create(teacher=self.user.profile, title=f'{title} {number}', description='test',
+                                      access_key='abc', degree=self.degrees[degree],
+                                      semester=self.semesters[semester])
+                for number in range(count)]
+
+    def test_pages_cover_all_courses(self):
+        """
+                Sprawdza, czy kolejne strony zawierają każdy kurs dokładnie raz.
+        """
+        courses = self._courses(7)
+        seen, cursor = [], None
+        while True:
+            page, cursor = catalog_page(after=cursor, limit=3)
+            seen.extend(course.pk for course in page)
+            if cursor is None:
+                break
+        self.assertEqual(seen, [course.pk for course in courses])
+        self.assertEqual(catalog_page(after='invalid'), ([], None))
+
+    def test_filters_and_search(self):
+        """
+                Sprawdza filtrowanie po stopniu, semestrze i tekście.
+        """
+        math = self._courses(2)
+        physics = self._courses(1, title='Physics', degree=1, semester=1)
+        self.assertEqual(catalog_page('math')[0], math)
+        self.assertEqual(catalog_page(degree_id=str(self.degrees[1].pk))[0], physics)
+        self.assertEqual(catalog_page('math', semester_id=str(self.semesters[1].pk))[0], [])
+        self.assertEqual(catalog_page(degree_id='abc')[0], math + physics)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requires PostgreSQL')
+    def test_ranked_pages_with_tied_ranks(self):
+        """
+                Sprawdza, czy kolejne strony wyników wyszukiwania zawierają każdy kurs dokładnie raz,
+                gdy kursy mają jednakową trafność.
+        """
+        courses = self._courses(7)
+        seen, ranks, cursor = [], set(), None
+        while True:
+            page, cursor = catalog_page('math', after=cursor, limit=3)
+            seen.extend(course.pk for course in page)
+            ranks.update(course.rank for course in page)
+            if cursor is None:
+                break
+        self.assertEqual(len(ranks), 1)
+        self.assertEqual(seen, [course.pk for course in courses])
+
+    def test_ranked_cursor(self):
+        """
+                Sprawdza kodowanie i odczyt kursora oraz kolejność stron według trafności i identyfikatora.
+                Trafność obliczana jest wyrażeniem dostępnym na każdej bazie danych, zamiast ts_rank.
+        """
+        math = self._courses(4)
+        algebra = self._courses(3, title='Algebra')
+        # Wartości niedokładnie reprezentowalne binarnie, aby sprawdzić zapis trafności w kursorze
+        rank = Case(When(title__startswith='Algebra', then=Value(1 / 3)), default=Value(0.1),
+                    output_field=FloatField())
+
+        with mock.patch('cez.catalog._text_filter', lambda qs, text: (qs.annotate(rank=rank), True)):
+            seen, cursors, cursor = [], [], None
+            while True:
+                page, cursor = catalog_page('math', after=cursor, limit=2)
+                seen.extend(course.pk for course in page)
+                cursors.append(cursor)
+                if cursor is None:
+                    break
+            self.assertEqual(seen, [course.pk for course in algebra + math])
+            self.assertEqual(cursors, [f'{1 / 3!r}_{algebra[1].pk}', f'{0.1!r}_{math[0].pk}',
+                                       f'{0.1!r}_{math[2].pk}', None])
+            self.assertEqual(catalog_page('math', after=f'{0.1!r}_{math[0].pk}', limit=2)[0], math[1:3])
+            for invalid in ('invalid', '0.1', '0.1_x', '0.1_1_2'):
+                self.assertEqual(catalog_page('math', after=invalid), ([], None))
+
+    def test_query_count_independent_of_catalog_size(self):
+        """
+                Sprawdza, czy liczba zapytań strony kursów nie zależy od liczby kursów.
+        """
+        self.client.login(username='test', password='12345')
+        self._courses(2)
+        url = reverse('courses')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+        self._courses(20)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['courses']), 12)
+        self.assertIsNotNone(response.context['next_page'])
+        self.assertEqual(len(large), len(small))
+
+    def test_facet_counts_cached_and_invalidated(self):
+        """
+                Sprawdza zapamiętywanie liczników kursów oraz ich unieważnienie po zapisaniu kursu.
+        """
+        self._courses(2)
+        counts = facet_counts()
+        self.assertEqual(counts['degree'], {self.degrees[0].pk: 2})
+        with self.assertNumQueries(0):
+            self.assertEqual(facet_counts(), counts)
+        self._courses(1, degree=1)
+        with self.assertNumQueries(2):
+            counts = facet_counts()
+        self.assertEqual(counts['degree'], {self.degrees[0].pk: 2, self.degrees[1].pk: 1})
+        self.assertEqual(facet_counts('physics')['semester'], {})
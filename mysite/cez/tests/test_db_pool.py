@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from mysite.db import pool as db_pool
+from mysite.db.pool import ConnectionPool, PoolTimeout, close_pool, get_pool
+
+
+def _check(connection):
+    try:
+        connection.execute('SELECT 1')
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class TestConnectionPool(SimpleTestCase):
+    """
+        Klasa zawierająca testy puli połączeń z bazą danych.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca pulę połączeń SQLite.
+            test_connection_reused(self): Sprawdza ponowne użycie zwróconego połączenia.
+            test_max_size_and_timeout(self): Sprawdza ograniczenie liczby połączeń i czas oczekiwania.
+            test_waiting_thread_gets_released_connection(self): Sprawdza przekazanie połączenia oczekującemu wątkowi.
+            test_health_check_discards_broken_connection(self): Sprawdza odrzucenie niedziałającego połączenia.
+            test_expired_connection_replaced(self): Sprawdza zamknięcie połączenia starszego niż max_lifetime.
+            test_close_pool(self): Sprawdza zamknięcie bezczynnych połączeń i usunięcie puli.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca pulę połączeń SQLite.
+        """
+        self.pool = ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False),
+                                   max_size=2, timeout=0.2, check=_check)
+
+    def test_connection_reused(self):
+        """
+                Sprawdza, czy zwrócone połączenie jest wydawane ponownie zamiast otwierania nowego.
+        """
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+        stats = self.pool.stats()
+        self.assertEqual((stats['opened'], stats['checkouts'], stats['active'], stats['idle']), (1, 2, 1, 0))
+
+    def test_max_size_and_timeout(self):
+        """
+                Sprawdza, czy po wydaniu max_size połączeń kolejne żądanie kończy się wyjątkiem PoolTimeout.
+        """
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+        stats = self.pool.stats()
+        self.assertEqual((stats['size'], stats['active'], stats['timeouts']), (2, 2, 1))
+
+    def test_waiting_thread_gets_released_connection(self):
+        """
+                Sprawdza, czy wątek oczekujący na połączenie otrzymuje połączenie zwrócone przez inny wątek.
+        """
+        self.pool.timeout = 5
+        connections = [self.pool.acquire(), self.pool.acquire()]
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(self.pool.acquire()))
+        waiter.start()
+        while not self.pool.stats()['waiting']:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.pool.release(connections[0])
+        waiter.join()
+
+        self.assertEqual(acquired, [connections[0]])
+        stats = self.pool.stats()
+        self.assertEqual((stats['opened'], stats['wait_count'], stats['waiting']), (2, 1, 0))
+        self.assertGreaterEqual(stats['wait_max'], 0.05)
+
+    def test_health_check_discards_broken_connection(self):
+        """
+                Sprawdza, czy połączenie bezczynne dłużej niż health_check_after jest sprawdzane,
+                a niedziałające zamykane i zastępowane nowym.
+        """
+        self.pool.health_check_after = 0
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.close()
+        replacement = self.pool.acquire()
+        self.assertIsNot(replacement, connection)
+        replacement.execute('SELECT 1')
+        stats = self.pool.stats()
+        self.assertEqual((stats['opened'], stats['closed'], stats['health_check_failures']), (2, 1, 1))
+
+    def test_expired_connection_replaced(self):
+        """
+                Sprawdza, czy połączenie starsze niż max_lifetime jest zamykane przy zwrocie do puli.
+        """
+        self.pool.max_lifetime = 0
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+        self.assertIsNot(self.pool.acquire(), connection)
+        self.assertEqual(self.pool.stats()['closed'], 1)
+
+    def test_close_pool(self):
+        """
+                Sprawdza, czy close_pool zamyka bezczynne połączenia puli (które uniemożliwiłyby
+                usunięcie bazy testowej) i usuwa pulę, tak że get_pool tworzy nową.
+        """
+        key = ('test-close', 'test_db')
+        pool = get_pool(key, lambda: self.pool)
+        connection = pool.acquire()
+        pool.release(connection)
+        close_pool(key)
+        self.assertEqual((pool.stats()['idle'], pool.stats()['closed']), (0, 1))
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute('SELECT 1')
+        self.assertIsNot(get_pool(key, lambda: ConnectionPool(None, max_size=1)), pool)
+        close_pool(key)
+
+
+class TestPoolStatsView(TestCase):
+    """
+        Klasa zawierająca testy widoku statystyk puli połączeń.
+
+        Metody:
+            test_stats_for_staff(self): Sprawdza statystyki puli dostępne dla personelu.
+
+    """
+    def test_stats_for_staff(self):
+        """
+                Sprawdza, czy widok pokazuje personelowi liczbę aktywnych połączeń i czas oczekiwania,
+                a pozostałym użytkownikom odmawia dostępu.
+        """
+        key = ('reporting', 'stats')
+        self.addCleanup(db_pool._pools.pop, key)
+        pool = get_pool(key, lambda: ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False),
+                                                    max_size=2))
+        self.addCleanup(pool.close_all)
+        pool.acquire()
+        User.objects.create_user(username='student', password='12345')
+        User.objects.create_user(username='admin', password='12345', is_staff=True)
+        url = reverse('db-pool')
+        self.client.login(username='student', password='12345')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.login(username='admin', password='12345')
+        stats = self.client.get(url).json()['reporting']
+        self.assertEqual((stats['active'], stats['max_size'], stats['checkouts']), (1, 2, 1))
+        self.assertIn('wait_avg', stats)
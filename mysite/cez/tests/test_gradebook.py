@@ -0,0 +1,293 @@
+import csv
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
+from xml.etree import ElementTree
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, Group
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cez.gradebook import course_gradebook, student_grades
+from cez.models import Course, Degree, Semester, Topic, Assignment, Enrollment, RateSubmission, Submission
+
+
+class TestGradebook(TestCase):
+    """
+        Klasa zawierająca testy dziennika ocen.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca kurs z zadaniami i zapisanych studentów.
+            test_matrix_built_with_constant_queries(self): Sprawdza stałą liczbę zapytań dziennika ocen.
+            test_cached_until_rating_changes(self): Sprawdza unieważnienie dziennika po zapisaniu oceny.
+            test_student_degrees_course(self): Sprawdza widok ocen studenta.
+            test_teacher_gradebook_view(self): Sprawdza widok dziennika ocen nauczyciela.
+            test_export_csv(self): Sprawdza eksport ocen do pliku CSV.
+            test_export_xlsx(self): Sprawdza eksport ocen do pliku XLSX.
+            test_export_streamed_under_asgi(self): Sprawdza wysyłanie eksportu porcjami pod ASGI.
+            test_grading_queue(self): Sprawdza kolejkę oceniania z dotychczasowymi ocenami.
+            test_bulk_grading(self): Sprawdza zapisanie ocen całej strony kolejki oceniania.
+            test_download_submissions(self): Sprawdza archiwum ZIP z rozwiązaniami zadania.
+            test_download_submissions_of_other_course(self): Sprawdza brak dostępu do archiwum innego kursu.
+            test_download_streamed_under_asgi(self): Sprawdza wysyłanie archiwum porcjami pod ASGI.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca kurs z zadaniami i zapisanych studentów.
+        """
+        cache.clear()
+        self.teacher = User.objects.create_user(username='teacher', password='12345')
+        self.teacher.groups.add(Group.objects.create(name='Nauczyciel'))
+        self.course = Course.objects.create(teacher=self.teacher.profile, title='Math', description='test',
+                                            access_key='abc', degree=Degree.objects.create(degree='1'),
+                                            semester=Semester.objects.create(semester='1'))
+        self.topic = Topic.objects.create(title='Topic')
+        self.course.topics.add(self.topic)
+        self.assignments = [Assignment.objects.create(title=f'Assignment {number}', content='test')
+                            for number in range(3)]
+        # Tak jak w widoku add_assignment, zadanie i temat powiązane są w obu kierunkach
+        self.topic.assignments.add(*self.assignments)
+        self.topic.assignment_set.add(*self.assignments)
+        self.students = [User.objects.create_user(username=f'student{number}', password='12345')
+                         for number in range(3)]
+        for student in self.students + [self.teacher]:
+            Enrollment.objects.create(student=student, course=self.course, access_key='abc')
+
+    def _rate(self, student, assignment, grade):
+        return RateSubmission.objects.create(assignment=assignment, teacher=self.teacher.profile,
+                                             student=student, grade=grade, comment='')
+
+    def test_matrix_built_with_constant_queries(self):
+        """
+                Sprawdza, czy macierz ocen wyznaczana jest stałą liczbą zapytań.
+        """
+        for student in self.students:
+            for assignment in self.assignments:
+                self._rate(student, assignment, 4)
+        with self.assertNumQueries(3):
+            gradebook = course_gradebook(self.course.pk)
+        self.assertEqual([student['pk'] for student in gradebook['students']],
+                         [student.pk for student in self.students])
+        self.assertEqual(len(gradebook['grades']), 9)
+        with self.assertNumQueries(0):
+            course_gradebook(self.course.pk)
+
+    def test_cached_until_rating_changes(self):
+        """
+                Sprawdza, czy zapamiętany dziennik ocen jest unieważniany po zapisaniu oceny.
+        """
+        student, assignment = self.students[0], self.assignments[0]
+        self.assertEqual(student_grades(self.course.pk, student.pk)[0][1], None)
+        rating = self._rate(student, assignment, 3)
+        self.assertEqual(student_grades(self.course.pk, student.pk)[0][1], 3)
+        rating.grade = 5
+        rating.save()
+        self.assertEqual(student_grades(self.course.pk, student.pk)[0][1], 5)
+        rating.delete()
+        self.assertEqual(student_grades(self.course.pk, student.pk)[0][1], None)
+
+    def test_student_degrees_course(self):
+        """
+                Sprawdza widok ocen studenta w kursie.
+        """
+        self._rate(self.students[0], self.assignments[1], 0)
+        self.client.login(username='student0', password='12345')
+        response = self.client.get(reverse('degrees_course', args=[self.course.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([grade for assignment, grade in response.context['maps']], [None, 0, None])
+
+    def test_teacher_gradebook_view(self):
+        """
+                Sprawdza widok dziennika ocen nauczyciela oraz brak dostępu dla studenta.
+        """
+        self._rate(self.students[2], self.assignments[0], 4.5)
+        url = reverse('gradebook', args=[self.course.pk])
+        self.client.login(username='student0', password='12345')
+        self.assertNotEqual(self.client.get(url).status_code, 200)
+        self.client.login(username='teacher', password='12345')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['rows']), 3)
+        self.assertEqual(response.context['rows'][2][1], [4.5, None, None])
+        self.assertContains(response, 'Assignment 2')
+
+    def test_export_csv(self):
+        """
+                Sprawdza strumieniowy eksport ocen i komentarzy do pliku CSV.
+        """
+        RateSubmission.objects.create(assignment=self.assignments[1], teacher=self.teacher.profile,
+                                      student=self.students[1], grade=5, comment='Bardzo dobrze, "brawo"')
+        self.client.login(username='teacher', password='12345')
+        response = self.client.get(reverse('gradebook-export', args=[self.course.pk, 'csv']))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="math-grades.csv"')
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:5], ['Username', 'First name', 'Last name', 'Email', 'Assignment 0 - grade'])
+        self.assertEqual([row[0] for row in rows[1:]], ['student0', 'student1', 'student2'])
+        self.assertEqual(rows[2][7:9], ['5.0', 'Bardzo dobrze, "brawo"'])
+        self.assertEqual(self.client.get(reverse('gradebook-export', args=[self.course.pk, 'pdf'])).status_code, 404)
+
+    def test_export_xlsx(self):
+        """
+                Sprawdza, czy eksport XLSX jest poprawnym arkuszem z ocenami.
+        """
+        self._rate(self.students[0], self.assignments[2], 3.5)
+        self.client.login(username='teacher', password='12345')
+        response = self.client.get(reverse('gradebook-export', args=[self.course.pk, 'xlsx']))
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertIsNone(archive.testzip())
+            sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        namespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        rows = sheet.findall(f'{namespace}sheetData/{namespace}row')
+        self.assertEqual(len(rows), 4)
+        cells = {cell.get('r'): cell for cell in rows[1]}
+        self.assertEqual(cells['A2'].find(f'{namespace}is/{namespace}t').text, 'student0')
+        self.assertEqual(cells['K2'].find(f'{namespace}v').text, '3.5')
+
+    @mock.patch('cez.exports.EXPORT_FLUSH_SIZE', 1)
+    async def test_export_streamed_under_asgi(self):
+        """
+                Sprawdza, czy pod ASGI eksport jest iteratorem asynchronicznym, który oddaje
+                porcje w trakcie odczytu studentów, zamiast budować cały plik przed wysłaniem.
+        """
+        await sync_to_async(self.async_client.force_login)(self.teacher)
+        response = await self.async_client.get(reverse('gradebook-export', args=[self.course.pk, 'csv']))
+        self.assertTrue(response.is_async)
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode('utf-8-sig'))
+        self.assertTrue(chunks[0].startswith('Username,'))
+        self.assertEqual(chunks[0].count('\n'), 1)
+        self.assertTrue(chunks[1].startswith('student0,'))
+        self.assertEqual(len([chunk for chunk in chunks if chunk]), 4)
+
+    def _submissions(self, assignment):
+        return [Submission.objects.create(assignment=assignment, student=student, file='temp/answer.txt')
+                for student in self.students]
+
+    def test_grading_queue(self):
+        """
+                Sprawdza, czy kolejka oceniania wyświetla zgłoszenia z ocenami stałą liczbą zapytań.
+        """
+        assignment = self.assignments[0]
+        self._submissions(assignment)
+        self._rate(self.students[1], assignment, 4)
+        self.client.login(username='teacher', password='12345')
+        url = reverse('assignment-rate', args=[self.course.pk, assignment.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(url)
+        self.assertEqual([form.initial['grade'] for form in response.context['formset']], [None, 4, None])
+        for number in range(3, 10):
+            student = User.objects.create_user(username=f'student{number}', password='12345')
+            Submission.objects.create(assignment=assignment, student=student, file='temp/answer.txt')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['rows']), 10)
+        self.assertEqual(len(large), len(small))
+
+    def test_bulk_grading(self):
+        """
+                Sprawdza, czy oceny całej strony są tworzone lub aktualizowane jednym zapisem.
+        """
+        assignment = self.assignments[0]
+        submissions = self._submissions(assignment)
+        other = Submission.objects.create(assignment=self.assignments[1], student=self.students[0],
+                                          file='temp/answer.txt')
+        self._rate(self.students[0], assignment, 2)
+        self.assertEqual(student_grades(self.course.pk, self.students[0].pk)[0][1], 2)
+        self.client.login(username='teacher', password='12345')
+        url = reverse('assignment-rate', args=[self.course.pk, assignment.pk])
+        data = {'form-TOTAL_FORMS': '4', 'form-INITIAL_FORMS': '4'}
+        rows = [(submissions[0].pk, '5', 'Poprawione'), (submissions[1].pk, '3.5', ''),
+                (submissions[2].pk, '', ''), (other.pk, '1', '')]
+        for index, (submission, grade, comment) in enumerate(rows):
+            data.update({f'form-{index}-submission': submission, f'form-{index}-grade': grade,
+                         f'form-{index}-comment': comment})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT')]), 1)
+        ratings = RateSubmission.objects.filter(assignment=assignment).order_by('student_id')
+        self.assertEqual([(rating.grade, rating.comment) for rating in ratings], [(5, 'Poprawione'), (3.5, '')])
+        self.assertFalse(RateSubmission.objects.filter(assignment=self.assignments[1]).exists())
+        self.assertEqual(student_grades(self.course.pk, self.students[0].pk)[0][1], 5)
+
+    def test_download_submissions(self):
+        """
+                Sprawdza strumieniowe archiwum ZIP z rozwiązaniami zadania.
+        """
+        assignment = self.assignments[0]
+        self.students[0].last_name, self.students[0].first_name = 'Kowalski', 'Jan'
+        self.students[0].save()
+        for number, student in enumerate(self.students):
+            Submission.objects.create(assignment=assignment, student=student,
+                                      file=SimpleUploadedFile('answer.txt', f'answer {number}'.encode()))
+        Submission.objects.create(assignment=assignment, student=self.students[1], file='temp/missing.txt')
+        self._rate(self.students[1], assignment, 4)
+        self.client.login(username='teacher', password='12345')
+        url = reverse('assignment-download', args=[self.course.pk, assignment.pk])
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="assignment-0-submissions.zip"')
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), ['student1/answer.txt', 'student2/answer.txt',
+                                                  'Kowalski_Jan_student0/answer.txt'])
+            self.assertEqual(archive.read('student2/answer.txt'), b'answer 2')
+        response = self.client.get(url, {'ungraded': '1'})
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ['student2/answer.txt', 'Kowalski_Jan_student0/answer.txt'])
+
+    def test_download_submissions_of_other_course(self):
+        """
+                Sprawdza, czy archiwum rozwiązań może pobrać tylko prowadzący kurs, do którego
+                należy zadanie, i tylko pod adresem tego kursu.
+        """
+        other = User.objects.create_user(username='other', password='12345')
+        other.groups.add(Group.objects.get(name='Nauczyciel'))
+        other_course = Course.objects.create(teacher=other.profile, title='Physics', description='test',
+                                             access_key='abc', degree=self.course.degree,
+                                             semester=self.course.semester)
+        assignment = self.assignments[0]
+        self.client.login(username='other', password='12345')
+        response = self.client.get(reverse('assignment-download', args=[self.course.pk, assignment.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('assignment-download', args=[other_course.pk, assignment.pk]))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.login(username='teacher', password='12345')
+        response = self.client.get(reverse('assignment-download', args=[other_course.pk, assignment.pk]))
+        self.assertEqual(response.status_code, 404)
+        other_topic = Topic.objects.create(title='Other topic')
+        self.course.topics.add(other_topic)
+        other_topic.assignment_set.add(assignment)
+        response = self.client.get(reverse('assignment-download', args=[self.course.pk, assignment.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    @mock.patch('cez.exports.EXPORT_FLUSH_SIZE', 1)
+    async def test_download_streamed_under_asgi(self):
+        """
+                Sprawdza, czy pod ASGI archiwum rozwiązań jest iteratorem asynchronicznym
+                oddającym porcje w trakcie kopiowania plików.
+        """
+        for number, student in enumerate(self.students):
+            await sync_to_async(Submission.objects.create)(
+                assignment=self.assignments[0], student=student,
+                file=SimpleUploadedFile('streamed.txt', f'streamed {number}'.encode()))
+        await sync_to_async(self.async_client.force_login)(self.teacher)
+        response = await self.async_client.get(reverse('assignment-download',
+                                                       args=[self.course.pk, self.assignments[0].pk]))
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), len(self.students))
+        with zipfile.ZipFile(BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(len(archive.namelist()), 3)
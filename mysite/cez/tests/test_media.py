@@ -0,0 +1,165 @@
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, Group
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from cez.media import parse_range
+from cez.models import Course, CourseFile, File, Degree, Enrollment, Semester, Submission, Topic, Assignment
+
+
+class TestMedia(TestCase):
+    """
+        Klasa zawierająca testy widoku pobierania plików.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca kurs z plikiem i rozwiązanie.
+            test_access_checked(self): Sprawdza dostęp do plików kursów i rozwiązań.
+            test_public_file(self): Sprawdza pobieranie plików publicznych.
+            test_range_requests(self): Sprawdza odpowiedzi z zakresami bajtów.
+            test_range_requests_under_asgi(self): Sprawdza wysyłanie pliku porcjami pod ASGI.
+            test_conditional_requests(self): Sprawdza odpowiedzi 304 dla ETag i Last-Modified.
+            test_offload(self): Sprawdza przekazanie wysyłania pliku do serwera frontowego.
+            test_parse_range(self): Sprawdza odczytywanie nagłówka Range.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca kurs z plikiem i rozwiązanie.
+        """
+        self.teacher = User.objects.create_user(username='teacher', password='12345')
+        self.teacher.groups.add(Group.objects.create(name='Nauczyciel'))
+        self.student = User.objects.create_user(username='student', password='12345')
+        self.other = User.objects.create_user(username='other', password='12345')
+        other_teacher = User.objects.create_user(username='other_teacher', password='12345')
+        other_teacher.groups.add(Group.objects.get(name='Nauczyciel'))
+        course = Course.objects.create(teacher=self.teacher.profile, title='Math', description='test',
+                                       access_key='abc', degree=Degree.objects.create(degree='1'),
+                                       semester=Semester.objects.create(semester='1'))
+        topic = Topic.objects.create(title='Topic')
+        course.topics.add(topic)
+        self.course_file = CourseFile.objects.create(name='Lecture',
+                                                     file=SimpleUploadedFile('lecture.pdf', b'0123456789'))
+        topic.files.add(self.course_file)
+        Enrollment.objects.create(student=self.student, course=course, access_key='abc')
+        assignment = Assignment.objects.create(title='Assignment', content='test')
+        topic.assignments.add(assignment)
+        assignment.topics.add(topic)
+        self.submission = Submission.objects.create(assignment=assignment, student=self.other,
+                                                    file=SimpleUploadedFile('answer.txt', b'answer'))
+        self.url = self.course_file.file.url
+
+    def _get(self, url, username=None, **headers):
+        self.client.logout()
+        if username:
+            self.client.login(username=username, password='12345')
+        return self.client.get(url, headers=headers)
+
+    def test_access_checked(self):
+        """
+                Sprawdza, czy pliki kursów i rozwiązania wysyłane są tylko uprawnionym użytkownikom,
+                a nauczyciel otrzymuje wyłącznie pliki i rozwiązania prowadzonych przez siebie kursów.
+        """
+        self.assertTrue(self.url.startswith('/media/pdf_files/'))
+        self.assertEqual(self._get(self.url).status_code, 404)
+        self.assertEqual(self._get(self.url, 'other').status_code, 404)
+        response = self._get(self.url, 'student')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(self._get(self.url, 'teacher').status_code, 200)
+        self.assertEqual(self._get(self.url, 'other_teacher').status_code, 404)
+
+        url = self.submission.file.url
+        self.assertEqual(self._get(url, 'student').status_code, 404)
+        self.assertEqual(self._get(url, 'other').status_code, 200)
+        self.assertEqual(self._get(url, 'teacher').status_code, 200)
+        self.assertEqual(self._get(url, 'other_teacher').status_code, 404)
+        self.assertEqual(self._get('/media/../manage.py', 'teacher').status_code, 404)
+
+        copy = File.objects.create(file=SimpleUploadedFile('copy.pdf', b'0123456789'))
+        self.assertEqual(copy.file.name, self.course_file.file.name)
+        self.assertEqual(self._get(copy.file.url, 'other').status_code, 404)
+
+    def test_public_file(self):
+        """
+                Sprawdza, czy pliki spoza katalogów plików kursów są dostępne bez logowania.
+        """
+        name = default_storage.save('course_images/cover.png', ContentFile(b'image'))
+        response = self._get(f'/media/{name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'image')
+        self.assertEqual(self._get('/media/course_images/missing.png').status_code, 404)
+
+    def test_range_requests(self):
+        """
+                Sprawdza odpowiedzi 206 i 416 dla nagłówka Range oraz nagłówek If-Range.
+        """
+        response = self._get(self.url, 'student', Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        response = self._get(self.url, 'student', Range='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self._get(self.url, 'student', Range='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+        response = self._get(self.url, 'student', Range='bytes=2-5', **{'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    @mock.patch('cez.media.MEDIA_CHUNK_SIZE', 4)
+    async def test_range_requests_under_asgi(self):
+        """
+                Sprawdza, czy pod ASGI plik i zakres bajtów wysyłane są porcjami przez iterator
+                asynchroniczny, a nie odczytywane w całości przed wysłaniem.
+        """
+        await sync_to_async(self.async_client.force_login)(self.student)
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual([chunk async for chunk in response.streaming_content], [b'0123', b'4567', b'89'])
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=2-7'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-7/10')
+        self.assertEqual([chunk async for chunk in response.streaming_content], [b'2345', b'67'])
+
+    def test_conditional_requests(self):
+        """
+                Sprawdza, czy ETag (skrót zawartości) i Last-Modified pozwalają odpowiedzieć 304.
+        """
+        response = self._get(self.url, 'student')
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{self.course_file.file.name.split("/")[2]}"')
+        self.assertEqual(self._get(self.url, 'student', **{'If-None-Match': etag}).status_code, 304)
+        response = self._get(self.url, 'student', **{'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect')
+    def test_offload(self):
+        """
+                Sprawdza, czy przy MEDIA_OFFLOAD treść pliku wysyła serwer frontowy.
+        """
+        response = self._get(self.url, 'student')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.course_file.file.name}')
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_OFFLOAD='x-sendfile'):
+            response = self._get(self.url, 'student')
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.course_file.file.name))
+
+    def test_parse_range(self):
+        """
+                Sprawdza odczytywanie nagłówka Range.
+        """
+        self.assertEqual(parse_range('bytes=0-', 10), (0, 9))
+        self.assertEqual(parse_range('bytes=5-100', 10), (5, 9))
+        self.assertEqual(parse_range('bytes=-20', 10), (0, 9))
+        self.assertIsNone(parse_range('bytes=10-', 10))
+        self.assertIs(parse_range('bytes=0-1,4-5', 10), ...)
+        self.assertIs(parse_range('items=0-1', 10), ...)
+        self.assertIs(parse_range(None, 10), ...)
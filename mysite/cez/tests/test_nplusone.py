@@ -0,0 +1,98 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.template import Context, Engine
+from django.test import RequestFactory, TestCase, override_settings
+
+from mysite.middleware import NPlusOneMiddleware
+from mysite.nplusone import NPlusOneError, detect, query_shape
+from users.models import Profile
+
+PROFILES = Engine().from_string('{% for user in users %}\n{{ user.profile.pk }}\n{% endfor %}')
+
+
+@override_settings(NPLUSONE_ACTION='raise', NPLUSONE_THRESHOLD=3)
+class TestNPlusOne(TestCase):
+    """
+        Klasa zawierająca testy wykrywania zapytań N+1.
+
+        Metody:
+            setUpTestData(cls): Tworzy użytkowników, których profile odczytuje szablon.
+            test_query_shape(self): Sprawdza, czy kształt zapytania nie zależy od parametrów.
+            test_template_loop_raises(self): Sprawdza zgłoszenie błędu z wierszem szablonu wykonującym zapytania.
+            test_prefetched_loop_passes(self): Sprawdza, czy pobranie powiązanych obiektów z góry nie jest zgłaszane.
+            test_log_action(self): Sprawdza logowanie raportu przy NPLUSONE_ACTION = 'log'.
+            test_middleware_async_mode(self): Sprawdza wykrywanie w widoku asynchronicznym.
+            test_asgi_middleware_chain_is_async(self): Sprawdza, czy middleware nie przełączają ASGI w tryb synchroniczny.
+
+    """
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            User.objects.create_user(username=f'student{i}', password='12345')
+
+    def test_query_shape(self):
+        """
+                Sprawdza, czy zapytania różniące się tylko parametrami, liczbami, napisami
+                i długością listy IN mają ten sam kształt.
+        """
+        self.assertEqual(
+            query_shape('SELECT * FROM "t" WHERE "id" = 5 AND "name" = \'a\' AND "pk" IN (%s, %s)'),
+            query_shape('SELECT *  FROM "t"\nWHERE "id" = %s AND "name" = \'b\'\'c\' AND "pk" IN (7)'))
+        self.assertNotEqual(query_shape('SELECT * FROM "t" WHERE "id" = 5'),
+                            query_shape('SELECT * FROM "u" WHERE "id" = 5'))
+
+    def test_template_loop_raises(self):
+        """
+                Sprawdza, czy odczyt profilu każdego użytkownika w pętli szablonu zgłasza NPlusOneError
+                wskazujący wiersz szablonu i wywołujący go kod.
+        """
+        with self.assertRaises(NPlusOneError) as error:
+            with detect('profiles'):
+                PROFILES.render(Context({'users': User.objects.all()}))
+        report = str(error.exception)
+        self.assertIn('N+1 in profiles: 5 x SELECT', report)
+        self.assertIn(':2 {{ user.profile.pk }}', report)
+        self.assertIn('cez/tests/test_nplusone.py', report)
+
+    def test_prefetched_loop_passes(self):
+        """
+                Sprawdza, czy pętla po użytkownikach pobranych razem z profilami nie jest zgłaszana.
+        """
+        with detect('profiles'):
+            PROFILES.render(Context({'users': User.objects.select_related('profile')}))
+
+    @override_settings(NPLUSONE_ACTION='log')
+    def test_log_action(self):
+        """
+                Sprawdza, czy przy NPLUSONE_ACTION = 'log' raport jest logowany zamiast zgłaszania błędu.
+        """
+        with self.assertLogs('mysite.nplusone', 'WARNING') as logs:
+            with detect('profiles'):
+                for user in User.objects.all():
+                    user.profile
+        self.assertIn('N+1 in profiles: 5 x SELECT', logs.output[0])
+        self.assertIn('in test_log_action', logs.output[0])
+
+    async def test_middleware_async_mode(self):
+        """
+                Sprawdza, czy przed widokiem asynchronicznym middleware działa asynchronicznie
+                i zgłasza zapytania N+1 wykonane przez asynchroniczny ORM.
+        """
+        async def view(request):
+            async for user in User.objects.all():
+                await Profile.objects.filter(user=user).aexists()
+            return HttpResponse()
+
+        middleware = NPlusOneMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertRaisesMessage(NPlusOneError, 'N+1 in GET /profiles/: 5 x SELECT'):
+            await middleware(RequestFactory().get('/profiles/'))
+
+    def test_asgi_middleware_chain_is_async(self):
+        """
+                Sprawdza, czy łańcuch middleware pod ASGI pozostaje asynchroniczny, dzięki czemu
+                widoki asynchroniczne nie zajmują wątku na czas obsługi żądania.
+        """
+        self.assertTrue(iscoroutinefunction(ASGIHandler()._middleware_chain))
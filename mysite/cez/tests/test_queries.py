@@ -0,0 +1,74 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from cez.models import Degree
+from mysite.middleware import QueryBudgetMiddleware
+from mysite.queries import QueryRecorder
+
+
+class TestQueryBudget(TestCase):
+    """
+        Klasa zawierająca testy pomiaru zapytań do bazy danych.
+
+        Metody:
+            test_recorder_counts_duplicates(self): Sprawdza zliczanie zapytań i zapytań powtórzonych.
+            test_middleware_logs_request_over_budget(self): Sprawdza logowanie żądania przekraczającego limit.
+            test_middleware_headers_in_debug(self): Sprawdza nagłówki z liczbą zapytań przy DEBUG = True.
+            test_middleware_async_mode(self): Sprawdza zliczanie zapytań przez middleware w trybie asynchronicznym.
+
+    """
+    def test_recorder_counts_duplicates(self):
+        """
+                Sprawdza, czy powtórzenie zapytania z tymi samymi parametrami jest liczone jako duplikat,
+                a z innymi parametrami nie.
+        """
+        with QueryRecorder() as recorder:
+            Degree.objects.filter(pk=1).exists()
+            Degree.objects.filter(pk=1).exists()
+            Degree.objects.filter(pk=2).exists()
+        self.assertEqual((recorder.count, recorder.duplicates), (3, 1))
+        self.assertEqual(len(recorder.duplicated()), 1)
+        self.assertGreater(recorder.duration, 0)
+
+    @override_settings(QUERY_BUDGETS={'index': 0})
+    def test_middleware_logs_request_over_budget(self):
+        """
+                Sprawdza, czy żądanie wykonujące więcej zapytań niż limit widoku jest logowane.
+        """
+        User.objects.create_user(username='student', password='12345')
+        self.client.login(username='student', password='12345')
+        with self.assertLogs('mysite.middleware', 'WARNING') as logs:
+            self.client.get(reverse('index'))
+        self.assertIn('(index) executed', logs.output[0])
+        self.assertIn('budget 0', logs.output[0])
+
+    @override_settings(DEBUG=True)
+    def test_middleware_headers_in_debug(self):
+        """
+                Sprawdza, czy przy DEBUG = True odpowiedź zawiera liczbę i czas zapytań oraz limit widoku.
+        """
+        User.objects.create_user(username='student', password='12345')
+        self.client.login(username='student', password='12345')
+        response = self.client.get(reverse('courses'))
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        self.assertGreaterEqual(float(response['X-DB-Time']), 0)
+        self.assertEqual(response['X-DB-Duplicates'], '0')
+        self.assertEqual(response['X-Query-Budget'], '5')
+
+    @override_settings(DEBUG=True)
+    async def test_middleware_async_mode(self):
+        """
+                Sprawdza, czy przed widokiem asynchronicznym middleware działa asynchronicznie
+                i zlicza zapytania wykonane przez asynchroniczny ORM.
+        """
+        async def view(request):
+            await Degree.objects.filter(pk=1).aexists()
+            return HttpResponse()
+
+        middleware = QueryBudgetMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/'))
+        self.assertEqual(response['X-DB-Queries'], '1')
@@ -0,0 +1,103 @@
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage as storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from cez.models import Course, Degree, Semester, Enrollment
+from cez.renditions import rendition_name, RENDITION_FORMATS
+from cez.templatetags.course_images import course_picture
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class TestCourseImageRenditions(TestCase):
+    """
+        Klasa zawierająca testy tworzenia wersji obrazów kursów.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca nauczyciela, stopień i semestr.
+            test_renditions_rendered_once(self): Sprawdza utworzenie wersji obrazu jeden raz.
+            test_same_image_reuses_renditions(self): Sprawdza ponowne użycie wersji tego samego obrazu.
+            test_courses_page_uses_srcset(self): Sprawdza, czy lista kursów korzysta z atrybutu srcset.
+            test_webp_source_requires_webp_renditions(self): Sprawdza pominięcie źródła WebP bez wersji WebP.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca nauczyciela, stopień i semestr.
+        """
+        self.user = User.objects.create_user(username='test', password='12345')
+        self.degree = Degree.objects.create(degree="1")
+        self.semester = Semester.objects.create(semester="1")
+
+    def _image(self, size=(800, 600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'blue').save(buffer, 'JPEG')
+        return SimpleUploadedFile('course.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def _course(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(teacher=self.user.profile, title="Math", description="test",
+                                           access_key="abc", degree=self.degree, semester=self.semester,
+                                           image=image)
+        course.refresh_from_db()
+        return course
+
+    def test_renditions_rendered_once(self):
+        """
+                Sprawdza utworzenie wersji obrazu jeden raz oraz brak przetwarzania przy zwykłym zapisie.
+        """
+        course = self._course(self._image())
+        self.assertEqual(course.image_widths, [320, 640])
+        self.assertTrue(course.image_placeholder.startswith('data:image/jpeg;base64,'))
+        for extension, _ in RENDITION_FORMATS:
+            name = rendition_name(course.image.name, course.image_hash, 320, extension)
+            self.assertTrue(name.startswith('course_images/renditions/'))
+            with storage.open(name, 'rb') as rendition:
+                self.assertEqual(Image.open(rendition).size, (320, 240))
+
+        with mock.patch('cez.models.run_in_background') as run:
+            course.title = "Algebra"
+            course.save()
+        run.assert_not_called()
+
+    def test_same_image_reuses_renditions(self):
+        """
+                Sprawdza, czy obraz o tej samej zawartości nie jest ponownie dekodowany.
+        """
+        first = self._course(self._image())
+        with mock.patch('cez.renditions.render_renditions') as render:
+            second = self._course(self._image())
+        render.assert_not_called()
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(second.image_hash, first.image_hash)
+        self.assertEqual(second.image_srcset('jpg'), first.image_srcset('jpg'))
+
+    def test_courses_page_uses_srcset(self):
+        """
+                Sprawdza, czy lista kursów korzysta z atrybutu srcset.
+        """
+        course = self._course(self._image())
+        Enrollment.objects.create(course=course, student=self.user)
+        self.client.login(username='test', password='12345')
+        response = self.client.get(reverse('courses'))
+        self.assertContains(response, 'srcset="%s"' % course.image_srcset('jpg'))
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_webp_source_requires_webp_renditions(self):
+        """
+                Sprawdza, czy element <source> WebP dodawany jest tylko wtedy, gdy wersje WebP
+                są tworzone (Pillow bez obsługi WebP zapisuje wyłącznie wersje JPEG).
+        """
+        course = self._course(self._image())
+        with mock.patch('cez.renditions.RENDITION_FORMATS', (('webp', 'WEBP'), ('jpg', 'JPEG'))):
+            self.assertIn('<source type="image/webp" srcset="%s"' % course.image_srcset('webp'),
+                          course_picture(course))
+        with mock.patch('cez.renditions.RENDITION_FORMATS', (('jpg', 'JPEG'),)):
+            html = course_picture(course)
+        self.assertNotIn('<source', html)
+        self.assertIn('srcset="%s"' % course.image_srcset('jpg'), html)
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cez.models import Topic, SiteCounter
+from cez.stats import site_counters
+
+
+class TestSiteCounters(TestCase):
+    """
+        Klasa zawierająca testy liczników strony głównej.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, czyszcząca pamięć podręczną.
+            test_counters_follow_changes(self): Sprawdza zmiany liczników po utworzeniu i usunięciu obiektów.
+            test_homepage_does_not_count(self): Sprawdza, czy strona główna nie zlicza obiektów.
+            test_reconcile_fixes_drift(self): Sprawdza korektę liczników po zmianach z pominięciem sygnałów.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, czyszcząca pamięć podręczną.
+        """
+        cache.clear()
+
+    def test_counters_follow_changes(self):
+        """
+                Sprawdza zmiany liczników po utworzeniu i usunięciu obiektów.
+        """
+        start = site_counters()
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.create_user(username='test', password='12345')
+            topic = Topic.objects.create(title='Topic')
+        self.assertEqual(site_counters()['users'], start['users'] + 1)
+        self.assertEqual(site_counters()['topics'], start['topics'] + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+            topic.delete()
+        self.assertEqual(site_counters(), start)
+
+    def test_homepage_does_not_count(self):
+        """
+                Sprawdza, czy strona główna nie wykonuje zapytań COUNT, a po zapamiętaniu liczników żadnych zapytań.
+        """
+        url = reverse('index')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'].upper()])
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['num_users'], User.objects.count())
+
+    def test_reconcile_fixes_drift(self):
+        """
+                Sprawdza korektę liczników po zmianach z pominięciem sygnałów.
+        """
+        site_counters()
+        Topic.objects.bulk_create([Topic(title='A'), Topic(title='B')])
+        SiteCounter.objects.filter(name='users').delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_site_counters', stdout=StringIO())
+        counters = site_counters()
+        self.assertEqual(counters['topics'], Topic.objects.count())
+        self.assertEqual(counters['users'], User.objects.count())
@@ -0,0 +1,97 @@
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from cez.models import Assignment, Blob, CourseFile, Submission
+
+
+class TestBlobStorage(TestCase):
+    """
+        Klasa zawierająca testy magazynu plików adresowanego treścią.
+
+        Metody:
+            test_identical_files_share_blob(self): Sprawdza zapisanie jednej kopii identycznych plików.
+            test_blob_deleted_with_last_reference(self): Sprawdza usunięcie pliku po usunięciu ostatniego odwołania.
+            test_replaced_file_released(self): Sprawdza zwolnienie zastąpionego pliku.
+            test_identical_submissions_share_blob(self): Sprawdza deduplikację przesłanych rozwiązań.
+            test_dedupe_stored_files(self): Sprawdza przeniesienie dotychczasowych plików do magazynu.
+
+    """
+    def _course_file(self, content, name='lecture.pdf'):
+        return CourseFile.objects.create(name='Lecture', file=SimpleUploadedFile(name, content))
+
+    def test_identical_files_share_blob(self):
+        """
+                Sprawdza, czy pliki o tej samej zawartości wskazują na jedną kopię w magazynie.
+        """
+        first = self._course_file(b'lecture')
+        second = self._course_file(b'lecture', name='copy.pdf')
+        other = self._course_file(b'other lecture')
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertNotEqual(first.file.name, other.file.name)
+        self.assertTrue(first.file.name.startswith('pdf_files/'))
+        self.assertTrue(first.file.name.endswith('/lecture.pdf'))
+        self.assertEqual(Blob.objects.get(name=first.file.name).refcount, 2)
+        with second.file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'lecture')
+
+    def test_blob_deleted_with_last_reference(self):
+        """
+                Sprawdza, czy plik usuwany jest z magazynu dopiero po usunięciu ostatniego odwołania.
+        """
+        first = self._course_file(b'slides')
+        second = self._course_file(b'slides')
+        name = first.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(Blob.objects.get(name=name).refcount, 1)
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_replaced_file_released(self):
+        """
+                Sprawdza, czy po zastąpieniu pliku obiektu poprzedni plik jest zwalniany.
+        """
+        course_file = self._course_file(b'draft')
+        name = course_file.file.name
+        course_file.file = SimpleUploadedFile('final.pdf', b'final')
+        with self.captureOnCommitCallbacks(execute=True):
+            course_file.save()
+        self.assertFalse(Blob.objects.filter(name=name).exists())
+        self.assertEqual(Blob.objects.get(name=course_file.file.name).refcount, 1)
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=100 * 1024)
+    def test_identical_submissions_share_blob(self):
+        """
+                Sprawdza, czy identyczne rozwiązania przesłane przez różnych studentów zapisywane są raz.
+        """
+        assignment = Assignment.objects.create(title='Assignment', content='test')
+        url = reverse('assignment-submit', args=[assignment.pk])
+        for username in ('first', 'second'):
+            User.objects.create_user(username=username, password='12345')
+            self.client.login(username=username, password='12345')
+            self.client.post(url, {'file': SimpleUploadedFile('answer.txt', b'answer')})
+        names = set(Submission.objects.values_list('file', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(Blob.objects.get(name=names.pop()).refcount, 2)
+
+    def test_dedupe_stored_files(self):
+        """
+                Sprawdza, czy polecenie dedupe_stored_files rejestruje pliki i usuwa powtórzone kopie.
+        """
+        first = default_storage.save('pdf_files/legacy.pdf', ContentFile(b'legacy'))
+        second = default_storage.save('pdf_files/legacy.pdf', ContentFile(b'legacy'))
+        CourseFile.objects.bulk_create([CourseFile(name='First', file=first), CourseFile(name='Second', file=second)])
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('dedupe_stored_files', stdout=open('/dev/null', 'w'))
+        names = set(CourseFile.objects.values_list('file', flat=True))
+        self.assertEqual(names, {first})
+        self.assertEqual(Blob.objects.get(name=first).refcount, 2)
+        self.assertFalse(default_storage.exists(second))
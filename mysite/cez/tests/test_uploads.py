@@ -0,0 +1,83 @@
+import hashlib
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+
+from cez.models import Assignment, Submission
+from cez.uploads import LimitedUploadHandler
+from cez.validators import validate_file_size
+
+
+@override_settings(FILE_UPLOAD_MAX_SIZE=100 * 1024)
+class TestLimitedUploads(TestCase):
+    """
+        Klasa zawierająca testy przesyłania plików z limitem rozmiaru.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca studenta i zadanie.
+            test_upload_hashed_and_saved(self): Sprawdza zapisanie pliku i obliczenie skrótu SHA-256.
+            test_upload_over_limit_rejected(self): Sprawdza odrzucenie zbyt dużego pliku.
+            test_handler_stops_when_budget_exceeded(self): Sprawdza przerwanie odbierania po przekroczeniu limitu.
+            test_validate_file_size(self): Sprawdza walidator rozmiaru pliku.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca studenta i zadanie.
+        """
+        self.user = User.objects.create_user(username='test', password='12345')
+        self.assignment = Assignment.objects.create(title='Assignment', content='test')
+        self.url = reverse('assignment-submit', args=[self.assignment.pk])
+        self.client.login(username='test', password='12345')
+
+    def test_upload_hashed_and_saved(self):
+        """
+                Sprawdza zapisanie przesłanego pliku oraz skrót SHA-256 obliczony w trakcie odbierania.
+        """
+        content = b'answer' * 1000
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('answer.txt', content)})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.wsgi_request.FILES['file'].sha256, hashlib.sha256(content).hexdigest())
+        submission = Submission.objects.get(assignment=self.assignment, student=self.user)
+        with submission.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_upload_over_limit_rejected(self):
+        """
+                Sprawdza, czy zbyt duży plik jest odrzucany, a odpowiedź zawiera komunikat o limicie.
+        """
+        response = self.client.post(self.url, {'file': SimpleUploadedFile('answer.txt', b'x' * 300 * 1024)},
+                                    follow=True)
+        self.assertContains(response, 'File size exceeds the limit')
+        self.assertFalse(Submission.objects.exists())
+
+    def test_handler_stops_when_budget_exceeded(self):
+        """
+                Sprawdza, czy odbieranie pliku jest przerywane w chwili przekroczenia limitu.
+        """
+        request = RequestFactory().post('/')
+        handler = LimitedUploadHandler(request, max_size=1000)
+        handler.handle_raw_input(None, {}, 1500, b'boundary')
+        handler.new_file('file', 'answer.txt', 'text/plain', None)
+        handler.receive_data_chunk(b'x' * 600, 0)
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b'x' * 600, 600)
+        self.assertTrue(request.upload_too_large)
+
+        handler = LimitedUploadHandler(RequestFactory().post('/'), max_size=1000)
+        handler.handle_raw_input(None, {}, 1000 * 1000, b'boundary')
+        with self.assertRaises(StopUpload):
+            handler.new_file('file', 'answer.txt', 'text/plain', None)
+
+    def test_validate_file_size(self):
+        """
+                Sprawdza, czy walidator przepuszcza małe pliki i odrzuca pliki większe niż limit.
+        """
+        small = SimpleUploadedFile('small.txt', b'x' * 10)
+        self.assertIs(validate_file_size(small), small)
+        with self.assertRaises(ValidationError):
+            validate_file_size(SimpleUploadedFile('large.txt', b'x' * 200 * 1024))
@@ -1,15 +1,23 @@
+import asyncio
 from datetime import datetime
+from unittest import mock
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User, Group
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mysite.cache import TieredCache
+from mysite.queries import QueryBudgetMixin
 from cez.views import *
 from cez.models import *
 
 import json
 
-class TestViews(TestCase):
+class TestViews(QueryBudgetMixin, TestCase):
     """
         Klasa zawierająca testy widoków aplikacji CEZ.
 
@@ -62,7 +70,8 @@ class TestViews(TestCase):
         """
 
         url = reverse('index')
-        response = self.client.get(url)
+        with self.assertQueryBudget('index'):
+            response = self.client.get(url)
 
         self.assertEquals(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/index.html')
@@ -75,7 +84,8 @@ class TestViews(TestCase):
         """
 
         url = reverse('courses')
-        response = self.client.get(url)
+        with self.assertQueryBudget('courses'):
+            response = self.client.get(url)
 
         self.assertEquals(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/courses.html')
@@ -89,7 +99,8 @@ class TestViews(TestCase):
 
         self.client.login(username='test', password='12345')
         url = reverse('create-assignments', args=[self.course_id, self.topic_id])
-        response = self.client.get(url)
+        with self.assertQueryBudget('create-assignments'):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/create_assignment.html')
         self.client.logout()
@@ -176,7 +187,8 @@ class TestViews(TestCase):
 
         self.client.login(username='test2', password='12345')
         url = reverse('assignment-submit', args=[self.assignment_id])
-        response = self.client.get(url)
+        with self.assertQueryBudget('assignment-submit'):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/submit_assignment.html')
         self.client.logout()
@@ -190,7 +202,8 @@ class TestViews(TestCase):
 
         self.client.login(username='test', password='12345')
         url = reverse('create-course')
-        response = self.client.get(url)
+        with self.assertQueryBudget('create-course'):
+            response = self.client.get(url)
         self.assertEquals(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/create_course_form.html')
         self.client.logout()
@@ -413,7 +426,8 @@ class TestViews(TestCase):
 
         self.client.login(username='test', password='12345')
         url = reverse('topic-update', args=[self.course_id, self.topic_id])
-        response = self.client.get(url, follow=True)
+        with self.assertQueryBudget('topic-update'):
+            response = self.client.get(url, follow=True)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/topic_update.html')
         self.client.logout()
@@ -496,7 +510,8 @@ class TestViews(TestCase):
         self.client.login(username='test', password='12345')
         url = reverse('add-topic', args=[self.course_id])
 
-        response = self.client.get(url, follow=True)
+        with self.assertQueryBudget('add-topic'):
+            response = self.client.get(url, follow=True)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/add_topic.html')
         self.client.logout()
@@ -564,7 +579,8 @@ class TestViews(TestCase):
 
         self.client.login(username='test2', password='12345')
         url = reverse('course_detail', args=[self.course_id])
-        response = self.client.get(url)
+        with self.assertQueryBudget('course_detail'):
+            response = self.client.get(url)
         self.assertTrue(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/course_detail.html')
         self.client.logout()
@@ -591,7 +607,8 @@ class TestViews(TestCase):
 
         self.client.login(username='test', password='12345')
         url = reverse('assignment-rate', args=[self.course_id, self.assignment_id])
-        response = self.client.get(url)
+        with self.assertQueryBudget('assignment-rate'):
+            response = self.client.get(url)
         self.assertTrue(response.status_code, 200)
         self.assertTemplateUsed(response, 'cez/rate_assignment.html')
         self.client.logout()
@@ -746,3 +763,125 @@ class TestViews(TestCase):
         self.assertTrue(RateSubmission.objects.filter(comment="lkjh").exists())
         self.client.logout()
 
+    def test_course_detail_fragment_cached(self):
+        """
+                Testuje zapamiętywanie treści kursu.
+
+                Sprawdza, czy kolejne wyświetlenie szczegółów kursu nie pobiera ponownie tematów,
+                plików i zadań.
+        """
+
+        self.client.login(username='test2', password='12345')
+        url = reverse('course_detail', args=[self.course_id])
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(url)
+        self.assertContains(response, 'Test Topic')
+        self.assertLess(len(second), len(first))
+        self.assertFalse(any('cez_topic' in query['sql'] for query in second.captured_queries))
+        self.client.logout()
+
+    def test_course_detail_fragment_invalidated(self):
+        """
+                Testuje unieważnienie zapamiętanej treści kursu.
+
+                Sprawdza, czy po dodaniu tematu, pliku lub zadania szczegóły kursu zawierają nowe dane.
+        """
+
+        self.client.login(username='test2', password='12345')
+        url = reverse('course_detail', args=[self.course_id])
+        self.client.get(url)
+
+        topic = Topic.objects.create(title='New Topic', content='desc')
+        self.course.topics.add(topic)
+        self.assertContains(self.client.get(url), 'New Topic')
+
+        self.topic.files.add(self.coursefile)
+        self.assertContains(self.client.get(url), 'test file 80')
+
+        assignment = Assignment.objects.create(title='New Assignment', content='desc', due_date=datetime.now())
+        self.topic.assignments.add(assignment)
+        self.assertContains(self.client.get(url), 'New Assignment')
+
+        assignment.title = 'Renamed Assignment'
+        assignment.save()
+        self.assertContains(self.client.get(url), 'Renamed Assignment')
+
+        topic.delete()
+        self.assertNotContains(self.client.get(url), 'New Topic')
+        self.client.logout()
+
+    def test_course_detail_fragment_per_role(self):
+        """
+                Testuje rozdzielenie zapamiętanej treści kursu dla nauczyciela i studenta.
+
+                Sprawdza, czy student nie otrzymuje fragmentu z opcjami nauczyciela.
+        """
+
+        url = reverse('course_detail', args=[self.course_id])
+        self.client.login(username='test', password='12345')
+        self.assertContains(self.client.get(url), 'Update Topic')
+        self.client.logout()
+        self.client.login(username='test2', password='12345')
+        self.assertNotContains(self.client.get(url), 'Update Topic')
+        self.client.logout()
+
+
+    def test_course_detail_requires_login(self):
+        """
+                Testuje przekierowanie niezalogowanego użytkownika ze szczegółów kursu na stronę logowania.
+        """
+
+        url = reverse('course_detail', args=[self.course_id])
+        response = self.client.get(url)
+        self.assertRedirects(response, f'{settings.LOGIN_URL}?next={url}', fetch_redirect_response=False)
+
+    async def test_async_views(self):
+        """
+                Testuje widoki asynchroniczne wywoływane przez klienta ASGI.
+
+                Sprawdza, czy strona główna, lista kursów i szczegóły kursu renderowane są
+                bez zapytań do bazy danych w pętli zdarzeń.
+        """
+
+        await sync_to_async(self.async_client.force_login)(self.user)
+        self.assertContains(await self.async_client.get(reverse('index')), 'Go Learn')
+        response = await self.async_client.get(reverse('courses'))
+        self.assertContains(response, 'Math')
+        self.assertContains(response, 'Create new Course')
+        response = await self.async_client.get(reverse('course_detail', args=[self.course_id]))
+        self.assertContains(response, 'Test Topic')
+        self.assertContains(response, 'Update Topic')
+        response = await self.async_client.get(reverse('course_detail', args=[self.course_id + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_views_keep_cache_off_event_loop(self):
+        """
+                Testuje, czy widoki asynchroniczne nie odczytują ani nie zapisują pamięci podręcznej
+                w pętli zdarzeń (odczyt warstwy L2 z dysku blokowałby pozostałe żądania).
+
+                Strony odwiedzane są dwukrotnie, aby sprawdzić zarówno zapis, jak i odczyt.
+        """
+
+        def off_event_loop(method):
+            def wrapper(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError(f'cache.{method.__name__}() called on the event loop')
+            return wrapper
+
+        methods = {name: off_event_loop(getattr(TieredCache, name))
+                   for name in ('get', 'get_many', 'set', 'add', 'incr', 'delete')}
+        await sync_to_async(self.async_client.force_login)(self.user)
+        with mock.patch.multiple(TieredCache, **methods):
+            for _ in range(2):
+                self.assertContains(await self.async_client.get(reverse('index')), 'Go Learn')
+                self.assertContains(await self.async_client.get(reverse('courses'), {'title': 'Math'}), 'Math')
+                response = await self.async_client.get(reverse('course_detail', args=[self.course_id]))
+                self.assertContains(response, 'Test Topic')
+                response = await self.async_client.post(reverse('search'), {'users': 'test'},
+                                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+                self.assertEqual(response.status_code, 200)
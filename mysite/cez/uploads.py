@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+logger = logging.getLogger(__name__)
+
+# Zapas na pozostałe pola formularza i nagłówki części multipart przy ocenie Content-Length
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+def max_upload_size():
+    """
+        Zwraca maksymalny rozmiar przesyłanego pliku (ustawienie FILE_UPLOAD_MAX_SIZE).
+
+        Zwraca:
+            int: Rozmiar w bajtach.
+    """
+    return getattr(settings, 'FILE_UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+
+
+class HashedUploadedFile(UploadedFile):
+    """
+        Przesłany plik wraz ze skrótem SHA-256 jego zawartości.
+
+        Atrybuty:
+            sha256 (str): Skrót zawartości zapisany szesnastkowo.
+    """
+    def __init__(self, file, name, content_type, size, charset, content_type_extra=None, sha256=''):
+        super().__init__(file, name, content_type, size, charset, content_type_extra)
+        self.sha256 = sha256
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+        Obsługa przesyłanych plików z limitem rozmiaru i obliczaniem skrótu SHA-256.
+
+        Atrybuty:
+            max_size (int): Maksymalny rozmiar pliku w bajtach.
+
+        Opis działania:
+            Jeśli nagłówek Content-Length żądania przekracza limit, przesyłanie jest przerywane
+            przed odczytaniem pierwszego bajtu pliku. W przeciwnym razie przerwanie następuje
+            w chwili, gdy odebrane dane przekroczą limit - bez odbierania reszty żądania.
+            Pola formularza przesłane przed plikiem (m.in. token CSRF) pozostają dostępne,
+            a request.upload_too_large ustawiane jest na True.
+
+            Odbierane porcje trafiają do jednego bufora (w pamięci do FILE_UPLOAD_MAX_MEMORY_SIZE
+            bajtów, potem na dysku), z którego magazyn plików zapisuje plik bez dodatkowej kopii.
+            Skrót SHA-256 obliczany jest w trakcie odbierania (HashedUploadedFile.sha256).
+    """
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size or max_upload_size()
+        self.request_too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_too_large = bool(content_length) and content_length > self.max_size + UPLOAD_FORM_OVERHEAD
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.request_too_large:
+            self._reject()
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.file = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+                                                  suffix='.upload', dir=settings.FILE_UPLOAD_TEMP_DIR)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.file.close()
+            self._reject()
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        return HashedUploadedFile(
+            file=self.file,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+            sha256=self.digest.hexdigest(),
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+    def _reject(self):
+        logger.warning(f'Upload of {self.file_name} rejected, over the {self.max_size} bytes limit.')
+        if self.request is not None:
+            self.request.upload_too_large = True
+        raise StopUpload(connection_reset=True)
+
+
+def limit_uploads(view):
+    """
+        Dekorator widoku przyjmującego pliki, ustawiający LimitedUploadHandler.
+
+        Argumenty:
+            view (callable): Widok.
+
+        Zwraca:
+            callable: Widok z ograniczonym rozmiarem przesyłanych plików.
+
+        Opis działania:
+            Obsługę plików można zmienić tylko przed odczytaniem request.POST, które
+            następuje już w CsrfViewMiddleware, dlatego ochrona CSRF wykonywana jest
+            w dekoratorze, po ustawieniu obsługi plików.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_too_large = False
+        request.upload_handlers = [LimitedUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return wrapper
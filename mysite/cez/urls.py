@@ -9,12 +9,15 @@ urlpatterns = [
     path("courses/<int:course_id>/delete_course/", views.delete_course, name="delete_course"),
     path('course/<int:course_id>/', views.course_detail, name='course_detail'),
     path('course/<int:course_id>/addtopic', views.add_topic, name='add-topic'),
+    path('course/<int:course_id>/gradebook/', views.gradebook, name='gradebook'),
+    path('course/<int:course_id>/gradebook/export/<str:file_format>/', views.export_gradebook, name='gradebook-export'),
     path('course/<int:course_id>/topic/<int:topic_id>/update/', views.update_topic, name='topic-update'),
     path('course/<int:course_id>/topic/<int:topic_id>/delete/', views.delete_topic, name='topic-delete'),
     path('course/<int:course_id>/topic/<int:topic_id>/create_assignments/', views.create_assignments, name='create-assignments'),
     path('course/<int:course_id>/assignment/<int:assignment_id>/update/', views.update_assignment, name='assignment-update'),
     path('course/<int:course_id>/assignment/<int:assignment_id>/remove/', views.remove_assignment, name='assignment-remove'),
     path('course/<int:course_id>/assignment/<int:assignment_id>/rate/', views.rate_assignment, name='assignment-rate'),
+    path('course/<int:course_id>/assignment/<int:assignment_id>/download/', views.download_submissions, name='assignment-download'),
     path('course/<int:course_id>/assignment/<int:assignment_id>/rate/<int:submission_id>/', views.rate_users_assignment, name='assignment-rate-by-user'),
     path('course/<int:course_id>/addfile/<int:topic_id>', views.add_file, name='add-file'),
     path('course/<int:course_id>/deletefile/<str:file_id>/', views.delete_file, name='delete-file'),
@@ -1,11 +1,23 @@
 from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
+
+from .uploads import max_upload_size
+
 
 def validate_file_size(value):
-        filesize = value.file.size
-
-        if filesize < 10 * 1024:
-            print("za duzy")
-            raise ValidationError("The maximum file size that can be uploaded is 10MB")
-        else:
-            print("dddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddddd")
-            return value
\ No newline at end of file
+    """
+        Sprawdza, czy przesłany plik nie przekracza dozwolonego rozmiaru (FILE_UPLOAD_MAX_SIZE).
+
+        Argumenty:
+            value (File): Przesłany plik.
+
+        Zwraca:
+            File: Sprawdzony plik.
+
+        Wyjątki:
+            ValidationError: Gdy plik jest większy niż dozwolony rozmiar.
+    """
+    limit = max_upload_size()
+    if value.size > limit:
+        raise ValidationError(f'The maximum file size that can be uploaded is {filesizeformat(limit)}.')
+    return value
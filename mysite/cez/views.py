@@ -1,7 +1,14 @@
 import logging
+import posixpath
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from django.shortcuts import render,redirect,get_object_or_404
+from django.http import Http404, StreamingHttpResponse
+from django.core.paginator import Paginator
+from django.urls import reverse
+from django.utils.text import slugify
+from django.template.defaultfilters import filesizeformat
 from .models import Course, Enrollment, CourseFile
 from .models import Assignment, Submission, Topic, File, RateSubmission
 from django.contrib.auth.models import User
@@ -9,70 +16,105 @@ from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, DetailView
 from django.contrib import messages
 from .forms import SubmissionForm,TopicUpdateForm, AssignmentForm, AssignmentUpdateForm, FileForm, RateSubmissionForm, TopicForm, CourseForm, AccessKeyForm, CourseFileForm
-from django.contrib.auth.decorators import user_passes_test
+from .forms import BulkGradeFormSet
+from .uploads import limit_uploads, max_upload_size
+from users.roles import teacher_required, is_teacher
 from django.forms import modelformset_factory
-from django.db.models import Q
+from .cache import get_course_version, COURSE_FRAGMENT_TIMEOUT
+from . import catalog
+from .stats import site_counters
+from .gradebook import course_gradebook, gradebook_rows, save_grades
+from .exports import gradebook_export_rows, stream_csv, stream_xlsx, streaming_content, EXPORT_CONTENT_TYPES
+from .exports import submission_files, stream_zip
+from . import media as protected_media
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from mysite.cache import cached_fragment
 # Create your views here.
 
 logger = logging.getLogger(__name__)
 
-def index(request):
+# Liczba zgłoszeń na jednej stronie kolejki oceniania
+GRADING_PAGE_SIZE = 25
+
+def _index(request):
+    counters = site_counters()
+    context = {
+        'is_homepage': True,
+        'num_courses': counters['courses'],
+        'num_users': counters['users'],
+        'num_topics': counters['topics']
+    }
+
+    return render(request, 'cez/index.html', context)
+
+
+async def index(request):
     """
         Widok strony głównej.
 
-        Pobiera liczbę kursów, użytkowników i tematów z bazy danych
-        i renderuje szablon HTML dla strony głównej.
+        Pobiera liczbę kursów, użytkowników i tematów z utrzymywanych liczników
+        (cez.stats) i renderuje szablon HTML dla strony głównej.
 
         Argumenty:
             request (HttpRequest): Obiekt żądania HTTP.
 
         Zwraca:
             HttpResponse: Odpowiedź HTTP zawierająca zawartość strony głównej.
-    """
-    num_courses = Course.objects.count()
-    num_users = User.objects.count()
-    num_topics = Topic.objects.count()
-    context = {
-        'is_homepage': True,
-        'num_courses': num_courses,
-        'num_users': num_users,
-        'num_topics': num_topics
-    }
 
-    return render(request, 'cez/index.html', context)
+        Opis działania:
+            Widok jest asynchroniczny. Odczyt liczników i renderowanie szablonu (razem
+            z użytkownikiem w pasku nawigacji) wykonywane są jednym przejściem do wątku
+            (sync_to_async), aby ani zapytania, ani pamięć podręczna nie blokowały pętli zdarzeń.
+    """
+    return await sync_to_async(_index)(request)
 
 
-def courses(request):
+def _courses(request):
+    title = request.GET.get("title")
+    degree_id = request.GET.get("degree_id")
+    semester_id = request.GET.get("semester_id")
+    after = request.GET.get("after")
+    courses, next_cursor = catalog.catalog_page(title, degree_id, semester_id, after)
+    counts = catalog.facet_counts(title)
+    query = request.GET.copy()
+    query.pop('after', None)
+    first_page = query.urlencode()
+    if next_cursor:
+        query['after'] = next_cursor
+    return render(request, 'cez/courses.html', {
+        'courses': courses,
+        'title': title,
+        'degrees': catalog.facet_options(catalog.DEGREE_CHOICES, counts['degree'], degree_id),
+        'semesters': catalog.facet_options(catalog.SEMESTER_CHOICES, counts['semester'], semester_id),
+        'next_page': query.urlencode() if next_cursor else None,
+        'first_page': first_page if after else None,
+    })
+
+
+async def courses(request):
     """
        Widok strony kursów.
 
-       Pobiera parametry zapytania GET (tytuł, identyfikator stopnia, identyfikator semestru)
-       i zwraca odpowiednie kursy zgodnie z filtrami.
+       Pobiera parametry zapytania GET (tytuł, identyfikator stopnia, identyfikator semestru,
+       kursor strony) i zwraca jedną stronę kursów zgodnych z filtrami wraz z liczbą kursów
+       dla każdego stopnia i semestru.
 
        Argumenty:
            request (HttpRequest): Obiekt żądania HTTP.
 
        Zwraca:
            HttpResponse: Odpowiedź HTTP zawierająca zawartość strony kursów.
+
+       Opis działania:
+           Widok jest asynchroniczny. Strona kursów (catalog.catalog_page), liczniki (zwykle
+           z pamięci podręcznej, catalog.facet_counts) i renderowanie szablonu wykonywane są
+           jednym przejściem do wątku (sync_to_async).
     """
-    title = request.GET.get("title")
-    degree_id = request.GET.get("degree_id")
-    semester_id = request.GET.get("semester_id")
-    if (title == '' or title == None) and degree_id == None and semester_id == None :
-        courses = Course.objects.all()
-    else:
-        query = Q()
-        if title != '' and title != None:
-            query &= Q(title__icontains=title)
-        if degree_id != None:
-            query &= Q(degree_id=degree_id)
-        if semester_id != None:
-            query &= Q(semester_id=semester_id)
-        courses = Course.objects.filter(query)
-    return render(request, 'cez/courses.html', {'courses': courses, 'title': title})
-
-
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+    return await sync_to_async(_courses)(request)
+
+
+@teacher_required
 def create_assignments(request, course_id, topic_id):
     """
     Widok tworzenia zadań.
@@ -112,6 +154,7 @@ def create_assignments(request, course_id, topic_id):
     return render(request, 'cez/create_assignment.html', {'form': form, 'topic': topic})
 
 
+@limit_uploads
 @login_required
 def submit_assignment(request, assignment_id):
     """
@@ -156,11 +199,10 @@ def submit_assignment(request, assignment_id):
 
     if request.method == 'POST':
         form = SubmissionForm(request.POST, request.FILES, instance=submission_instance)
+        if request.upload_too_large:
+            messages.error(request, f'File size exceeds the limit ({filesizeformat(max_upload_size())}).')
+            return redirect('assignment-submit', assignment_id)
         if form.is_valid():
-            file_size = request.FILES['file'].size
-            if file_size > 10 * 1024 * 1024:
-                messages.error(request, 'File size exceeds the limit (10MB).')
-                return redirect('assignment-submit', assignment_id)
             form.instance.assignment = assignment
             form.instance.student = request.user
             form.save()
@@ -174,7 +216,7 @@ def submit_assignment(request, assignment_id):
 
 
 @login_required
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def create_course(request):
     """
        Widok odpowiedzialny za tworzenie nowego kursu.
@@ -216,7 +258,7 @@ def create_course(request):
 
 
 @login_required
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def delete_course(request, course_id):
     """
        Widok odpowiedzialny za usuwanie kursu.
@@ -247,7 +289,7 @@ def delete_course(request, course_id):
     return redirect('courses')
 
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def update_assignment(request, course_id, assignment_id):
     """
        Widok odpowiedzialny za aktualizację zadania.
@@ -297,7 +339,7 @@ def update_assignment(request, course_id, assignment_id):
     return render(request, 'cez/update_assignment.html', {'form': form, 'assignment':assignment})
 
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def remove_assignment(request, course_id, assignment_id):
     """
        Widok odpowiedzialny za usuwanie zadania.
@@ -379,7 +421,7 @@ def enroll_to_course(request, course_id):
         return render(request, 'cez/enroll_to_course.html', {'form': form, 'participants': participants})
     return redirect('course_detail', course_id=course_id)
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def update_topic(request, course_id, topic_id):
     """
        Widok odpowiedzialny za aktualizację tematu kursu.
@@ -427,7 +469,8 @@ def update_topic(request, course_id, topic_id):
         form = TopicUpdateForm(instance=topic)
     return render(request, 'cez/topic_update.html', {'form': form}) # , 'topic': topic
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@limit_uploads
+@teacher_required
 def add_file(request, course_id, topic_id):
     """
         Widok odpowiedzialny za dodanie pliku do tematu kursu.
@@ -463,6 +506,9 @@ def add_file(request, course_id, topic_id):
         return redirect('course_detail', course_id)
     if request.method == 'POST':
         form = CourseFileForm(request.POST, request.FILES)
+        if request.upload_too_large:
+            messages.error(request, f'File size exceeds the limit ({filesizeformat(max_upload_size())}).')
+            return redirect('add-file', course_id, topic_id)
         if form.is_valid():
             file = form.save()
             topic.files.add(file)
@@ -473,7 +519,7 @@ def add_file(request, course_id, topic_id):
         form = CourseFileForm()
     return render(request, 'cez/add_file.html', {'form': form})
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def delete_file(request, course_id, file_id):
     """
         Widok odpowiedzialny za usuwanie pliku z kursu.
@@ -491,19 +537,43 @@ def delete_file(request, course_id, file_id):
 
         Opis działania:
             Ten widok obsługuje usuwanie pliku z kursu. Najpierw pobiera plik o podanym identyfikatorze.
-            Następnie usuwa fizyczny plik z systemu plików oraz wpis o pliku z bazy danych. Po usunięciu,
+            Następnie usuwa wpis o pliku z bazy danych, a sygnał zwalnia plik w magazynie plików
+            (plik usuwany jest, gdy nie odwołują się do niego inne wpisy). Po usunięciu,
             wyświetla komunikat o sukcesie i przekierowuje użytkownika na stronę szczegółów kursu.
 
     """
 
     file = CourseFile.objects.get(pk=file_id)
-    file.file.delete()
     file.delete()
     messages.success(request, "Deleted file")
     return redirect('course_detail', course_id)
 
 @login_required
-def course_detail(request, course_id):
+def _course_detail(request, course_id):
+    course = get_object_or_404(Course.objects.select_related('teacher__user'), pk=course_id)
+    teacher = is_teacher(request.user)
+    course_version = get_course_version(course.pk)
+
+    def render_content():
+        topics = course.topics.prefetch_related('files', 'assignments')
+        return render_to_string('cez/course_content.html',
+                                {'course': course, 'topics': topics, 'is_teacher': teacher})
+
+    content = cached_fragment('course', f'content:{course.pk}:{course_version}:{teacher}',
+                              render_content, COURSE_FRAGMENT_TIMEOUT)
+    participants = (Enrollment.objects.filter(course_id=course_id)
+                    .select_related('student')
+                    .prefetch_related('student__groups'))
+    context = {
+        'course': course,
+        'course_content': content,
+        'user': request.user,
+        'participants': participants,
+        'is_teacher': teacher,
+    }
+    return render(request, 'cez/course_detail.html', context)
+
+async def course_detail(request, course_id):
     """
         Widok szczegółów kursu.
 
@@ -518,21 +588,85 @@ def course_detail(request, course_id):
             render: Renderowany szablon zawierający szczegóły kursu.
 
         Opis działania:
-            Ten widok obsługuje wyświetlanie szczegółów kursu. Najpierw pobiera kurs o podanym identyfikatorze.
-            Następnie pobiera tematy oraz uczestników kursu. Na koniec renderuje szablon zawierający szczegóły kursu
-            wraz z listą tematów i uczestników.
+            Ten widok obsługuje wyświetlanie szczegółów kursu. Najpierw pobiera kurs o podanym identyfikatorze
+            wraz z nauczycielem. Następnie przygotowuje zapytania o tematy (z plikami i zadaniami) oraz
+            uczestników (z grupami). Treść kursu (szablon cez/course_content.html) zapamiętywana jest
+            przez mysite.cache.cached_fragment pod kluczem zawierającym wersję kursu, więc tematy
+            pobierane są tylko wtedy, gdy fragmentu nie ma w pamięci podręcznej.
+            Widok jest asynchroniczny. Sprawdzenie zalogowania, pobranie danych i renderowanie
+            szablonu wykonywane są jednym przejściem do wątku (sync_to_async), aby ani zapytania,
+            ani pamięć podręczna nie blokowały pętli zdarzeń.
 
     """
 
-    course = Course.objects.get(pk=course_id)
-    topics = Course.objects.get(pk=course_id).topics.all()
-    participants = Enrollment.objects.filter(course_id=course_id)
-    return render(request, 'cez/course_detail.html', {'course': course, 'topics': topics, 'user': request.user, 'participants': participants})
+    return await sync_to_async(_course_detail)(request, course_id)
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
+def gradebook(request, course_id):
+    """
+        Widok dziennika ocen kursu.
+
+        Wymagane uprawnienia:
+            - Użytkownik musi być przypisany do grupy "Nauczyciel".
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+            course_id (int): Identyfikator kursu.
+
+        Zwraca:
+            render: Renderowany szablon z tabelą ocen studentów ze wszystkich zadań kursu.
+
+        Opis działania:
+            Macierz ocen pobierana jest z pamięci podręcznej lub wyznaczana stałą liczbą
+            zapytań (cez.gradebook), niezależnie od liczby studentów i zadań.
+    """
+
+    course = get_object_or_404(Course, pk=course_id)
+    grades = course_gradebook(course.pk)
+    return render(request, 'cez/gradebook.html', {
+        'course': course,
+        'assignments': grades['assignments'],
+        'rows': gradebook_rows(grades),
+    })
+
+@teacher_required
+def export_gradebook(request, course_id, file_format):
+    """
+        Widok eksportu ocen kursu do pliku CSV lub XLSX.
+
+        Wymagane uprawnienia:
+            - Użytkownik musi być przypisany do grupy "Nauczyciel".
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+            course_id (int): Identyfikator kursu.
+            file_format (str): Format pliku ('csv' lub 'xlsx').
+
+        Zwraca:
+            StreamingHttpResponse: Plik z ocenami, komentarzami i datami przesłania rozwiązań.
+
+        Opis działania:
+            Plik jest tworzony i wysyłany porcjami w trakcie odczytu danych (cez.exports),
+            również pod ASGI (cez.exports.streaming_content), więc wysyłanie zaczyna się od razu,
+            a zużycie pamięci nie zależy od liczby studentów.
+    """
+
+    if file_format not in EXPORT_CONTENT_TYPES:
+        raise Http404
+    course = get_object_or_404(Course, pk=course_id)
+    rows = gradebook_export_rows(course.pk)
+    content = stream_csv(rows) if file_format == 'csv' else stream_xlsx(rows)
+    response = StreamingHttpResponse(streaming_content(request, content),
+                                     content_type=EXPORT_CONTENT_TYPES[file_format])
+    filename = f'{slugify(course.title) or course.pk}-grades.{file_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    logger.info(f'User {request.user} exported grades of course {course.pk} as {file_format}.')
+    return response
+
+@teacher_required
 def rate_assignment(request, course_id, assignment_id):
     """
-        Widok oceniania zadania.
+        Widok kolejki oceniania zadania.
 
         Wymagane uprawnienia:
             - Użytkownik musi być przypisany do grupy "Nauczyciel".
@@ -543,20 +677,94 @@ def rate_assignment(request, course_id, assignment_id):
             assignment_id (int): Identyfikator zadania do ocenienia.
 
         Zwraca:
-            render: Renderowany szablon zawierający formularz oceny zadania.
+            render: Renderowany szablon zawierający stronę zgłoszeń wraz z formularzem ocen.
 
         Opis działania:
-            Ten widok obsługuje ocenianie zadania. Najpierw pobiera zadanie o podanym identyfikatorze.
-            Następnie pobiera wszystkie zgłoszenia związane z tym zadaniem. Na koniec renderuje szablon
-            zawierający formularz oceniania zadania oraz listę zgłoszeń.
+            Ten widok wyświetla zgłoszenia zadania stronami (GRADING_PAGE_SIZE zgłoszeń) razem
+            z dotychczasowymi ocenami nauczyciela - studenci i oceny pobierane są po jednym
+            zapytaniu na stronę. Przesłany formularz zapisuje wszystkie wprowadzone oceny ze
+            strony w jednej transakcji (cez.gradebook.save_grades), a zgłoszenia bez oceny pomija.
 
     """
 
-    assignment = Assignment.objects.get(pk=assignment_id)
-    submissions = Submission.objects.filter(assignment__id=assignment.id)
-    return render(request, 'cez/rate_assignment.html', {'assignment': assignment,'submissions': submissions, 'course_id': course_id})
+    assignment = get_object_or_404(Assignment, pk=assignment_id)
+    submissions = (Submission.objects.filter(assignment_id=assignment.id)
+                   .select_related('student')
+                   .order_by('student__last_name', 'student__first_name', 'pk'))
+    page = Paginator(submissions, GRADING_PAGE_SIZE).get_page(request.GET.get('page'))
+    teacher = request.user.profile
+
+    if request.method == 'POST':
+        formset = BulkGradeFormSet(request.POST)
+        if formset.is_valid():
+            graded = [data for data in formset.cleaned_data if data and data['grade'] is not None]
+            students = dict(Submission.objects.filter(assignment_id=assignment.id,
+                                                      pk__in=[data['submission'] for data in graded])
+                            .values_list('pk', 'student_id'))
+            grades = {students[data['submission']]: (data['grade'], data['comment'])
+                      for data in graded if data['submission'] in students}
+            saved = save_grades(assignment.id, teacher,
+                                [(student_id, grade, comment) for student_id, (grade, comment) in grades.items()])
+            logger.info(f'User {request.user} has rated {saved} submissions of assignment of id {assignment.id}.')
+            messages.success(request, f'Saved {saved} grades.')
+            return redirect(f"{reverse('assignment-rate', args=[course_id, assignment.id])}?page={page.number}")
+    else:
+        ratings = dict((student_id, (grade, comment)) for student_id, grade, comment in
+                       RateSubmission.objects.filter(assignment_id=assignment.id, teacher=teacher,
+                                                     student_id__in=[submission.student_id for submission in page])
+                       .values_list('student_id', 'grade', 'comment'))
+        formset = BulkGradeFormSet(initial=[{
+            'submission': submission.pk,
+            'grade': ratings.get(submission.student_id, (None, ''))[0],
+            'comment': ratings.get(submission.student_id, (None, ''))[1],
+        } for submission in page])
+
+    return render(request, 'cez/rate_assignment.html', {
+        'assignment': assignment,
+        'page': page,
+        'formset': formset,
+        'rows': list(zip(page, formset.forms)),
+        'course_id': course_id,
+    })
+
+@teacher_required
+def download_submissions(request, course_id, assignment_id):
+    """
+        Widok pobierania wszystkich rozwiązań zadania w jednym archiwum ZIP.
+
+        Wymagane uprawnienia:
+            - Użytkownik musi być przypisany do grupy "Nauczyciel".
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+            course_id (int): Identyfikator kursu, do którego należy zadanie.
+            assignment_id (int): Identyfikator zadania.
+
+        Zwraca:
+            StreamingHttpResponse: Archiwum ZIP z rozwiązaniami w katalogach studentów.
+
+        Opis działania:
+            Archiwum tworzone jest w trakcie wysyłania z plików odczytywanych porcjami
+            z magazynu plików (cez.exports.stream_zip), bez plików tymczasowych. Pod ASGI
+            porcje oddawane są iteratorem asynchronicznym (cez.exports.streaming_content),
+            więc archiwum nie jest gromadzone w pamięci przed wysłaniem. Parametr
+            ?ungraded=1 ogranicza archiwum do rozwiązań, które nie mają jeszcze oceny.
+            Archiwum może pobrać tylko prowadzący kurs, do którego należy zadanie - w innym
+            przypadku zwracana jest odpowiedź 404.
+    """
+
+    assignment = get_object_or_404(Assignment.objects.distinct(), pk=assignment_id, topics__course__pk=course_id,
+                                   topics__course__teacher__user=request.user)
+    ungraded = request.GET.get('ungraded') == '1'
+    archive = stream_zip(submission_files(assignment.pk, ungraded))
+    response = StreamingHttpResponse(streaming_content(request, archive), content_type=EXPORT_CONTENT_TYPES['zip'])
+    suffix = 'ungraded' if ungraded else 'submissions'
+    filename = f'{slugify(assignment.title) or assignment.pk}-{suffix}.zip'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    logger.info(f'User {request.user} downloaded {suffix} of assignment of id {assignment.pk}.')
+    return response
+
+@teacher_required
 def rate_users_assignment(request, course_id, assignment_id, submission_id):
     """
        Widok odpowiedzialny za ocenianie zadań użytkowników.
@@ -585,12 +793,12 @@ def rate_users_assignment(request, course_id, assignment_id, submission_id):
             generowany jest nowy formularz oceny.
     """
 
-    submission = get_object_or_404(Submission, pk=submission_id)
+    submission = get_object_or_404(Submission.objects.select_related('student'), pk=submission_id)
 
     try:
         existing_rating = RateSubmission.objects.get(assignment_id=assignment_id,
                                                      teacher=request.user.profile,
-                                                     student_id=submission.student.pk)
+                                                     student_id=submission.student_id)
     except RateSubmission.DoesNotExist:
         existing_rating = None
 
@@ -603,7 +811,7 @@ def rate_users_assignment(request, course_id, assignment_id, submission_id):
         if form.is_valid():
             form.instance.teacher = request.user.profile
             form.instance.student = submission.student
-            form.instance.assignment = Assignment.objects.get(pk=assignment_id)
+            form.instance.assignment_id = assignment_id
             form.save()
             logger.info(f'User {request.user} has rated assignment of id {assignment_id} and submission id {submission_id}.')
             return redirect('assignment-rate', course_id=course_id, assignment_id=assignment_id)
@@ -612,7 +820,7 @@ def rate_users_assignment(request, course_id, assignment_id, submission_id):
 
     return render(request, 'cez/rate_students_assignment.html', {'form': form, 'submission': submission})
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def add_topic(request, course_id):
     """
        Widok odpowiedzialny za dodanie nowego tematu do kursu.
@@ -650,7 +858,7 @@ def add_topic(request, course_id):
         form = TopicForm()
     return render(request, 'cez/add_topic.html', {'form': form})
 
-@user_passes_test(lambda u: u.groups.filter(name='Nauczyciel').exists())
+@teacher_required
 def delete_topic(request, course_id, topic_id):
     """
         Widok odpowiedzialny za usuwanie tematu z kursu.
@@ -683,4 +891,31 @@ def delete_topic(request, course_id, topic_id):
     except Topic.DoesNotExist:
         messages.error(request,"Topic does not exist.")
         logger.info(f'User {request.user} tried to delete topic of id {topic_id} but it does not exist.')
-        return redirect('course_detail', course_id=course_id)
\ No newline at end of file
+        return redirect('course_detail', course_id=course_id)
+
+def media(request, path):
+    """
+        Widok pobierania plików z magazynu plików (MEDIA_URL).
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+            path (str): Nazwa pliku w magazynie plików.
+
+        Zwraca:
+            HttpResponse: Plik, odpowiedź częściowa (Range) lub 304 (cez.media.serve).
+
+        Wyjątki:
+            Http404: Jeśli plik nie istnieje lub użytkownik nie ma do niego dostępu.
+
+        Opis działania:
+            Pliki kursów i rozwiązania wysyłane są tylko nauczycielom, autorom rozwiązań
+            i studentom zapisanym na kurs; pozostałe pliki (np. obrazy kursów i zdjęcia
+            profilowe) są publiczne. Brak dostępu zwraca 404, aby nie ujawniać istnienia pliku.
+    """
+
+    name = posixpath.normpath(path).lstrip('/')
+    if name.startswith('..'):
+        raise Http404
+    if protected_media.is_protected(name) and not protected_media.can_access(request.user, name):
+        raise Http404
+    return protected_media.serve(request, default_storage, name)
@@ -0,0 +1,155 @@
+import asyncio
+import atexit
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+
+from chat.models import ChatMessage, Thread
+
+logger = logging.getLogger(__name__)
+
+
+def write_behind_enabled():
+    """
+        Sprawdza, czy zapis wiadomości czatu przez bufor jest włączony (ustawienie CHAT_WRITE_BEHIND).
+
+        Zwraca:
+            bool: True, jeśli wiadomości mają być zapisywane partiami.
+    """
+    return getattr(settings, 'CHAT_WRITE_BEHIND', False)
+
+
+class MessageBuffer:
+    """
+        Bufor zapisu wiadomości czatu wykonywanego partiami (write-behind).
+
+        Atrybuty:
+            max_rows (int): Liczba wiadomości, po której bufor jest zapisywany od razu.
+            max_delay (float): Maksymalny czas (w sekundach) przebywania wiadomości w buforze.
+
+        Metody:
+            add(self, message): Dodaje wiadomość do bufora.
+            flush(self): Zapisuje zebrane wiadomości jednym zapytaniem bulk_create i aktualizuje ich wątki.
+            flush_sync(self): Synchroniczny odpowiednik flush, używany przy zamykaniu procesu.
+
+        Opis działania:
+            Wiadomość jest rozsyłana do uczestników przed zapisaniem jej w bazie danych.
+            Bufor zapisywany jest po zebraniu max_rows wiadomości lub po max_delay sekundach
+            od dodania pierwszej z nich, a przy normalnym zakończeniu procesu - w funkcji
+            zarejestrowanej przez atexit.
+
+            Gwarancja: po awarii procesu (np. SIGKILL, brak pamięci) lub błędzie bazy danych
+            podczas zapisu tracone są wiadomości z bieżącej partii - najwyżej max_rows wiadomości
+            z ostatnich max_delay sekund na proces. Wiadomości mogły zostać już dostarczone
+            odbiorcom, ale nie pojawią się w historii. Jeśli przed zapisem usunięto wątek lub
+            nadawcę wiadomości, tracone są tylko jego wiadomości, a pozostałe zapisywane są
+            ponownie. Zapis następuje w kolejności dodania, a znacznik czasu wiadomości odpowiada
+            chwili zapisu partii.
+    """
+    def __init__(self, max_rows=None, max_delay=None):
+        self.max_rows = max_rows or getattr(settings, 'CHAT_WRITE_BEHIND_ROWS', 100)
+        self.max_delay = max_delay or getattr(settings, 'CHAT_WRITE_BEHIND_DELAY', 0.05)
+        self._rows = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._timer_loop = None
+        self._tasks = set()
+        self._atexit_registered = False
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _take(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            rows, self._rows = self._rows, []
+        return rows
+
+    def _flush_later(self):
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def add(self, message):
+        """
+               Dodaje wiadomość do bufora.
+
+               Argumenty:
+                   message (ChatMessage): Niezapisana wiadomość czatu.
+
+               Opis działania:
+                   Po osiągnięciu max_rows wiadomości bufor jest zapisywany od razu, a wywołujący
+                   czeka na zakończenie zapisu. W przeciwnym razie planowany jest zapis po max_delay.
+        """
+        if not self._atexit_registered:
+            atexit.register(self.flush_sync)
+            self._atexit_registered = True
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._rows.append(message)
+            full = len(self._rows) >= self.max_rows
+            if not full and (self._timer is None or self._timer_loop is not loop):
+                # Zapis zaplanowany w innej (np. zamkniętej) pętli zdarzeń nie zostałby wykonany
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = loop.call_later(self.max_delay, self._flush_later)
+                self._timer_loop = loop
+        if full:
+            await self.flush()
+
+    def _write(self, rows):
+        try:
+            ChatMessage.objects.post_many(rows)
+        except IntegrityError:
+            # Partia jest wycofywana w całości, np. gdy wątek lub nadawca jednej z wiadomości
+            # został usunięty przed zapisem. Ponownie zapisywane są wiadomości, których wątek
+            # i nadawca nadal istnieją.
+            threads = set(Thread.objects.filter(pk__in={row.thread_id for row in rows})
+                          .values_list('pk', flat=True))
+            users = set(User.objects.filter(pk__in={row.user_id for row in rows}).values_list('pk', flat=True))
+            kept = [row for row in rows if row.thread_id in threads and row.user_id in users]
+            if len(kept) == len(rows):
+                raise
+            logger.warning(f'Dropped {len(rows) - len(kept)} buffered chat messages of deleted threads or users.')
+            for row in kept:
+                # Identyfikatory nadane przez wycofane zapytanie INSERT
+                row.pk = None
+                row._state.adding = True
+            if kept:
+                ChatMessage.objects.post_many(kept)
+
+    async def flush(self):
+        """
+               Zapisuje zebrane wiadomości jednym zapytaniem bulk_create i aktualizuje ich wątki.
+        """
+        rows = self._take()
+        if not rows:
+            return
+        try:
+            await sync_to_async(self._write)(rows)
+        except Exception:
+            logger.exception(f'Lost {len(rows)} buffered chat messages.')
+
+    def flush_sync(self):
+        """
+               Synchroniczny odpowiednik flush, używany przy zamykaniu procesu.
+        """
+        rows = self._take()
+        if not rows:
+            return
+        try:
+            self._write(rows)
+        except Exception:
+            logger.exception(f'Lost {len(rows)} buffered chat messages.')
+
+
+# Bufor współdzielony przez wszystkie połączenia obsługiwane przez proces
+message_buffer = MessageBuffer()
@@ -1,26 +1,50 @@
 import json
+import logging
 from channels.consumer import AsyncConsumer
-from channels.db import database_sync_to_async
+from channels.exceptions import StopConsumer
 from django.contrib.auth import get_user_model
 
+from chat.buffer import message_buffer, write_behind_enabled
 from chat.models import Thread, ChatMessage
+from mysite.nplusone import detect
+from users.models import Profile
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class ChatConsumer(AsyncConsumer):
     """
         Konsumer obsługujący połączenia WebSocket dla czatu.
 
+        Atrybuty:
+            user_id (int): Identyfikator połączonego użytkownika.
+            user_card (dict): Dane połączonego użytkownika dołączane do wysyłanych wiadomości.
+            threads (dict): Wątki użytkownika w postaci {id wątku: id drugiego uczestnika}.
+
         Metody:
+            dispatch(self, message): Metoda przekazująca zdarzenie do obsługującej je metody.
             websocket_connect(self, event): Metoda wywoływana przy nawiązaniu połączenia WebSocket.
             websocket_receive(self, event): Metoda wywoływana przy otrzymaniu wiadomości WebSocket.
             websocket_disconnect(self, event): Metoda wywoływana przy rozłączeniu połączenia WebSocket.
             chat_message(self, event): Metoda wysyłająca wiadomość czatu do klienta WebSocket.
-            get_user_object(self, user_id): Metoda asynchroniczna pobierająca obiekt użytkownika z bazy danych.
-            get_thread(self, thread_id): Metoda asynchroniczna pobierająca obiekt wątku z bazy danych.
-            create_chat_message(self, thread, user, msg): Metoda asynchroniczna tworząca nową wiadomość czatu w bazie danych.
+            get_user_card(self, user): Metoda asynchroniczna pobierająca dane użytkownika wyświetlane przy wiadomościach.
+            get_threads(self): Metoda asynchroniczna pobierająca wątki, w których uczestniczy użytkownik.
 
     """
+    async def dispatch(self, message):
+        """
+                Metoda przekazująca zdarzenie do obsługującej je metody.
+
+                Argumenty:
+                    message (dict): Zdarzenie WebSocket lub warstwy kanałów.
+
+                Opis działania:
+                    Zapytania N+1 wykonane podczas obsługi zdarzenia są wykrywane
+                    tak samo jak w żądaniach HTTP (mysite.nplusone.detect).
+        """
+        with detect(f'{type(self).__name__} {message["type"]}'):
+            await super().dispatch(message)
+
     async def websocket_connect(self, event):
         """
                 Metoda wywoływana przy nawiązaniu połączenia WebSocket.
@@ -28,13 +52,24 @@ class ChatConsumer(AsyncConsumer):
                 Argumenty:
                     event (dict): Zdarzenie nawiązania połączenia WebSocket.
 
+                Opis działania:
+                    Dane użytkownika oraz jego wątki pobierane są jeden raz na połączenie,
+                    dzięki czemu obsługa kolejnych wiadomości nie wymaga odczytów z bazy danych.
+                    Połączenia użytkowników niezalogowanych są odrzucane.
         """
-        print('connected', event)
         user = self.scope['user']
-        chat_room = f'user_chatroom_{user.id}'
-        self.chat_room = chat_room
+        if not user.is_authenticated:
+            await self.send({
+                'type': 'websocket.close'
+            })
+            return
+
+        self.user_id = user.id
+        self.user_card = await self.get_user_card(user)
+        self.threads = await self.get_threads()
+        self.chat_room = f'user_chatroom_{user.id}'
         await self.channel_layer.group_add(
-            chat_room,
+            self.chat_room,
             self.channel_name
         )
         await self.send({
@@ -48,62 +83,61 @@ class ChatConsumer(AsyncConsumer):
                Argumenty:
                    event (dict): Zdarzenie otrzymania wiadomości WebSocket.
 
+               Opis działania:
+                   Nadawcą wiadomości jest zawsze połączony użytkownik, a odbiorcą drugi uczestnik
+                   wątku - wartości send_by i send_to przesłane przez klienta nie są używane.
+                   Wiadomości do wątków, do których użytkownik nie należy, są odrzucane.
+                   Zapis wiadomości wraz z aktualizacją wątku (ChatMessage.objects.post) jest jedyną
+                   operacją na bazie danych (lista wątków pobierana jest ponownie tylko dla wątku
+                   nieznanego w chwili nawiązania połączenia).
+                   Przy ustawieniu CHAT_WRITE_BEHIND = True wiadomości zapisywane są partiami
+                   (chat.buffer.MessageBuffer).
         """
-        print('receive', event)
-        received_data = json.loads(event['text'])
+        try:
+            received_data = json.loads(event['text'])
+            thread_id = int(received_data.get('thread_id'))
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f'User {self.user_id} sent a malformed chat frame.')
+            return
         msg = received_data.get('message')
-        send_by_id = received_data.get('send_by')
-        send_to_id = received_data.get('send_to')
-        thread_id = received_data.get('thread_id')
-
         if not msg:
-            print('empty message')
-            return False
-
-        send_by_user = await self.get_user_object(send_by_id)
-        send_to_user = await self.get_user_object(send_to_id)
-        thread_obj = await self.get_thread(thread_id)
-
-        if not send_by_user:
-            print('Error:: send by user is incorrect')
-        if not send_to_user:
-            print('Error:: send to user is incorrect')
-        if not thread_obj:
-            print('Error:: Thread id is incorrect')
-
-        await self.create_chat_message(thread_obj, send_by_user, msg)
-
-        other_user_chat_room = f'user_chatroom_{send_to_id}'
-        self_user = self.scope['user']
+            return
+
+        if thread_id not in self.threads:
+            # Wątek mógł zostać utworzony po nawiązaniu połączenia
+            self.threads = await self.get_threads()
+            if thread_id not in self.threads:
+                logger.warning(f'User {self.user_id} is not a participant of thread {thread_id}.')
+                return
+        other_user_id = self.threads[thread_id]
+
+        if write_behind_enabled():
+            await message_buffer.add(ChatMessage(thread_id=thread_id, user_id=self.user_id, message=msg))
+        else:
+            await ChatMessage.objects.apost(thread_id, self.user_id, msg)
 
-        response = {
+        text = json.dumps({
             'message': msg,
-            'send_by': self_user.id,
+            'send_by': self.user_id,
             'thread_id': thread_id,
-            'user_data': {
-                'first_name': send_by_user.first_name,
-                'last_name': send_by_user.last_name,
-                'profile_picture': send_by_user.profile.profile_pic.url
-            }
-        }
-
-        await self.channel_layer.group_send(
-            other_user_chat_room,
-            {
-                'type': 'chat_message',
-                'text': json.dumps(response)
-            }
-        )
-
+            'user_data': self.user_card,
+        })
+        if other_user_id is not None and other_user_id != self.user_id:
+            await self.channel_layer.group_send(
+                f'user_chatroom_{other_user_id}',
+                {
+                    'type': 'chat_message',
+                    'text': text
+                }
+            )
         await self.channel_layer.group_send(
             self.chat_room,
             {
                 'type': 'chat_message',
-                'text': json.dumps(response)
+                'text': text
             }
         )
 
-
     async def websocket_disconnect(self, event):
         """
                 Metoda wywoływana przy rozłączeniu połączenia WebSocket.
@@ -112,7 +146,12 @@ class ChatConsumer(AsyncConsumer):
                     event (dict): Zdarzenie rozłączenia połączenia WebSocket.
 
          """
-        print('disconnect', event)
+        if hasattr(self, 'chat_room'):
+            await self.channel_layer.group_discard(
+                self.chat_room,
+                self.channel_name
+            )
+        raise StopConsumer()
 
     async def chat_message(self, event):
         """
@@ -122,58 +161,39 @@ class ChatConsumer(AsyncConsumer):
                    event (dict): Zdarzenie wysłania wiadomości czatu.
 
         """
-        print('chat_message', event)
         await self.send({
             'type': 'websocket.send',
             'text': event['text']
         })
 
-    @database_sync_to_async
-    def get_user_object(self, user_id):
+    async def get_user_card(self, user):
         """
-                Metoda asynchroniczna pobierająca obiekt użytkownika z bazy danych.
+                Metoda asynchroniczna pobierająca dane użytkownika wyświetlane przy wiadomościach.
 
                 Argumenty:
-                    user_id (int): Identyfikator użytkownika.
+                    user (User): Połączony użytkownik.
 
                 Zwraca:
-                    User: Obiekt użytkownika lub None, jeśli użytkownik nie istnieje.
+                    dict: Imię, nazwisko oraz adres zdjęcia profilowego użytkownika.
 
         """
-        try:
-            user = User.objects.select_related('profile').get(id=user_id)
-            return user
-        except User.DoesNotExist:
-            return None
+        profile = await Profile.objects.aget(user_id=user.id)
+        return {
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'profile_picture': profile.avatar_url
+        }
 
-    @database_sync_to_async
-    def get_thread(self, thread_id):
+    async def get_threads(self):
         """
-               Metoda asynchroniczna pobierająca obiekt wątku z bazy danych.
-
-               Argumenty:
-                   thread_id (int): Identyfikator wątku.
+               Metoda asynchroniczna pobierająca wątki, w których uczestniczy użytkownik.
 
                Zwraca:
-                   Thread: Obiekt wątku lub None, jeśli wątek nie istnieje.
-
-        """
-        q = Thread.objects.filter(id=thread_id)
-        if q.exists():
-            obj = q.first()
-        else:
-            obj = None
-        return obj
-
-    @database_sync_to_async
-    def create_chat_message(self, thread, user, msg):
-        """
-               Metoda asynchroniczna tworząca nową wiadomość czatu w bazie danych.
-
-               Argumenty:
-                   thread (Thread): Obiekt wątku czatu.
-                   user (User): Obiekt użytkownika wysyłającego wiadomość.
-                   msg (str): Treść wiadomości.
+                   dict: Słownik {id wątku: id drugiego uczestnika}.
 
         """
-        ChatMessage.objects.create(thread=thread, user=user, message=msg)
\ No newline at end of file
+        threads = {}
+        rows = Thread.objects.by_user(user=self.user_id).values_list('id', 'first_person_id', 'second_person_id')
+        async for thread_id, first_person_id, second_person_id in rows:
+            threads[thread_id] = second_person_id if first_person_id == self.user_id else first_person_id
+        return threads
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from copy import deepcopy
+
+import psycopg2
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer
+from django.conf import settings
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+# Maksymalny rozmiar jednego powiadomienia NOTIFY (limit PostgreSQL to 8000 bajtów)
+NOTIFY_CHUNK_SIZE = 7000
+
+
+class PostgresChannelLayer(InMemoryChannelLayer):
+    """
+        Warstwa kanałów rozsyłająca wiadomości między procesami przez PostgreSQL LISTEN/NOTIFY.
+
+        Atrybuty:
+            prefix (str): Przedrostek nazw kanałów PostgreSQL używanych przez warstwę.
+            layer_id (str): Identyfikator procesu, zawarty w nazwach jego kanałów.
+            reconnect_delay (float): Czas oczekiwania (w sekundach) przed ponownym połączeniem.
+
+        Metody:
+            send(self, channel, message): Wysyła wiadomość do kanału w tym lub innym procesie.
+            receive(self, channel): Odbiera wiadomość z kanału tego procesu.
+            new_channel(self, prefix): Zwraca nazwę nowego kanału tego procesu.
+            group_add(self, group, channel): Dodaje kanał tego procesu do grupy.
+            group_send(self, group, message): Wysyła wiadomość do członków grupy we wszystkich procesach.
+            close(self): Zamyka połączenia z bazą danych.
+
+        Opis działania:
+            Kolejki kanałów oraz członkostwo w grupach (z wygasaniem po group_expiry sekundach)
+            przechowywane są lokalnie, tak jak w InMemoryChannelLayer. Każdy proces nasłuchuje
+            na wspólnym kanale PostgreSQL dla grup oraz na własnym kanale dla wiadomości
+            skierowanych do jego kanałów. group_send dostarcza wiadomość lokalnym członkom grupy
+            od razu, a pozostałym procesom przez NOTIFY - każdy z nich dostarcza ją swoim członkom.
+            Do grupy należy więc dodawać kanały własnego procesu (tak jak robią to konsumery).
+
+            Wiadomości muszą dać się zapisać w JSON. Wiadomości dłuższe niż NOTIFY_CHUNK_SIZE
+            dzielone są na części wysyłane w jednej transakcji. Dostarczanie odbywa się
+            najwyżej raz: wiadomości wysłane w czasie, gdy proces nie jest połączony z bazą
+            danych, są tracone (tak jak w przypadku Redis Pub/Sub).
+    """
+    extensions = ['groups', 'flush']
+
+    def __init__(self, prefix='channels', dsn=None, reconnect_delay=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self.layer_id = uuid.uuid4().hex[:12]
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        self._listener = None
+        self._listener_loop = None
+        self._chunks = {}
+
+    # Połączenia z bazą danych
+
+    def _connect(self):
+        if self.dsn:
+            conn = psycopg2.connect(self.dsn)
+        else:
+            db = settings.DATABASES['default']
+            params = {
+                'dbname': db.get('NAME'),
+                'user': db.get('USER'),
+                'password': db.get('PASSWORD'),
+                'host': db.get('HOST'),
+                'port': db.get('PORT'),
+            }
+            conn = psycopg2.connect(**{key: value for key, value in params.items() if value})
+        return conn
+
+    def _pg_channel(self, layer_id=None):
+        # Kanał wspólny dla grup lub kanał konkretnego procesu
+        return f'{self.prefix}_{layer_id}' if layer_id else self.prefix
+
+    def _notify(self, pg_channel, payloads):
+        with self._sender_lock:
+            for attempt in range(2):
+                if self._sender is None or self._sender.closed:
+                    self._sender = self._connect()
+                try:
+                    with self._sender.cursor() as cursor:
+                        for payload in payloads:
+                            cursor.execute('SELECT pg_notify(%s, %s)', (pg_channel, payload))
+                    self._sender.commit()
+                    return
+                except psycopg2.OperationalError:
+                    # Połączenie mogło zostać zerwane - jedna ponowna próba z nowym połączeniem
+                    self._sender.close()
+                    self._sender = None
+                    if attempt:
+                        raise
+
+    async def _publish(self, pg_channel, data):
+        text = json.dumps(data)
+        if len(text) <= NOTIFY_CHUNK_SIZE:
+            payloads = [text]
+        else:
+            # Części jednej transakcji dostarczane są razem i w kolejności wysłania
+            message_id = uuid.uuid4().hex[:12]
+            parts = [text[i:i + NOTIFY_CHUNK_SIZE] for i in range(0, len(text), NOTIFY_CHUNK_SIZE)]
+            payloads = [f'#{message_id}:{index}:{len(parts)}:{part}' for index, part in enumerate(parts)]
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._notify, pg_channel, payloads)
+
+    # Nasłuchiwanie
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._listener is not None and not self._listener.done() and self._listener_loop is loop:
+            return
+        if self._listener is not None and not self._listener.done() and not self._listener_loop.is_closed():
+            self._listener_loop.call_soon_threadsafe(self._listener.cancel)
+        self._listener = loop.create_task(self._listen())
+        self._listener_loop = loop
+
+    async def _listen(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            conn = None
+            try:
+                conn = await loop.run_in_executor(None, self._connect)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    for pg_channel in (self._pg_channel(), self._pg_channel(self.layer_id)):
+                        cursor.execute(sql.SQL('LISTEN {}').format(sql.Identifier(pg_channel)))
+                ready = asyncio.Event()
+                loop.add_reader(conn.fileno(), ready.set)
+                try:
+                    while True:
+                        await ready.wait()
+                        ready.clear()
+                        conn.poll()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            try:
+                                self._dispatch(notify.payload)
+                            except Exception:
+                                logger.exception('Invalid channel layer notification dropped.')
+                finally:
+                    loop.remove_reader(conn.fileno())
+            except asyncio.CancelledError:
+                raise
+            except psycopg2.Error:
+                logger.exception('Channel layer lost its PostgreSQL connection, reconnecting.')
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _dispatch(self, payload):
+        if payload.startswith('#'):
+            message_id, index, count, part = payload[1:].split(':', 3)
+            parts = self._chunks.setdefault(message_id, [])
+            parts.append(part)
+            if int(index) + 1 < int(count):
+                return
+            payload = ''.join(self._chunks.pop(message_id))
+        data = json.loads(payload)
+        if 'group' in data:
+            if data['origin'] == self.layer_id:
+                return
+            self._deliver_to_group(data['group'], data['message'])
+        elif data['channel'] in self.channels or '!' in data['channel']:
+            self._deliver(data['channel'], data['message'])
+
+    def _deliver(self, channel, message):
+        try:
+            self._put(channel, deepcopy(message))
+        except ChannelFull:
+            logger.warning(f'Channel {channel} is full, message dropped.')
+
+    def _deliver_to_group(self, group, message):
+        self._clean_expired()
+        for channel in list(self.groups.get(group, {})):
+            self._deliver(channel, message)
+
+    def _put(self, channel, message):
+        queue = self.channels.setdefault(channel, asyncio.Queue())
+        if queue.qsize() >= self.get_capacity(channel):
+            raise ChannelFull(channel)
+        queue.put_nowait((time.time() + self.expiry, message))
+
+    def _is_local(self, channel):
+        return '!' in channel and self.non_local_name(channel).endswith(f'.{self.layer_id}!')
+
+    def _owner(self, channel):
+        return self.non_local_name(channel)[:-1].rsplit('.', 1)[-1]
+
+    # API warstwy kanałów
+
+    async def send(self, channel, message):
+        """
+               Wysyła wiadomość do kanału w tym lub innym procesie.
+
+               Argumenty:
+                   channel (str): Nazwa kanału.
+                   message (dict): Wiadomość.
+        """
+        assert isinstance(message, dict), 'message is not a dict'
+        assert self.valid_channel_name(channel), 'Channel name not valid'
+        if self._is_local(channel):
+            await super().send(channel, message)
+        elif '!' in channel:
+            await self._publish(self._pg_channel(self._owner(channel)), {'channel': channel, 'message': message})
+        else:
+            await self._publish(self._pg_channel(), {'channel': channel, 'message': message})
+
+    async def receive(self, channel):
+        """
+               Odbiera wiadomość z kanału tego procesu.
+
+               Argumenty:
+                   channel (str): Nazwa kanału.
+
+               Zwraca:
+                   dict: Odebrana wiadomość.
+        """
+        self._ensure_listener()
+        return await super().receive(channel)
+
+    async def new_channel(self, prefix='specific'):
+        """
+               Zwraca nazwę nowego kanału tego procesu.
+
+               Argumenty:
+                   prefix (str): Przedrostek nazwy kanału.
+
+               Zwraca:
+                   str: Nazwa kanału zawierająca identyfikator procesu.
+        """
+        self._ensure_listener()
+        return f'{prefix}.{self.layer_id}!{uuid.uuid4().hex[:12]}'
+
+    async def group_add(self, group, channel):
+        """
+               Dodaje kanał tego procesu do grupy.
+
+               Argumenty:
+                   group (str): Nazwa grupy.
+                   channel (str): Nazwa kanału.
+        """
+        self._ensure_listener()
+        await super().group_add(group, channel)
+
+    async def group_send(self, group, message):
+        """
+               Wysyła wiadomość do członków grupy we wszystkich procesach.
+
+               Argumenty:
+                   group (str): Nazwa grupy.
+                   message (dict): Wiadomość.
+        """
+        await super().group_send(group, message)
+        await self._publish(self._pg_channel(), {'group': group, 'message': message, 'origin': self.layer_id})
+
+    async def close(self):
+        """
+               Zamyka połączenia z bazą danych.
+        """
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.done():
+            listener.cancel()
+            if self._listener_loop is asyncio.get_running_loop():
+                try:
+                    await listener
+                except asyncio.CancelledError:
+                    pass
+        with self._sender_lock:
+            if self._sender is not None:
+                self._sender.close()
+                self._sender = None
@@ -0,0 +1,97 @@
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+
+GROUP = 'benchmark'
+
+
+def _worker(messages, ready, results, timeout):
+    # Każdy proces tworzy własną instancję warstwy kanałów, tak jak osobny proces ASGI
+    from channels.layers import channel_layers
+
+    async def run():
+        layer = channel_layers.make_backend('default')
+        channel = await layer.new_channel()
+        await layer.group_add(GROUP, channel)
+        # Czas na nawiązanie nasłuchiwania przed rozpoczęciem wysyłania
+        await asyncio.sleep(0.5)
+        ready.put(True)
+        latencies = []
+        last = None
+        try:
+            for _ in range(messages):
+                message = await asyncio.wait_for(layer.receive(channel), timeout)
+                last = time.time()
+                latencies.append(last - message['sent'])
+        except asyncio.TimeoutError:
+            pass
+        await layer.close()
+        return latencies, last
+
+    results.put(asyncio.run(run()))
+
+
+class Command(BaseCommand):
+    """
+        Polecenie mierzące opóźnienie i przepustowość warstwy kanałów między procesami.
+
+        Uruchamia zadaną liczbę procesów, z których każdy dołącza do wspólnej grupy, a następnie
+        wysyła do grupy wiadomości z procesu głównego. Raportuje opóźnienie dostarczenia
+        (mediana, p95, p99), liczbę dostarczonych wiadomości oraz przepustowość.
+    """
+    help = 'Measures cross-process channel layer delivery latency and throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help='Worker counts to test.')
+        parser.add_argument('--messages', type=int, default=1000, help='Group messages to send.')
+        parser.add_argument('--timeout', type=float, default=5.0, help='Seconds to wait for a message.')
+
+    def handle(self, *args, **options):
+        if get_channel_layer() is None:
+            raise CommandError('No channel layer is configured.')
+        context = multiprocessing.get_context('fork')
+        for workers in options['workers']:
+            self.benchmark(context, workers, options['messages'], options['timeout'])
+
+    def benchmark(self, context, workers, messages, timeout):
+        ready, results = context.Queue(), context.Queue()
+        processes = [context.Process(target=_worker, args=(messages, ready, results, timeout))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=30)
+
+        async def send():
+            layer = get_channel_layer()
+            start = time.time()
+            for i in range(messages):
+                await layer.group_send(GROUP, {'type': 'benchmark', 'sent': time.time(), 'n': i})
+            await layer.close()
+            return start
+
+        start = asyncio.run(send())
+        latencies, finished = [], start
+        for _ in processes:
+            worker_latencies, last = results.get()
+            latencies.extend(worker_latencies)
+            finished = max(finished, last or start)
+        for process in processes:
+            process.join()
+
+        expected = workers * messages
+        if not latencies:
+            self.stdout.write(f'{workers:>3} workers: no messages delivered')
+            return
+        latencies.sort()
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+        self.stdout.write(
+            f'{workers:>3} workers: delivered {len(latencies)}/{expected}, '
+            f'latency p50 {statistics.median(latencies) * 1000:.2f} ms, '
+            f'p95 {percentile(0.95):.2f} ms, p99 {percentile(0.99):.2f} ms, '
+            f'{len(latencies) / (finished - start):.0f} deliveries/s'
+        )
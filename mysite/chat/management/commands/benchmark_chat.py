@@ -0,0 +1,67 @@
+import asyncio
+import json
+import time
+import uuid
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from chat.buffer import message_buffer
+from chat.consumers import ChatConsumer
+from chat.models import Thread
+
+
+class Command(BaseCommand):
+    """
+        Polecenie mierzące przepustowość konsumera czatu (wiadomości na sekundę w jednym procesie).
+
+        Tworzy dwóch tymczasowych użytkowników i wątek, wysyła wiadomości przez jedno połączenie
+        WebSocket, czeka na ich dostarczenie z powrotem do nadawcy, a na końcu usuwa utworzone dane.
+    """
+    help = 'Measures ChatConsumer throughput (messages per second per worker).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000, help='Number of messages to send.')
+        parser.add_argument('--warmup', type=int, default=50, help='Messages sent before measuring.')
+        parser.add_argument('--write-behind', action='store_true', help='Batch inserts (CHAT_WRITE_BEHIND).')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:8]
+        sender = User.objects.create_user(username=f'bench_a_{suffix}', first_name='Bench', last_name='A')
+        receiver = User.objects.create_user(username=f'bench_b_{suffix}', first_name='Bench', last_name='B')
+        thread = Thread.objects.create(first_person=sender, second_person=receiver)
+        try:
+            with override_settings(CHAT_WRITE_BEHIND=options['write_behind']):
+                elapsed = asyncio.run(self.run(sender, receiver, thread, options['messages'], options['warmup']))
+            message_buffer.flush_sync()
+        finally:
+            User.objects.filter(pk__in=[sender.pk, receiver.pk]).delete()
+        rate = options['messages'] / elapsed
+        self.stdout.write(f'{options["messages"]} messages in {elapsed:.3f}s: {rate:.0f} msg/s per worker')
+
+    async def run(self, sender, receiver, thread, count, warmup):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), '/chat/')
+        communicator.scope['user'] = sender
+        connected, _ = await communicator.connect()
+        if not connected:
+            raise RuntimeError('Consumer refused the connection.')
+        frame = json.dumps({
+            'message': 'benchmark',
+            'send_by': sender.id,
+            'send_to': receiver.id,
+            'thread_id': thread.id,
+        })
+
+        async def send(n):
+            for _ in range(n):
+                await communicator.send_to(text_data=frame)
+                await communicator.receive_from(timeout=5)
+
+        await send(warmup)
+        start = time.perf_counter()
+        await send(count)
+        elapsed = time.perf_counter() - start
+        await communicator.disconnect()
+        return elapsed
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['thread', 'timestamp', 'id'], name='chat_message_history_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def set_last_messages(apps, schema_editor):
+    # Ostatnia wiadomość i czas ostatniej aktywności istniejących wątków
+    Thread = apps.get_model('chat', 'Thread')
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    for thread in Thread.objects.all().iterator():
+        last_message = ChatMessage.objects.filter(thread=thread).order_by('-timestamp', '-id').first()
+        if last_message is not None:
+            Thread.objects.filter(pk=thread.pk).update(last_message=last_message, updated=last_message.timestamp)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_chatmessage_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='first_person_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.chatmessage'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='second_person_unread',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['first_person', '-updated'], name='chat_thread_first_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['second_person', '-updated'], name='chat_thread_second_inbox_idx'),
+        ),
+        migrations.RunPython(set_last_messages, migrations.RunPython.noop),
+    ]
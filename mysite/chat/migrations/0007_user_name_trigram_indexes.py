@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Indeksy trigramowe dla wyszukiwania użytkowników (first_name__icontains / last_name__icontains).
+# PostgreSQL porównuje UPPER("kolumna"::text) LIKE UPPER(...), dlatego indeks obejmuje to samo wyrażenie.
+TRIGRAM_INDEXES = (
+    ('chat_user_first_name_trgm', 'first_name'),
+    ('chat_user_last_name_trgm', 'last_name'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON auth_user USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('chat', '0006_thread_inbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,8 +1,10 @@
+from asgiref.sync import sync_to_async
 from django.db import models
 from users.models import Profile
 from django.contrib.auth.models import User
-from datetime import datetime, timedelta
-from django.db.models import Q
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.db.models import Q, F, Case, When
 from django.core.files.storage import default_storage
 
 class ThreadManager(models.Manager):
@@ -11,6 +13,8 @@ class ThreadManager(models.Manager):
 
        Metody:
            by_user(self, **kwargs): Zwraca wątki czatu, w których użytkownik jest uczestnikiem.
+           inbox(self, user): Zwraca wątki użytkownika uporządkowane według ostatniej aktywności.
+           mark_read(self, thread, user): Zeruje licznik nieprzeczytanych wiadomości użytkownika w wątku.
 
     """
     def by_user(self, **kwargs):
@@ -35,6 +39,43 @@ class ThreadManager(models.Manager):
         q = self.get_queryset().filter(lookup).distinct()
         return q
 
+    def inbox(self, user):
+        """
+               Zwraca wątki użytkownika uporządkowane według ostatniej aktywności.
+
+               Argumenty:
+                   user (User): Użytkownik, którego wątki są zwracane.
+
+               Zwraca:
+                   QuerySet: Wątki z uczestnikami, ostatnią wiadomością oraz atrybutem 'unread'
+                   (liczba nieprzeczytanych wiadomości użytkownika), pobierane jednym zapytaniem.
+        """
+        lookup = Q(first_person=user) | Q(second_person=user)
+        return (self.get_queryset().filter(lookup)
+                .select_related('first_person__profile', 'second_person__profile', 'last_message')
+                .annotate(unread=Case(When(first_person=user, then=F('first_person_unread')),
+                                      default=F('second_person_unread')))
+                .order_by('-updated', '-id'))
+
+    def mark_read(self, thread, user):
+        """
+               Zeruje licznik nieprzeczytanych wiadomości użytkownika w wątku.
+
+               Argumenty:
+                   thread (Thread): Wątek czatu.
+                   user (User): Uczestnik wątku.
+        """
+        self.get_queryset().filter(pk=thread.pk).update(**self._read_counters(user))
+
+    def _read_counters(self, user):
+        counter = models.PositiveIntegerField()
+        return {
+            'first_person_unread': Case(When(first_person=user, then=0), default=F('first_person_unread'),
+                                        output_field=counter),
+            'second_person_unread': Case(When(second_person=user, then=0), default=F('second_person_unread'),
+                                         output_field=counter),
+        }
+
 class Thread(models.Model):
     """
        Model reprezentujący wątek czatu między dwoma użytkownikami.
@@ -42,21 +83,183 @@ class Thread(models.Model):
        Atrybuty:
            first_person (ForeignKey): Pierwszy użytkownik w wątku.
            second_person (ForeignKey): Drugi użytkownik w wątku.
-           updated (DateTimeField): Data i czas ostatniej aktualizacji wątku.
+           updated (DateTimeField): Data i czas ostatniej aktualizacji wątku (ostatniej wiadomości).
            timestamp (DateTimeField): Data i czas utworzenia wątku.
+           last_message (ForeignKey): Ostatnia wiadomość w wątku.
+           first_person_unread (PositiveIntegerField): Liczba wiadomości nieprzeczytanych przez pierwszego użytkownika.
+           second_person_unread (PositiveIntegerField): Liczba wiadomości nieprzeczytanych przez drugiego użytkownika.
            objects (ThreadManager): Menedżer dostępu do danych wątków.
 
        Meta:
            unique_together (tuple): Unikalna para użytkowników w wątku.
+           indexes (list): Indeksy skrzynki odbiorczej (uczestnik, ostatnia aktywność).
 
     """
     first_person = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='thread_first_person')
     second_person = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='thread_second_person')
     updated = models.DateTimeField(auto_now=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    last_message = models.ForeignKey('ChatMessage', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    first_person_unread = models.PositiveIntegerField(default=0)
+    second_person_unread = models.PositiveIntegerField(default=0)
     objects = ThreadManager()
     class Meta:
         unique_together = ('first_person', 'second_person')
+        indexes = [
+            models.Index(fields=['first_person', '-updated'], name='chat_thread_first_inbox_idx'),
+            models.Index(fields=['second_person', '-updated'], name='chat_thread_second_inbox_idx'),
+        ]
+
+
+# Liczba wiadomości zwracanych na jedną stronę historii wątku
+HISTORY_PAGE_SIZE = 30
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Największy identyfikator wiadomości (kolumna bigint)
+MAX_MESSAGE_ID = 2 ** 63 - 1
+
+
+def encode_cursor(message):
+    """
+        Zwraca kursor wskazujący pozycję wiadomości w historii wątku.
+
+        Argumenty:
+            message (ChatMessage): Najstarsza wiadomość zwróconej strony.
+
+        Zwraca:
+            str: Kursor w postaci "<znacznik czasu w mikrosekundach>-<id>".
+    """
+    delta = message.timestamp - _EPOCH
+    microseconds = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return f'{microseconds}-{message.id}'
+
+
+def decode_cursor(cursor):
+    """
+        Odczytuje kursor utworzony przez encode_cursor.
+
+        Argumenty:
+            cursor (str): Kursor.
+
+        Zwraca:
+            tuple: Znacznik czasu i identyfikator wiadomości.
+
+        Wyjątki:
+            ValueError: Jeśli kursor jest niepoprawny, w tym gdy znacznik czasu wykracza poza zakres
+            dat lub identyfikator poza zakres kolumny bigint.
+    """
+    microseconds, message_id = cursor.split('-')
+    microseconds, message_id = int(microseconds), int(message_id)
+    if not 0 < message_id <= MAX_MESSAGE_ID:
+        raise ValueError(f'Message id out of range: {message_id}')
+    try:
+        return _EPOCH + timedelta(microseconds=microseconds), message_id
+    except OverflowError:
+        raise ValueError(f'Timestamp out of range: {microseconds}') from None
+
+
+class ChatMessageManager(models.Manager):
+    """
+       Manager wiadomości czatu odpowiedzialny za pobieranie historii wątków.
+
+       Metody:
+           post(self, thread_id, user_id, message): Zapisuje wiadomość i aktualizuje wątek.
+           apost(self, thread_id, user_id, message): Asynchroniczny odpowiednik post.
+           post_many(self, messages): Zapisuje wiadomości partią i aktualizuje ich wątki.
+           history(self, thread, before=None, limit=HISTORY_PAGE_SIZE): Zwraca stronę historii wątku.
+
+    """
+    @transaction.atomic
+    def post(self, thread_id, user_id, message):
+        """
+               Zapisuje wiadomość i aktualizuje wątek w jednej transakcji.
+
+               Argumenty:
+                   thread_id (int): Identyfikator wątku.
+                   user_id (int): Identyfikator nadawcy.
+                   message (str): Treść wiadomości.
+
+               Zwraca:
+                   ChatMessage: Zapisana wiadomość.
+        """
+        chat_message = self.create(thread_id=thread_id, user_id=user_id, message=message)
+        self._update_threads([chat_message])
+        return chat_message
+
+    async def apost(self, thread_id, user_id, message):
+        return await sync_to_async(self.post)(thread_id, user_id, message)
+
+    @transaction.atomic
+    def post_many(self, messages):
+        """
+               Zapisuje wiele wiadomości jednym zapytaniem i aktualizuje ich wątki w jednej transakcji.
+
+               Argumenty:
+                   messages (list): Niezapisane wiadomości (ChatMessage).
+
+               Zwraca:
+                   list: Zapisane wiadomości.
+        """
+        messages = self.bulk_create(messages)
+        self._update_threads(messages)
+        return messages
+
+    def _update_threads(self, messages):
+        # Dla każdego wątku: ostatnia wiadomość oraz liczba wiadomości od każdego nadawcy
+        last, counts = {}, {}
+        for chat_message in messages:
+            last[chat_message.thread_id] = chat_message
+            key = (chat_message.thread_id, chat_message.user_id)
+            counts[key] = counts.get(key, 0) + 1
+        for thread_id, chat_message in last.items():
+            senders = {user_id: n for (t, user_id), n in counts.items() if t == thread_id}
+            total = sum(senders.values())
+            # Licznik uczestnika zwiększany jest o liczbę wiadomości wysłanych przez innych
+            unread = lambda field: Case(
+                *[When(**{field: user_id}, then=F(f'{field}_unread') + total - n) for user_id, n in senders.items()],
+                default=F(f'{field}_unread') + total,
+                output_field=models.PositiveIntegerField(),
+            )
+            Thread.objects.filter(pk=thread_id).update(
+                last_message=chat_message,
+                updated=chat_message.timestamp,
+                first_person_unread=unread('first_person'),
+                second_person_unread=unread('second_person'),
+            )
+
+    def history(self, thread, before=None, limit=HISTORY_PAGE_SIZE):
+        """
+               Zwraca stronę historii wątku, od najnowszych wiadomości.
+
+               Argumenty:
+                   thread (Thread): Wątek czatu.
+                   before (str): Kursor strony poprzedniej (encode_cursor) lub None dla najnowszych wiadomości.
+                   limit (int): Maksymalna liczba wiadomości.
+
+               Zwraca:
+                   tuple: Lista wiadomości w kolejności chronologicznej oraz kursor starszych
+                   wiadomości (None, jeśli starszych wiadomości nie ma).
+
+               Opis działania:
+                   Stronicowanie odbywa się według klucza (timestamp, id), a nie przesunięcia (OFFSET),
+                   dzięki czemu koszt pobrania strony nie zależy od jej numeru. Zapytanie korzysta
+                   z indeksu złożonego (thread, timestamp, id).
+        """
+        return self._history_page(list(self._history_query(thread, before)[:limit + 1]), limit)
+
+    def _history_query(self, thread, before):
+        q = self.get_queryset().filter(thread=thread).select_related('user__profile')
+        if before:
+            timestamp, message_id = decode_cursor(before)
+            q = q.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id))
+        return q.order_by('-timestamp', '-id')
+
+    def _history_page(self, page, limit):
+        cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        page = page[:limit]
+        page.reverse()
+        return page, cursor
 
 
 class ChatMessage(models.Model):
@@ -68,9 +271,19 @@ class ChatMessage(models.Model):
             user (ForeignKey): Użytkownik, który wysłał tę wiadomość.
             message (TextField): Treść wiadomości.
             timestamp (DateTimeField): Data i czas wysłania wiadomości.
+            objects (ChatMessageManager): Menedżer dostępu do historii wiadomości.
+
+        Meta:
+            indexes (list): Indeks złożony (thread, timestamp, id) używany przy stronicowaniu historii.
 
     """
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, null=True, blank=True, related_name='chat_message_thread')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    timestamp = models.DateTimeField(auto_now_add=True)
+    objects = ChatMessageManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['thread', 'timestamp', 'id'], name='chat_message_history_idx'),
+        ]
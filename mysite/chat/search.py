@@ -0,0 +1,127 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+
+# Maksymalna liczba zwracanych użytkowników
+SEARCH_LIMIT = 10
+
+# Czas przechowywania wyników wyszukiwania w pamięci podręcznej (w sekundach)
+SEARCH_CACHE_TIMEOUT = 30
+
+SEARCH_VERSION_KEY = 'chat:search:version'
+
+
+def _version():
+    version = cache.get(SEARCH_VERSION_KEY)
+    if version is None:
+        cache.add(SEARCH_VERSION_KEY, 1, None)
+        version = cache.get(SEARCH_VERSION_KEY)
+    return version
+
+
+def invalidate_search():
+    """
+        Unieważnia zapamiętane wyniki wyszukiwania (np. po zmianie danych użytkownika).
+    """
+    try:
+        cache.incr(SEARCH_VERSION_KEY)
+    except ValueError:
+        cache.set(SEARCH_VERSION_KEY, 1, None)
+
+
+def _cache_key(version, query):
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+    return f'chat:search:{version}:{digest}'
+
+
+def _matches(item, query):
+    return query in item['first_name'].lower() or query in item['last_name'].lower()
+
+
+def _queryset(query, limit):
+    return (User.objects.filter(Q(first_name__icontains=query) | Q(last_name__icontains=query))
+            .select_related('profile')
+            .order_by('pk')[:limit + 1])
+
+
+def _results(users, limit):
+    results = [{
+        'pk': user.pk,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'avatar': user.profile.avatar_url
+    } for user in users]
+    return results[:limit], len(results) <= limit
+
+
+def _cached(query):
+    # Zwraca klucze zapytania i jego przedrostków oraz wynik wyznaczony z pamięci podręcznej (lub None)
+    version = _version()
+    keys = [_cache_key(version, query[:length]) for length in range(len(query), 0, -1)]
+    cached = cache.get_many(keys)
+    for length, key in zip(range(len(query), 0, -1), keys):
+        if key not in cached:
+            continue
+        results, complete = cached[key]
+        if length == len(query):
+            return keys, results
+        if complete:
+            results = [item for item in results if _matches(item, query)]
+            cache.set(keys[0], (results, True), SEARCH_CACHE_TIMEOUT)
+            return keys, results
+        break
+    return keys, None
+
+
+def search_users(query, limit=SEARCH_LIMIT):
+    """
+        Wyszukuje użytkowników, których imię lub nazwisko zawiera podany tekst.
+
+        Argumenty:
+            query (str): Wyszukiwany tekst.
+            limit (int): Maksymalna liczba wyników.
+
+        Zwraca:
+            list: Dane użytkowników (pk, imię, nazwisko, adres zdjęcia profilowego).
+
+        Opis działania:
+            Wyniki zapamiętywane są na SEARCH_CACHE_TIMEOUT sekund dla każdego zapytania.
+            Jeśli dla krótszego przedrostka zapytania zapamiętano już pełną listę wyników
+            (mniej niż limit), wynik jest wyznaczany z niej bez odpytywania bazy danych -
+            tak jest przy kolejnych znakach wpisywanych w pole wyszukiwania.
+            Na PostgreSQL zapytanie korzysta z indeksów trigramowych (pg_trgm) na imieniu
+            i nazwisku, a na pozostałych bazach danych ogranicza je limit wyników.
+    """
+    query = query.strip().lower()
+    if not query:
+        return []
+    keys, results = _cached(query)
+    if results is None:
+        results, complete = _results(_queryset(query, limit), limit)
+        cache.set(keys[0], (results, complete), SEARCH_CACHE_TIMEOUT)
+    return results
+
+
+async def asearch_users(query, limit=SEARCH_LIMIT):
+    """
+        Wyszukuje użytkowników w widoku asynchronicznym (zob. search_users).
+
+        Zwraca:
+            list: Dane użytkowników (pk, imię, nazwisko, adres zdjęcia profilowego).
+
+        Opis działania:
+            Odczyty pamięci podręcznej wykonywane są jednym przejściem do wątku (sync_to_async),
+            a zapis przez cache.aset, aby dostęp do warstwy L2 nie blokował pętli zdarzeń.
+    """
+    query = query.strip().lower()
+    if not query:
+        return []
+    keys, results = await sync_to_async(_cached)(query)
+    if results is None:
+        results, complete = _results([user async for user in _queryset(query, limit)], limit)
+        await cache.aset(keys[0], (results, complete), SEARCH_CACHE_TIMEOUT)
+    return results
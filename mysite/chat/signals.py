@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from users.models import Profile
+from .search import invalidate_search
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+def user_changed(sender, instance, **kwargs):
+    """
+        Unieważnia zapamiętane wyniki wyszukiwania użytkowników po zmianie danych użytkownika.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Model): Zapisany lub usunięty użytkownik albo profil.
+
+        Opis działania:
+            Zapis samej daty ostatniego logowania nie zmienia wyników wyszukiwania
+            i nie powoduje unieważnienia.
+    """
+    if kwargs.get('update_fields') == frozenset(['last_login']):
+        return
+    invalidate_search()
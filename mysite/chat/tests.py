@@ -1,9 +1,22 @@
-from django.test import TestCase, SimpleTestCase, RequestFactory, Client
+from django.test import TestCase, TransactionTestCase, SimpleTestCase, RequestFactory, Client, override_settings
 from django.contrib.auth.models import User
-from .models import Thread, ChatMessage
+from .models import Thread, ChatMessage, HISTORY_PAGE_SIZE
 from django.urls import reverse, resolve
 from .views import chat, create_thread, delete_thread, search_thread
 from django.contrib.messages.storage.fallback import FallbackStorage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mysite.queries import QueryBudgetMixin
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from .buffer import MessageBuffer, message_buffer
+from .search import search_users, SEARCH_LIMIT
+from django.core.cache import cache
+from .consumers import ChatConsumer
+from .layers import PostgresChannelLayer
+from unittest import skipUnless
+from unittest import mock
+import asyncio
 import json
 
 class ThreadModelTest(TestCase):
@@ -99,7 +112,7 @@ class TestUrls(SimpleTestCase):
         self.assertEqual(resolve(url).func, delete_thread)
 
 
-class TestChatViews(TestCase):
+class TestChatViews(QueryBudgetMixin, TestCase):
     """
         Testy jednostkowe dla widoków czatu.
 
@@ -108,6 +121,10 @@ class TestChatViews(TestCase):
             test_chat_view(self): Metoda testowa sprawdzająca widok czatu.
             test_create_thread_view(self): Metoda testowa sprawdzająca widok tworzenia wątku czatu.
             test_delete_thread_view(self): Metoda testowa sprawdzająca widok usuwania wątku czatu.
+            test_chat_view_renders_newest_messages(self): Metoda testowa sprawdzająca wyświetlanie tylko najnowszych wiadomości.
+            test_thread_messages_pagination(self): Metoda testowa sprawdzająca stronicowanie historii wątku.
+            test_thread_messages_foreign_thread(self): Metoda testowa sprawdzająca brak dostępu do cudzego wątku.
+            test_thread_messages_cursor_out_of_range(self): Metoda testowa sprawdzająca kursor spoza zakresu.
 
     """
     def setUp(self):
@@ -123,7 +140,8 @@ class TestChatViews(TestCase):
                 Metoda testowa sprawdzająca widok czatu.
         """
         self.client.login(username='user1', password='password')
-        response = self.client.get(reverse('chat'))
+        with self.assertQueryBudget('chat'):
+            response = self.client.get(reverse('chat'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'chat/chat.html')
 
@@ -150,8 +168,155 @@ class TestChatViews(TestCase):
         # Sprawdzenie, czy wątek został usunięty
         thread_exists = Thread.objects.filter(pk=thread.pk).exists()
         self.assertFalse(thread_exists)
+    def create_messages(self, count):
+        thread = Thread.objects.create(first_person=self.user1, second_person=self.user2)
+        for i in range(count):
+            ChatMessage.objects.create(thread=thread, user=self.user1 if i % 2 else self.user2, message=f'message {i}')
+        return thread
 
-class SearchThreadTestCase(TestCase):
+    def test_chat_view_renders_newest_messages(self):
+        """
+                Metoda testowa sprawdzająca, czy widok czatu wyświetla tylko najnowsze wiadomości aktywnego wątku.
+        """
+        self.create_messages(HISTORY_PAGE_SIZE + 5)
+        self.client.login(username='user1', password='password')
+        with self.assertQueryBudget('chat'):
+            response = self.client.get(reverse('chat'))
+        self.assertEqual(len(response.context['active_messages']), HISTORY_PAGE_SIZE)
+        self.assertContains(response, f'message {HISTORY_PAGE_SIZE + 4}<')
+        self.assertNotContains(response, 'message 4<')
+        self.assertTrue(response.context['history_cursor'])
+
+    def test_thread_messages_pagination(self):
+        """
+                Metoda testowa sprawdzająca, czy kolejne strony historii obejmują wszystkie wiadomości bez powtórzeń.
+        """
+        count = HISTORY_PAGE_SIZE * 2 + 3
+        thread = self.create_messages(count)
+        self.client.login(username='user1', password='password')
+        url = reverse('thread_messages', kwargs={'thread_id': thread.pk})
+        received, cursor = [], None
+        while True:
+            with self.assertNumQueries(4), self.assertQueryBudget('thread_messages'):
+                data = self.client.get(url, {'before': cursor} if cursor else {}).json()
+            received = [item['message'] for item in data['messages']] + received
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(received, [f'message {i}' for i in range(count)])
+
+    def test_thread_messages_foreign_thread(self):
+        """
+                Metoda testowa sprawdzająca, czy historia cudzego wątku nie jest dostępna.
+        """
+        thread = self.create_messages(1)
+        User.objects.create_user(username='user3', password='password')
+        self.client.login(username='user3', password='password')
+        response = self.client.get(reverse('thread_messages', kwargs={'thread_id': thread.pk}))
+        self.assertEqual(response.status_code, 404)
+        self.client.login(username='user1', password='password')
+        response = self.client.get(reverse('thread_messages', kwargs={'thread_id': thread.pk}), {'before': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_thread_messages_cursor_out_of_range(self):
+        """
+                Metoda testowa sprawdzająca, czy kursor ze znacznikiem czasu lub identyfikatorem
+                spoza zakresu zwraca odpowiedź 400 zamiast błędu serwera.
+        """
+        thread = self.create_messages(1)
+        self.client.login(username='user1', password='password')
+        url = reverse('thread_messages', kwargs={'thread_id': thread.pk})
+        for cursor in ('99999999999999999999999-1', f'0-{2 ** 63}', '0-0', '0-x'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(url, {'before': cursor}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'before': f'0-{2 ** 63 - 1}'}).status_code, 200)
+
+
+class ThreadInboxTest(QueryBudgetMixin, TestCase):
+    """
+        Testy skrzynki odbiorczej czatu (ostatnia wiadomość, liczniki nieprzeczytanych wiadomości).
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca użytkowników i wątki dla testów.
+            test_post_updates_thread(self): Sprawdza aktualizację wątku po zapisaniu wiadomości.
+            test_post_many_updates_threads(self): Sprawdza aktualizację wątków po zapisaniu partii wiadomości.
+            test_inbox_ordered_by_activity(self): Sprawdza kolejność wątków i pobieranie ich jednym zapytaniem.
+            test_mark_thread_read_view(self): Sprawdza oznaczanie wątku jako przeczytanego.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca użytkowników i wątki dla testów.
+        """
+        self.user1 = User.objects.create_user(username='user1', password='password')
+        self.user2 = User.objects.create_user(username='user2', password='password')
+        self.user3 = User.objects.create_user(username='user3', password='password')
+        self.thread = Thread.objects.create(first_person=self.user1, second_person=self.user2)
+        self.other_thread = Thread.objects.create(first_person=self.user3, second_person=self.user1)
+
+    def test_post_updates_thread(self):
+        """
+                Sprawdza, czy zapis wiadomości ustawia ostatnią wiadomość i zwiększa licznik odbiorcy.
+        """
+        ChatMessage.objects.post(self.thread.id, self.user1.id, 'Hello')
+        message = ChatMessage.objects.post(self.thread.id, self.user1.id, 'How are you?')
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.last_message, message)
+        self.assertEqual(self.thread.updated, message.timestamp)
+        self.assertEqual(self.thread.first_person_unread, 0)
+        self.assertEqual(self.thread.second_person_unread, 2)
+
+    def test_post_many_updates_threads(self):
+        """
+                Sprawdza, czy partia wiadomości aktualizuje liczniki obu uczestników i kilku wątków.
+        """
+        ChatMessage.objects.post_many([
+            ChatMessage(thread=self.thread, user=self.user1, message='1'),
+            ChatMessage(thread=self.thread, user=self.user2, message='2'),
+            ChatMessage(thread=self.thread, user=self.user1, message='3'),
+            ChatMessage(thread=self.other_thread, user=self.user3, message='4'),
+        ])
+        self.thread.refresh_from_db()
+        self.other_thread.refresh_from_db()
+        self.assertEqual(self.thread.last_message.message, '3')
+        self.assertEqual((self.thread.first_person_unread, self.thread.second_person_unread), (1, 2))
+        self.assertEqual((self.other_thread.first_person_unread, self.other_thread.second_person_unread), (0, 1))
+
+    def test_inbox_ordered_by_activity(self):
+        """
+                Sprawdza, czy wątki są uporządkowane według ostatniej aktywności i pobierane jednym zapytaniem.
+        """
+        ChatMessage.objects.post(self.other_thread.id, self.user3.id, 'Old')
+        ChatMessage.objects.post(self.thread.id, self.user2.id, 'New')
+        with self.assertNumQueries(1):
+            threads = list(Thread.objects.inbox(self.user1))
+            self.assertEqual([thread.last_message.message for thread in threads], ['New', 'Old'])
+            self.assertEqual([thread.unread for thread in threads], [1, 1])
+            self.assertEqual(threads[1].first_person.profile.avatar_url, self.user3.profile.avatar_url)
+
+        self.client.login(username='user1', password='password')
+        response = self.client.get(reverse('chat'))
+        self.assertEqual(response.context['Threads'][0], self.thread)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.first_person_unread, 0)
+
+    def test_mark_thread_read_view(self):
+        """
+                Sprawdza, czy widok oznacza wątek jako przeczytany tylko dla uczestnika wątku.
+        """
+        ChatMessage.objects.post(self.thread.id, self.user1.id, 'Hello')
+        self.client.login(username='user3', password='password')
+        response = self.client.post(reverse('mark_thread_read', kwargs={'thread_id': self.thread.pk}))
+        self.assertEqual(response.status_code, 404)
+        self.client.login(username='user2', password='password')
+        with self.assertQueryBudget('mark_thread_read'):
+            response = self.client.post(reverse('mark_thread_read', kwargs={'thread_id': self.thread.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.second_person_unread, 0)
+
+
+class SearchThreadTestCase(QueryBudgetMixin, TestCase):
     """
         Testy jednostkowe dla wyszukiwania wątku.
 
@@ -161,6 +326,9 @@ class SearchThreadTestCase(TestCase):
             test_search_thread_results(self): Metoda testowa sprawdzająca wyniki wyszukiwania wątku.
             test_search_thread_no_results(self): Metoda testowa sprawdzająca brak wyników wyszukiwania wątku.
             test_search_thread_no_ajax(self): Metoda testowa sprawdzająca wyszukiwanie wątku bez użycia żądania AJAX.
+            test_search_users_limit(self): Metoda testowa sprawdzająca ograniczenie liczby wyników.
+            test_search_users_cached_per_prefix(self): Metoda testowa sprawdzająca wykorzystanie zapamiętanych wyników.
+            test_search_users_invalidated(self): Metoda testowa sprawdzająca unieważnienie wyników po zmianie użytkownika.
 
     """
 
@@ -168,6 +336,7 @@ class SearchThreadTestCase(TestCase):
         """
                 Metoda konfiguracyjna, tworząca klienta testowego i użytkownika dla testów.
         """
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(username='testuser', password='password123')
 
@@ -195,7 +364,8 @@ class SearchThreadTestCase(TestCase):
 
         # Zapytanie POST z danymi
         url = reverse('search')
-        response = self.client.post(url, {'users': 'Doe'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        with self.assertQueryBudget('search'):
+            response = self.client.post(url, {'users': 'Doe'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
 
         # Sprawdzenie odpowiedzi
         self.assertEqual(response.status_code, 200)
@@ -234,4 +404,330 @@ class SearchThreadTestCase(TestCase):
         # Sprawdzenie odpowiedzi
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['content-type'], 'application/json')
-        self.assertEqual(response.content.decode('utf-8'), '{}')
\ No newline at end of file
+        self.assertEqual(response.content.decode('utf-8'), '{}')
+
+    def test_search_users_limit(self):
+        """
+                Metoda testowa sprawdzająca, czy liczba wyników jest ograniczona, a profile pobierane jednym zapytaniem.
+        """
+        for i in range(SEARCH_LIMIT + 5):
+            User.objects.create(username=f'user{i}', first_name='Anna', last_name=f'Nowak{i}')
+        with self.assertNumQueries(1):
+            results = search_users('anna')
+        self.assertEqual(len(results), SEARCH_LIMIT)
+
+    def test_search_users_cached_per_prefix(self):
+        """
+                Metoda testowa sprawdzająca, czy dłuższe zapytanie korzysta z zapamiętanych wyników krótszego przedrostka.
+        """
+        User.objects.create(username='test1', first_name='John', last_name='Doe')
+        User.objects.create(username='test2', first_name='Jane', last_name='Doe')
+        self.assertEqual(len(search_users('Jo')), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(search_users('jo')), 1)
+            self.assertEqual([item['first_name'] for item in search_users('Joh')], ['John'])
+            self.assertEqual(search_users('Jox'), [])
+
+    def test_search_users_invalidated(self):
+        """
+                Metoda testowa sprawdzająca, czy zmiana danych użytkownika unieważnia wyniki, a logowanie nie.
+        """
+        self.assertEqual(search_users('Smith'), [])
+        self.client.login(username='testuser', password='password123')
+        with self.assertNumQueries(0):
+            search_users('Smith')
+        self.user.last_name = 'Smith'
+        self.user.save()
+        self.assertEqual(search_users('Smith')[0]['pk'], self.user.pk)
+
+# Testy konsumera korzystają z warstwy kanałów w pamięci, niezależnej od bazy danych
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ChatConsumerTest(TestCase):
+    """
+        Testy konsumera WebSocket czatu.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca użytkowników i wątek dla testów.
+            test_message_saved_without_reads(self): Sprawdza zapis wiadomości bez dodatkowych odczytów.
+            test_sender_taken_from_connection(self): Sprawdza, czy nadawca nie może zostać podmieniony.
+            test_foreign_thread_rejected(self): Sprawdza odrzucenie wiadomości do cudzego wątku.
+            test_thread_created_after_connect(self): Sprawdza obsługę wątku utworzonego po połączeniu.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca użytkowników i wątek dla testów.
+        """
+        self.user1 = User.objects.create_user(username='user1', first_name='Jan', password='password')
+        self.user2 = User.objects.create_user(username='user2', password='password')
+        self.user3 = User.objects.create_user(username='user3', password='password')
+        self.thread = Thread.objects.create(first_person=self.user1, second_person=self.user2)
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), '/chat/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    def frame(self, thread_id, message='Hello', **kwargs):
+        return json.dumps({'message': message, 'thread_id': str(thread_id), **kwargs})
+
+    async def send_messages(self, count):
+        sender = await self.connect(self.user1)
+        receiver = await self.connect(self.user2)
+        for _ in range(count):
+            await sender.send_to(text_data=self.frame(self.thread.id))
+            data = json.loads(await sender.receive_from())
+            self.assertEqual(json.loads(await receiver.receive_from())['message'], 'Hello')
+        await sender.disconnect()
+        await receiver.disconnect()
+        return data
+
+    def test_message_saved_without_reads(self):
+        """
+               Sprawdza, czy wiadomość jest zapisywana bez dodatkowych odczytów i trafia do obu uczestników.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            data = async_to_sync(self.send_messages)(5)
+        statements = [query['sql'].split()[0].upper() for query in queries]
+        # Dwa odczyty na każde połączenie (profil i wątki), a na wiadomość zapis i aktualizacja wątku
+        self.assertEqual(statements.count('SELECT'), 2 * 2)
+        self.assertEqual(statements.count('INSERT'), 5)
+        self.assertEqual(statements.count('UPDATE'), 5)
+        self.assertEqual(data['send_by'], self.user1.id)
+        self.assertEqual(data['user_data']['first_name'], 'Jan')
+        self.assertEqual(ChatMessage.objects.filter(thread=self.thread, user=self.user1).count(), 5)
+
+    async def test_sender_taken_from_connection(self):
+        """
+               Sprawdza, czy pole send_by przesłane przez klienta nie zmienia nadawcy.
+        """
+        sender = await self.connect(self.user1)
+        await sender.send_to(text_data=self.frame(self.thread.id, send_by=self.user2.id))
+        await sender.receive_from()
+        self.assertFalse(await ChatMessage.objects.filter(user=self.user2).aexists())
+        await sender.disconnect()
+
+    async def test_foreign_thread_rejected(self):
+        """
+               Sprawdza, czy wiadomość do wątku, do którego użytkownik nie należy, jest odrzucana.
+        """
+        intruder = await self.connect(self.user3)
+        await intruder.send_to(text_data=self.frame(self.thread.id))
+        self.assertTrue(await intruder.receive_nothing())
+        self.assertFalse(await ChatMessage.objects.aexists())
+        await intruder.disconnect()
+
+    async def test_thread_created_after_connect(self):
+        """
+               Sprawdza, czy wiadomość do wątku utworzonego po nawiązaniu połączenia jest dostarczana.
+        """
+        sender = await self.connect(self.user3)
+        thread = await Thread.objects.acreate(first_person=self.user1, second_person=self.user3)
+        await sender.send_to(text_data=self.frame(thread.id))
+        self.assertEqual(json.loads(await sender.receive_from())['thread_id'], thread.id)
+        await sender.disconnect()
+
+
+class MessageBufferTest(TestCase):
+    """
+        Testy bufora zapisu wiadomości czatu partiami.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca użytkowników i wątek dla testów.
+            test_flush_on_size(self): Sprawdza zapis partii po osiągnięciu limitu wiadomości.
+            test_flush_on_delay(self): Sprawdza zapis partii po upływie czasu.
+            test_flush_sync(self): Sprawdza zapis pozostałych wiadomości przy zamykaniu procesu.
+            test_consumer_uses_buffer(self): Sprawdza rozsyłanie wiadomości przed zapisem partii.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca użytkowników i wątek dla testów.
+        """
+        self.user1 = User.objects.create_user(username='user1', password='password')
+        self.user2 = User.objects.create_user(username='user2', password='password')
+        self.thread = Thread.objects.create(first_person=self.user1, second_person=self.user2)
+
+    def message(self, text='Hello'):
+        return ChatMessage(thread=self.thread, user=self.user1, message=text)
+
+    def test_flush_on_size(self):
+        """
+               Sprawdza, czy partia jest zapisywana jednym zapytaniem INSERT po osiągnięciu limitu wiadomości.
+        """
+        buffer = MessageBuffer(max_rows=3, max_delay=60)
+
+        async def add(count):
+            for i in range(count):
+                await buffer.add(self.message(str(i)))
+
+        with CaptureQueriesContext(connection) as queries:
+            async_to_sync(add)(3)
+        statements = [query['sql'].split()[0].upper() for query in queries]
+        self.assertEqual(statements.count('INSERT'), 1)
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(list(ChatMessage.objects.values_list('message', flat=True).order_by('id')), ['0', '1', '2'])
+
+    def test_flush_on_delay(self):
+        """
+               Sprawdza, czy partia jest zapisywana po upływie max_delay.
+        """
+        buffer = MessageBuffer(max_rows=100, max_delay=0.01)
+
+        async def add():
+            await buffer.add(self.message())
+            self.assertEqual(len(buffer), 1)
+            await asyncio.sleep(0.05)
+
+        async_to_sync(add)()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(ChatMessage.objects.count(), 1)
+
+    def test_flush_sync(self):
+        """
+               Sprawdza, czy wiadomości pozostałe w buforze są zapisywane przy zamykaniu procesu.
+        """
+        buffer = MessageBuffer(max_rows=100, max_delay=60)
+        async_to_sync(buffer.add)(self.message())
+        self.assertEqual(ChatMessage.objects.count(), 0)
+        buffer.flush_sync()
+        self.assertEqual(ChatMessage.objects.count(), 1)
+
+    @override_settings(CHAT_WRITE_BEHIND=True, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+    def test_consumer_uses_buffer(self):
+        """
+               Sprawdza, czy przy włączonym buforze wiadomość jest rozsyłana przed zapisem.
+        """
+        async def send():
+            communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), '/chat/')
+            communicator.scope['user'] = self.user1
+            await communicator.connect()
+            await communicator.send_to(text_data=json.dumps({'message': 'Hello', 'thread_id': self.thread.id}))
+            data = json.loads(await communicator.receive_from())
+            await communicator.disconnect()
+            return data
+
+        with mock.patch.object(message_buffer, 'max_delay', 60):
+            self.assertEqual(async_to_sync(send)()['message'], 'Hello')
+            self.assertEqual(ChatMessage.objects.count(), 0)
+            message_buffer.flush_sync()
+        self.assertEqual(ChatMessage.objects.filter(user=self.user1).count(), 1)
+
+
+
+class MessageBufferDeletedThreadTest(TransactionTestCase):
+    """
+        Testy zapisu partii wiadomości, gdy wątek usunięto przed zapisem.
+
+        Ograniczenia kluczy obcych sprawdzane są przy zatwierdzaniu transakcji, dlatego testy
+        nie są wykonywane wewnątrz transakcji testu.
+
+        Metody:
+            test_deleted_thread_drops_only_its_messages(self): Sprawdza zapis wiadomości pozostałych wątków.
+
+    """
+    def test_deleted_thread_drops_only_its_messages(self):
+        """
+               Sprawdza, czy po usunięciu wątku z buforowanymi wiadomościami tracone są tylko
+               jego wiadomości, a wiadomości innych wątków są zapisywane.
+        """
+        user1 = User.objects.create_user(username='user1', password='password')
+        user2 = User.objects.create_user(username='user2', password='password')
+        user3 = User.objects.create_user(username='user3', password='password')
+        kept = Thread.objects.create(first_person=user1, second_person=user2)
+        deleted = Thread.objects.create(first_person=user1, second_person=user3)
+        buffer = MessageBuffer(max_rows=100, max_delay=60)
+
+        async def add():
+            for thread, text in ((kept, 'first'), (deleted, 'lost'), (kept, 'second')):
+                await buffer.add(ChatMessage(thread_id=thread.pk, user_id=user1.pk, message=text))
+
+        async_to_sync(add)()
+        deleted.delete()
+        with self.assertLogs('chat.buffer', 'WARNING') as logs:
+            buffer.flush_sync()
+        self.assertIn('Dropped 1 buffered chat messages', logs.output[0])
+        self.assertEqual(list(ChatMessage.objects.values_list('message', flat=True).order_by('id')),
+                         ['first', 'second'])
+        kept.refresh_from_db()
+        self.assertEqual(kept.last_message.message, 'second')
+        self.assertEqual(kept.second_person_unread, 2)
+
+@skipUnless(connection.vendor == 'postgresql', 'LISTEN/NOTIFY requires PostgreSQL')
+class PostgresChannelLayerTest(TestCase):
+    """
+        Testy warstwy kanałów opartej na PostgreSQL LISTEN/NOTIFY.
+
+        Każda instancja warstwy odpowiada osobnemu procesowi ASGI.
+
+        Metody:
+            test_group_send_between_layers(self): Sprawdza dostarczanie wiadomości grupy do innego procesu.
+            test_send_to_other_layer_channel(self): Sprawdza wysyłanie długiej wiadomości do kanału innego procesu.
+            test_group_discard(self): Sprawdza, czy kanał usunięty z grupy nie otrzymuje wiadomości.
+
+    """
+    async def layers(self):
+        first, second = PostgresChannelLayer(prefix='test_channels'), PostgresChannelLayer(prefix='test_channels')
+        first_channel, second_channel = await first.new_channel(), await second.new_channel()
+        await first.group_add('room', first_channel)
+        await second.group_add('room', second_channel)
+        # Czas na nawiązanie nasłuchiwania
+        await asyncio.sleep(0.5)
+        return first, second, first_channel, second_channel
+
+    async def close(self, *layers):
+        for layer in layers:
+            await layer.close()
+
+    def test_group_send_between_layers(self):
+        """
+               Sprawdza, czy wiadomość grupy trafia do członków w obu procesach dokładnie raz.
+        """
+        async def run():
+            first, second, first_channel, second_channel = await self.layers()
+            await first.group_send('room', {'type': 'chat_message', 'text': 'Hello'})
+            received = [await asyncio.wait_for(first.receive(first_channel), 5),
+                        await asyncio.wait_for(second.receive(second_channel), 5)]
+            await asyncio.sleep(0.2)
+            duplicates = len(first.channels) + len(second.channels)
+            await self.close(first, second)
+            return received, duplicates
+
+        received, duplicates = async_to_sync(run)()
+        self.assertEqual([message['text'] for message in received], ['Hello', 'Hello'])
+        self.assertEqual(duplicates, 0)
+
+    def test_send_to_other_layer_channel(self):
+        """
+               Sprawdza, czy wiadomość dłuższa niż limit NOTIFY trafia do kanału innego procesu.
+        """
+        async def run():
+            first, second, first_channel, second_channel = await self.layers()
+            await first.send(second_channel, {'type': 'chat_message', 'text': 'x' * 20000})
+            message = await asyncio.wait_for(second.receive(second_channel), 5)
+            await self.close(first, second)
+            return message
+
+        self.assertEqual(len(async_to_sync(run)()['text']), 20000)
+
+    def test_group_discard(self):
+        """
+               Sprawdza, czy kanał usunięty z grupy nie otrzymuje wiadomości.
+        """
+        async def run():
+            first, second, first_channel, second_channel = await self.layers()
+            await second.group_discard('room', second_channel)
+            await first.group_send('room', {'type': 'chat_message', 'text': 'Hello'})
+            await asyncio.wait_for(first.receive(first_channel), 5)
+            await asyncio.sleep(0.2)
+            pending = len(second.channels)
+            await self.close(first, second)
+            return pending
+
+        self.assertEqual(async_to_sync(run)(), 0)
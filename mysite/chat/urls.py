@@ -11,6 +11,12 @@ urlpatterns = [
     # Ścieżka do tworzenia nowego wątku czatu z określonym użytkownikiem
     path("chat/create_thread/<int:pk>/", views.create_thread, name="create_thread_chat"),
 
+    # Ścieżka do stronicowanej historii wątku czatu
+    path('chat/thread/<int:thread_id>/messages/', views.thread_messages, name='thread_messages'),
+
+    # Ścieżka do oznaczania wątku czatu jako przeczytanego
+    path('chat/thread/<int:thread_id>/read/', views.mark_thread_read, name='mark_thread_read'),
+
     # Ścieżka do usuwania wątku czatu
     path('chat/remove_thread/<int:thread_id>/', views.delete_thread, name='delete_thread'),
 ]
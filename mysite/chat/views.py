@@ -1,7 +1,11 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.core.exceptions import BadRequest
+from django.http import JsonResponse, Http404
 from django.contrib.auth.decorators import login_required
-from chat.models import Thread
+from django.views.decorators.http import require_POST
+from chat.models import Thread, ChatMessage
+from chat.search import asearch_users
+from users.roles import async_login_required
 from django.views.generic import ListView
 from django.contrib.auth.models import User
 from django.db.models import Q
@@ -22,10 +26,13 @@ def chat(request):
            HttpResponse: Odpowiedź HTTP zawierająca panel czatu.
 
        Opis działania:
-           Ten widok pobiera wątki czatu dla zalogowanego użytkownika, uporządkowane
-           według czasu dodania. Dodatkowo pobiera listę wszystkich użytkowników.
-           Następnie przekazuje te dane do szablonu 'chat/chat.html', gdzie zostaną
-           wyświetlone.
+           Ten widok pobiera wątki czatu dla zalogowanego użytkownika jednym zapytaniem
+           (Thread.objects.inbox), uporządkowane według ostatniej aktywności, wraz z danymi
+           uczestników, ostatnią wiadomością i liczbą nieprzeczytanych wiadomości. Wiadomości
+           wyświetlane są tylko dla aktywnego (pierwszego) wątku - najnowsze HISTORY_PAGE_SIZE
+           wiadomości, a wątek oznaczany jest jako przeczytany.
+           Starsze wiadomości oraz wiadomości pozostałych wątków pobierane są przez widok
+           thread_messages. Dane przekazywane są do szablonu 'chat/chat.html'.
 
        Wyjątki:
            None
@@ -35,12 +42,88 @@ def chat(request):
            # path('czat/', views.chat, name='czat'),
 
        """
-    threads = Thread.objects.by_user(user=request.user).prefetch_related('chat_message_thread').order_by('timestamp')
-    users = User.objects.all()
-    context = {'Threads': threads, 'Users': users}
+    threads = list(Thread.objects.inbox(request.user))
+    context = {'Threads': threads}
+    if threads:
+        messages_page, cursor = ChatMessage.objects.history(threads[0])
+        if threads[0].unread:
+            Thread.objects.mark_read(threads[0], request.user)
+            threads[0].unread = 0
+        context.update({
+            'active_thread_id': threads[0].id,
+            'active_messages': messages_page,
+            'history_cursor': cursor,
+        })
 
     return render(request, 'chat/chat.html', context)
 
+@login_required
+def thread_messages(request, thread_id):
+    """
+       Widok zwracający stronę historii wątku czatu w formacie JSON.
+
+       Wymagane uprawnienia:
+           - Użytkownik musi być zalogowany i być uczestnikiem wątku.
+
+       Argumenty:
+           request (HttpRequest): Obiekt żądania HTTP. Parametr GET 'before' zawiera
+               kursor zwrócony przez poprzednie wywołanie.
+           thread_id (int): Identyfikator wątku czatu.
+
+       Zwraca:
+           JsonResponse: Wiadomości w kolejności chronologicznej ('messages') oraz kursor
+           starszych wiadomości ('next'), równy null, gdy starszych wiadomości nie ma.
+
+       Wyjątki:
+           Http404: Jeśli wątek nie istnieje lub użytkownik do niego nie należy.
+           BadRequest: Jeśli kursor jest niepoprawny (odpowiedź 400).
+
+       Przykład użycia:
+           # Przykład użycia widoku w pliku JavaScript:
+           # fetch('/chat/thread/1/messages/?before=' + cursor)
+
+       """
+    thread = get_object_or_404(Thread.objects.by_user(user=request.user), pk=thread_id)
+    try:
+        messages_page, cursor = ChatMessage.objects.history(thread, before=request.GET.get('before'))
+    except (ValueError, OverflowError):
+        raise BadRequest('Invalid cursor')
+    data = [{
+        'id': message.id,
+        'message': message.message,
+        'send_by': message.user_id,
+        'user_data': {
+            'first_name': message.user.first_name,
+            'last_name': message.user.last_name,
+            'profile_picture': message.user.profile.avatar_url
+        }
+    } for message in messages_page]
+    return JsonResponse({'messages': data, 'next': cursor})
+
+@login_required
+@require_POST
+def mark_thread_read(request, thread_id):
+    """
+       Widok oznaczający wątek czatu jako przeczytany przez zalogowanego użytkownika.
+
+       Wymagane uprawnienia:
+           - Użytkownik musi być zalogowany i być uczestnikiem wątku.
+
+       Argumenty:
+           request (HttpRequest): Obiekt żądania HTTP (POST).
+           thread_id (int): Identyfikator wątku czatu.
+
+       Zwraca:
+           JsonResponse: Pusta odpowiedź JSON.
+
+       Wyjątki:
+           Http404: Jeśli wątek nie istnieje lub użytkownik do niego nie należy.
+
+       """
+    thread = get_object_or_404(Thread.objects.by_user(user=request.user), pk=thread_id)
+    Thread.objects.mark_read(thread, request.user)
+    return JsonResponse({})
+
 @login_required
 def create_thread(request, pk):
     """
@@ -118,8 +201,8 @@ def delete_thread(request, thread_id):
     messages.success(request, "Deleted thread_chat")
     return redirect('chat')
 
-@login_required
-def search_thread(request):
+@async_login_required
+async def search_thread(request):
     """
         Widok odpowiedzialny za wyszukiwanie użytkowników do rozpoczęcia nowego wątku czatu.
 
@@ -136,7 +219,8 @@ def search_thread(request):
             Ten widok obsługuje zapytania AJAX wysyłane podczas wyszukiwania użytkowników
             do rozpoczęcia nowego wątku czatu. Sprawdza, czy żądanie jest zapytaniem AJAX.
             Następnie pobiera dane wyszukiwanych użytkowników na podstawie wartości przekazanej
-            w polu formularza 'users'. Jeśli znalezione są pasujące użytkownicy, ich dane
+            w polu formularza 'users' (chat.search.search_users - najwyżej SEARCH_LIMIT wyników,
+            zapamiętywanych na krótki czas, asynchronicznie - chat.search.asearch_users). Jeśli znalezione są pasujące użytkownicy, ich dane
             są zwracane w formacie JSON, w przeciwnym razie zwracany jest komunikat o braku
             znalezionych użytkowników.
 
@@ -158,18 +242,9 @@ def search_thread(request):
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
         res = None
         users = request.POST.get('users')
-        if users is not None and users != '':
-            qs = User.objects.filter(Q(first_name__icontains=users) | Q(last_name__icontains=users))
-            if len(qs) > 0:
-                data = []
-                for user in qs:
-                    item = {
-                        'pk': user.pk,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name,
-                        'avatar': user.profile.profile_pic.url
-                    }
-                    data.append(item)
+        if users is not None and users.strip() != '':
+            data = await asearch_users(users)
+            if len(data) > 0:
                 res = data
             else:
                 res = "No Users Found...".format(users)
@@ -0,0 +1,298 @@
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.db import transaction
+
+# Domyślny czas przechowywania wyników cached_query i cached_fragment (w sekundach)
+CACHE_TIMEOUT = 60 * 60
+
+_MISSING = object()
+
+# Pamięć L1 jest wspólna dla wszystkich wątków procesu (Django tworzy osobny obiekt
+# pamięci podręcznej dla każdego wątku), tak jak w LocMemCache.
+_l1_stores = {}
+_l1_stores_lock = threading.Lock()
+
+# Liczniki trafień i chybień dla przestrzeni nazw (część klucza przed pierwszym ':')
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+
+def _count(namespace, event):
+    with _stats_lock:
+        _stats[namespace][event] += 1
+
+
+def cache_stats():
+    """
+        Zwraca liczniki pamięci podręcznej bieżącego procesu.
+
+        Zwraca:
+            dict: Dla każdej przestrzeni nazw liczba trafień w L1 ('l1_hits') i L2 ('l2_hits'),
+            chybień ('misses') oraz wpisów usuniętych z L1 z braku miejsca ('evictions').
+    """
+    with _stats_lock:
+        return {namespace: dict(counter) for namespace, counter in _stats.items()}
+
+
+def reset_cache_stats():
+    """
+        Zeruje liczniki pamięci podręcznej bieżącego procesu.
+    """
+    with _stats_lock:
+        _stats.clear()
+
+
+class _LRU:
+    # Pamięć LRU ograniczona liczbą wpisów i łącznym rozmiarem zapisanych (zserializowanych) wartości
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            data, expires, namespace = entry
+            if expires < time.time():
+                self._remove(key)
+                return _MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(data)
+
+    def set(self, key, value, expires, namespace):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            self.delete(key)
+            return
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (data, expires, namespace)
+            self.size += len(data)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                evicted, (evicted_data, _, evicted_namespace) = self.entries.popitem(last=False)
+                self.size -= len(evicted_data)
+                _count(evicted_namespace, 'evictions')
+
+    def delete(self, key):
+        with self.lock:
+            return self._remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= len(entry[0])
+        return True
+
+
+class TieredCache(BaseCache):
+    """
+        Dwupoziomowa pamięć podręczna: L1 w pamięci procesu i wspólna dla procesów L2.
+
+        Opcje (OPTIONS):
+            L2 (str): Alias pamięci podręcznej L2 w ustawieniu CACHES (domyślnie 'shared').
+            L1_MAX_ENTRIES (int): Maksymalna liczba wpisów L1.
+            L1_MAX_BYTES (int): Maksymalny łączny rozmiar wartości L1 w bajtach.
+            L1_TIMEOUT (int): Maksymalny czas przechowywania wpisu w L1 (w sekundach).
+
+        Opis działania:
+            Odczyt sprawdza najpierw L1 (najdawniej używane wpisy są usuwane po przekroczeniu
+            limitu liczby lub rozmiaru), a po chybieniu L2 i zapisuje wynik w L1. Zapisy,
+            usunięcia i incr wykonywane są w L2 i od razu odzwierciedlane w L1 bieżącego
+            procesu. Inne procesy widzą zmianę najpóźniej po L1_TIMEOUT sekundach - tyle może
+            trwać unieważnienie przez zmianę wersji (np. cez.cache.bump_course_versions).
+
+            Liczniki trafień, chybień i usunięć prowadzone są dla przestrzeni nazw klucza
+            (cache_stats).
+    """
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        with _l1_stores_lock:
+            self._l1 = _l1_stores.setdefault(location or 'default', _LRU(
+                options.get('L1_MAX_ENTRIES', 5000), options.get('L1_MAX_BYTES', 16 * 1024 * 1024)))
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _namespace(self, key):
+        return str(key).split(':', 1)[0]
+
+    def _remember(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        now = time.time()
+        expires = now + self.l1_timeout
+        backend_timeout = self.get_backend_timeout(timeout)
+        if backend_timeout is not None:
+            expires = min(expires, backend_timeout)
+        if expires <= now:
+            self._l1.delete(self.make_and_validate_key(key, version))
+        else:
+            self._l1.set(self.make_and_validate_key(key, version), value, expires, self._namespace(key))
+
+    def get(self, key, default=None, version=None):
+        value = self._l1.get(self.make_and_validate_key(key, version))
+        if value is not _MISSING:
+            _count(self._namespace(key), 'l1_hits')
+            return value
+        value = self.l2.get(key, _MISSING, version)
+        if value is _MISSING:
+            _count(self._namespace(key), 'misses')
+            return default
+        _count(self._namespace(key), 'l2_hits')
+        self._remember(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self._l1.get(self.make_and_validate_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                _count(self._namespace(key), 'l1_hits')
+                found[key] = value
+        if missing:
+            shared = self.l2.get_many(missing, version)
+            for key in missing:
+                if key in shared:
+                    _count(self._namespace(key), 'l2_hits')
+                    self._remember(key, shared[key], version)
+                    found[key] = shared[key]
+                else:
+                    _count(self._namespace(key), 'misses')
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version)
+        self._remember(key, value, version, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version)
+        if added:
+            self._remember(key, value, version, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1.delete(self.make_and_validate_key(key, version))
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._l1.delete(self.make_and_validate_key(key, version))
+        return self.l2.delete(key, version)
+
+    def has_key(self, key, version=None):
+        if self._l1.get(self.make_and_validate_key(key, version)) is not _MISSING:
+            return True
+        return self.l2.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version)
+        self._remember(key, value, version)
+        return value
+
+    def clear(self):
+        self._l1.clear()
+        self.l2.clear()
+
+
+def _generation(namespace, scope=None):
+    key = f'{namespace}:generation' if scope is None else f'{namespace}:{scope}:generation'
+    generation = cache.get(key)
+    if generation is None:
+        # Wartość początkowa jest unikalna, więc po utracie klucza generacji
+        # dawne wpisy nie są odczytywane ponownie.
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(namespace, scope):
+    key = f'{namespace}:generation' if scope is None else f'{namespace}:{scope}:generation'
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def invalidate(namespace, scope=None):
+    """
+        Unieważnia wyniki zapamiętane w przestrzeni nazw.
+
+        Argumenty:
+            namespace (str): Przestrzeń nazw (np. 'course').
+            scope (object): Zakres w przestrzeni nazw (np. identyfikator studenta). Bez zakresu
+            unieważniane są wszystkie wyniki przestrzeni nazw.
+
+        Opis działania:
+            Tak jak w cez.cache.bump_course_versions generacja zmieniana jest od razu oraz
+            ponownie po zatwierdzeniu transakcji.
+    """
+    _bump(namespace, scope)
+    transaction.on_commit(lambda: _bump(namespace, scope))
+
+
+def _cache_key(namespace, key, scope, depends):
+    parts = [namespace, _generation(namespace)]
+    if scope is not None:
+        parts += [scope, _generation(namespace, scope)]
+    for dependency in depends:
+        parts += [dependency, _generation(dependency)]
+    return ':'.join(str(part) for part in parts + [key])
+
+
+def cached_query(namespace, key, build, timeout=CACHE_TIMEOUT, scope=None, depends=()):
+    """
+        Zwraca zapamiętany wynik zapytania lub wyznacza go i zapamiętuje.
+
+        Argumenty:
+            namespace (str): Przestrzeń nazw, której unieważnienie usuwa wynik.
+            key (str): Klucz wyniku w przestrzeni nazw.
+            build (callable): Funkcja wyznaczająca wynik (np. lista obiektów z zapytania).
+            timeout (int): Czas przechowywania wyniku (w sekundach).
+            scope (object): Zakres w przestrzeni nazw (np. identyfikator studenta).
+            depends (Iterable[str]): Inne przestrzenie nazw, których unieważnienie usuwa wynik.
+
+        Zwraca:
+            object: Wynik funkcji build.
+    """
+    cache_key = _cache_key(namespace, key, scope, depends)
+    value = cache.get(cache_key, _MISSING)
+    if value is _MISSING:
+        value = build()
+        cache.set(cache_key, value, timeout)
+    return value
+
+
+def cached_fragment(namespace, key, render, timeout=CACHE_TIMEOUT, scope=None, depends=()):
+    """
+        Zwraca zapamiętany fragment HTML lub renderuje go i zapamiętuje.
+
+        Argumenty:
+            namespace (str): Przestrzeń nazw, której unieważnienie usuwa fragment.
+            key (str): Klucz fragmentu w przestrzeni nazw.
+            render (callable): Funkcja renderująca fragment (np. render_to_string).
+            timeout (int): Czas przechowywania fragmentu (w sekundach).
+            scope (object): Zakres w przestrzeni nazw (np. identyfikator studenta).
+            depends (Iterable[str]): Inne przestrzenie nazw, których unieważnienie usuwa fragment.
+
+        Zwraca:
+            SafeString: Wyrenderowany fragment.
+    """
+    return cached_query(namespace, f'fragment:{key}', render, timeout, scope, depends)
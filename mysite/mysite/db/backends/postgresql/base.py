@@ -0,0 +1,96 @@
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from mysite.db.pool import ConnectionPool, PoolTimeout, close_pool, get_pool
+
+# Domyślna maksymalna liczba połączeń puli procesu
+DEFAULT_POOL_SIZE = 10
+
+
+def _check(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return True
+    except Exception:
+        return False
+
+
+def _reset(connection):
+    # Połączenie zwracane do puli nie może mieć otwartej transakcji
+    if connection.closed:
+        raise ValueError('connection is closed')
+    if connection.info.transaction_status != 0:
+        connection.rollback()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Bezczynne połączenia puli z bazą testową uniemożliwiłyby DROP DATABASE
+        close_pool((self.connection.alias, test_database_name))
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+        Sterownik PostgreSQL pobierający połączenia z puli połączeń procesu.
+
+        Opis działania:
+            Django zamyka połączenie po każdym żądaniu i po każdym wywołaniu
+            database_sync_to_async (CONN_MAX_AGE = 0). Zamknięcie zwraca połączenie do puli
+            (mysite.db.pool.ConnectionPool), a kolejne otwarcie - w dowolnym wątku - pobiera
+            je z puli zamiast łączyć się z serwerem od nowa. Pod ASGI każde żądanie wykonywane
+            jest w nowym wątku, więc połączenia przypisane do wątków (CONN_MAX_AGE > 0) nie
+            byłyby ponownie używane.
+
+            Liczba wątków ASGI nie jest ograniczona (każde żądanie otrzymuje własny wątek
+            kodu synchronicznego), dlatego to MAX_SIZE ogranicza liczbę żądań korzystających
+            jednocześnie z bazy danych w procesie - kolejne czekają na zwolnienie połączenia
+            najwyżej TIMEOUT sekund, po czym zgłaszany jest OperationalError. Czas oczekiwania
+            i liczbę aktywnych połączeń pokazuje widok mysite.views.db_pool.
+
+            Ustawienia puli (klucz POOL w ustawieniach bazy danych):
+                MAX_SIZE: maksymalna liczba połączeń procesu (domyślnie DEFAULT_POOL_SIZE),
+                TIMEOUT: maksymalny czas oczekiwania na połączenie (w sekundach),
+                MAX_LIFETIME: czas, po którym połączenie jest otwierane od nowa (w sekundach),
+                HEALTH_CHECK_AFTER: czas bezczynności, po którym połączenie jest sprawdzane
+                zapytaniem SELECT 1 przed wydaniem (w sekundach).
+    """
+    creation_class = DatabaseCreation
+
+    def _create_pool(self):
+        options = self.settings_dict.get('POOL', {})
+        return ConnectionPool(
+            connect=None,
+            max_size=options.get('MAX_SIZE', DEFAULT_POOL_SIZE),
+            timeout=options.get('TIMEOUT', 30),
+            max_lifetime=options.get('MAX_LIFETIME', 30 * 60),
+            health_check_after=options.get('HEALTH_CHECK_AFTER', 30),
+            check=_check,
+            reset=_reset,
+        )
+
+    @property
+    def pool(self):
+        # Nazwa bazy jest częścią klucza, ponieważ testy zmieniają ją po utworzeniu bazy testowej
+        return get_pool((self.alias, self.settings_dict['NAME']), self._create_pool)
+
+    def get_new_connection(self, conn_params):
+        try:
+            connection = self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        # Poziom izolacji ustawiany jest przy otwarciu połączenia (base.DatabaseWrapper.get_new_connection)
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (IsolationLevel.READ_COMMITTED if isolation_level is None
+                                else IsolationLevel(isolation_level))
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            if self.errors_occurred and not self.is_usable():
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
@@ -0,0 +1,258 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Czas oczekiwania na połączenie (w sekundach), po którym oczekiwanie jest logowane
+SLOW_CHECKOUT = 0.5
+
+
+class PoolTimeout(Exception):
+    """
+        Wyjątek zgłaszany, gdy w wyznaczonym czasie nie zwolniło się żadne połączenie.
+    """
+
+
+class ConnectionPool:
+    """
+        Pula połączeń z bazą danych współdzielona przez wątki procesu.
+
+        Atrybuty:
+            connect (callable): Funkcja otwierająca nowe połączenie.
+            max_size (int): Maksymalna liczba otwartych połączeń (wydanych i bezczynnych).
+            timeout (float): Maksymalny czas oczekiwania na połączenie (w sekundach).
+            max_lifetime (float): Czas (w sekundach), po którym połączenie jest zamykane i otwierane od nowa.
+            health_check_after (float): Czas bezczynności (w sekundach), po którym połączenie
+            jest sprawdzane przed wydaniem.
+            check (callable): Funkcja sprawdzająca, czy połączenie działa (zwraca bool).
+            reset (callable): Funkcja przywracająca połączenie do stanu początkowego przy zwrocie
+            (np. wycofująca otwartą transakcję); wyjątek oznacza, że połączenie należy zamknąć.
+
+        Opis działania:
+            acquire() wydaje ostatnio zwrócone bezczynne połączenie, a gdy go brak i nie
+            osiągnięto max_size - otwiera nowe. W przeciwnym razie czeka na zwolnienie
+            połączenia. Połączenia bezczynne dłużej niż health_check_after są sprawdzane przed
+            wydaniem, a niedziałające lub starsze niż max_lifetime zamykane.
+
+            Pula zlicza czas oczekiwania, liczbę wydanych (aktywnych) i bezczynnych połączeń
+            oraz połączeń otwartych i zamkniętych (stats).
+    """
+    def __init__(self, connect, max_size, timeout=30, max_lifetime=30 * 60, health_check_after=30,
+                 check=None, reset=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.check = check
+        self.reset = reset
+        self._idle = deque()
+        self._opened_at = {}
+        self._active = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'opened': 0,
+            'closed': 0,
+            'health_check_failures': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'wait_count': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+        }
+
+    @property
+    def size(self):
+        return self._active + len(self._idle)
+
+    def acquire(self, connect=None):
+        """
+            Wydaje połączenie z puli.
+
+            Argumenty:
+                connect (callable): Funkcja otwierająca nowe połączenie (domyślnie self.connect).
+
+            Zwraca:
+                object: Połączenie z bazą danych.
+
+            Wyjątki:
+                PoolTimeout: Jeśli w ciągu timeout sekund nie zwolniło się żadne połączenie.
+        """
+        deadline = time.monotonic() + self.timeout
+        # Czas oczekiwania na zwolnienie połączenia, bez czasu otwierania i sprawdzania połączeń
+        waited = 0.0
+        while True:
+            with self._condition:
+                self._waiting += 1
+                try:
+                    while not self._idle and self.size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['timeouts'] += 1
+                            raise PoolTimeout(f'No database connection available within {self.timeout} s '
+                                              f'({self.max_size} in use).')
+                        wait_started = time.monotonic()
+                        self._condition.wait(remaining)
+                        waited += time.monotonic() - wait_started
+                finally:
+                    self._waiting -= 1
+                self._active += 1
+                candidate = self._idle.pop() if self._idle else None
+
+            if candidate is None:
+                break
+            # Sprawdzenie wykonywane jest poza blokadą, aby nie wstrzymywać innych wątków
+            connection, released_at = candidate
+            if self._expired(connection):
+                self.discard(connection)
+                continue
+            if self.check is not None and time.monotonic() - released_at > self.health_check_after:
+                if not self.check(connection):
+                    with self._condition:
+                        self._stats['health_check_failures'] += 1
+                    self.discard(connection)
+                    continue
+            with self._condition:
+                self._checked_out(waited)
+            return connection
+
+        try:
+            connection = (connect or self.connect)()
+        except BaseException:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opened_at[id(connection)] = time.monotonic()
+            self._stats['opened'] += 1
+            self._checked_out(waited)
+        return connection
+
+    def release(self, connection):
+        """
+            Zwraca połączenie do puli.
+
+            Argumenty:
+                connection (object): Połączenie wydane przez acquire().
+        """
+        reusable = not self._expired(connection)
+        if reusable and self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception as e:
+                logger.warning(f'Discarding database connection that could not be reset: {e}')
+                reusable = False
+        with self._condition:
+            self._active -= 1
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def discard(self, connection):
+        """
+            Zamyka wydane połączenie (np. po błędzie) zamiast zwracać je do puli.
+
+            Argumenty:
+                connection (object): Połączenie wydane przez acquire().
+        """
+        with self._condition:
+            self._active -= 1
+            self._discard(connection)
+            self._condition.notify()
+
+    def close_all(self):
+        """
+            Zamyka wszystkie bezczynne połączenia.
+        """
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def stats(self):
+        """
+            Zwraca statystyki puli.
+
+            Zwraca:
+                dict: Rozmiar ('size', 'max_size'), liczba aktywnych ('active'), bezczynnych ('idle')
+                i oczekujących ('waiting') połączeń, liczniki otwartych, zamkniętych i odrzuconych
+                przez sprawdzenie połączeń oraz czas oczekiwania na połączenie ('wait_total',
+                'wait_max' i średni 'wait_avg', w sekundach).
+        """
+        with self._condition:
+            stats = dict(self._stats, size=self.size, max_size=self.max_size, active=self._active,
+                         idle=len(self._idle), waiting=self._waiting)
+        stats['wait_avg'] = stats['wait_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+    def _checked_out(self, waited):
+        self._stats['checkouts'] += 1
+        if waited:
+            self._stats['wait_count'] += 1
+            self._stats['wait_total'] += waited
+            self._stats['wait_max'] = max(self._stats['wait_max'], waited)
+        if waited > SLOW_CHECKOUT:
+            logger.warning(f'Waited {waited:.3f} s for a database connection ({self._active} active).')
+
+    def _expired(self, connection):
+        opened_at = self._opened_at.get(id(connection))
+        return opened_at is None or time.monotonic() - opened_at > self.max_lifetime
+
+    def _discard(self, connection):
+        self._opened_at.pop(id(connection), None)
+        self._stats['closed'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """
+        Zwraca pulę połączeń dla bazy danych, tworząc ją przy pierwszym użyciu.
+
+        Argumenty:
+            key (Hashable): Klucz puli (np. alias bazy danych z ustawienia DATABASES i nazwa bazy).
+            factory (callable): Funkcja tworząca pulę.
+
+        Zwraca:
+            ConnectionPool: Pula połączeń procesu.
+    """
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = factory()
+        return _pools[key]
+
+
+def close_pool(key):
+    """
+        Zamyka bezczynne połączenia puli i usuwa ją (np. przed usunięciem bazy danych).
+
+        Argumenty:
+            key (Hashable): Klucz puli przekazany do get_pool.
+    """
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+    if pool is not None:
+        pool.close_all()
+
+
+def pool_stats():
+    """
+        Zwraca statystyki wszystkich pul połączeń procesu.
+
+        Zwraca:
+            dict: Statystyki puli (ConnectionPool.stats) dla kluczy pul.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {key: pool.stats() for key, pool in pools.items()}
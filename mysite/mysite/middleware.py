@@ -0,0 +1,109 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .nplusone import detect
+from .queries import QueryRecorder, query_budget
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """
+        Middleware mierzący zapytania do bazy danych wykonane podczas obsługi żądania.
+
+        Opis działania:
+            Dla każdego żądania zliczane są zapytania, ich łączny czas oraz zapytania powtórzone
+            z tymi samymi parametrami (mysite.queries.QueryRecorder). Żądania, które przekraczają
+            limit widoku (QUERY_BUDGETS dla nazwy adresu URL lub QUERY_BUDGET_DEFAULT) albo
+            powtarzają zapytania, są logowane. Przy DEBUG = True wyniki dodawane są do nagłówków
+            odpowiedzi X-DB-Queries, X-DB-Time (w milisekundach), X-DB-Duplicates i X-Query-Budget.
+
+            Middleware powinien być pierwszy na liście MIDDLEWARE, aby obejmował także zapytania
+            pozostałych middleware (np. zapis sesji). Obsługuje zarówno tryb synchroniczny,
+            jak i asynchroniczny, więc pod ASGI nie przełącza łańcucha middleware w tryb
+            synchroniczny. W trybie asynchronicznym licznik podłączany jest do połączeń wątku,
+            w którym wykonywane są zapytania żądania (sync_to_async z thread_sensitive=True).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        """
+            Loguje żądanie przekraczające limit zapytań i dodaje nagłówki z wynikami pomiaru.
+
+            Argumenty:
+                request (HttpRequest): Obsłużone żądanie.
+                response (HttpResponse): Odpowiedź widoku.
+                recorder (QueryRecorder): Pomiar zapytań wykonanych podczas obsługi żądania.
+
+            Zwraca:
+                HttpResponse: Odpowiedź widoku.
+        """
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = query_budget(view_name)
+        if recorder.count > budget or recorder.duplicates:
+            logger.warning(
+                f'{request.method} {request.path} ({view_name}) executed {recorder.count} queries '
+                f'in {recorder.duration * 1000:.1f} ms, {recorder.duplicates} duplicated, budget {budget}.')
+            for sql, n in recorder.duplicated()[:5]:
+                logger.warning(f'Repeated {n} times: {sql}')
+        if settings.DEBUG:
+            response['X-DB-Queries'] = recorder.count
+            response['X-DB-Time'] = f'{recorder.duration * 1000:.1f}'
+            response['X-DB-Duplicates'] = recorder.duplicates
+            response['X-Query-Budget'] = budget
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+        Middleware wykrywający zapytania N+1 podczas obsługi żądania (mysite.nplusone.detect).
+
+        Opis działania:
+            Zapytania SELECT o tym samym kształcie wykonane więcej niż NPLUSONE_THRESHOLD razy
+            są logowane wraz z wierszem szablonu lub ramkami stosu, które je wywołały,
+            a w testach (NPLUSONE_ACTION = 'raise') powodują błąd NPlusOneError. Obsługuje tryb
+            synchroniczny i asynchroniczny; dodawany jest do MIDDLEWARE tylko przy ustawionym
+            NPLUSONE_ACTION.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with detect(f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with detect(f'{request.method} {request.path}'):
+            return await self.get_response(request)
@@ -0,0 +1,157 @@
+import logging
+import re
+import sys
+import threading
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Liczba ramek stosu kodu projektu dołączanych do raportu
+STACK_DEPTH = 5
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?|\d+)(?:, (?:%s|\?|\d+))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+class NPlusOneError(Exception):
+    """
+        Wyjątek zgłaszany (przy NPLUSONE_ACTION = 'raise'), gdy w jednym żądaniu lub zdarzeniu
+        konsumera to samo zapytanie wykonano więcej niż NPLUSONE_THRESHOLD razy.
+    """
+
+
+def query_shape(sql):
+    """
+        Zwraca kształt zapytania SQL - treść bez parametrów.
+
+        Argumenty:
+            sql (str): Treść zapytania.
+
+        Zwraca:
+            str: Zapytanie, w którym parametry, liczby i napisy zastąpiono znakiem '?',
+            a listy IN (...) o dowolnej długości zapisano jednakowo.
+    """
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql).replace('%s', '?')
+    return ' '.join(sql.split())
+
+
+def _template_line(frame):
+    # Najbliższy zapytaniu węzeł szablonu renderowany przez Node.render_annotated
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token, origin = getattr(node, 'token', None), getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                tag = '{{ %s }}' if token.token_type.name == 'VAR' else '{%% %s %%}'
+                return f'{origin.template_name or origin.name}:{token.lineno} {tag % token.contents}'
+        frame = frame.f_back
+    return None
+
+
+def _project_stack(frame):
+    base_dir = str(settings.BASE_DIR)
+    stack = [entry for entry in traceback.StackSummary.extract(traceback.walk_stack(frame))
+             if entry.filename.startswith(base_dir) and 'site-packages' not in entry.filename
+             and entry.filename != __file__]
+    return [f'{entry.filename[len(base_dir):].lstrip("/")}:{entry.lineno} in {entry.name}'
+            for entry in stack[:STACK_DEPTH]]
+
+
+class _Scope:
+    def __init__(self, name, threshold):
+        self.name = name
+        self.threshold = threshold
+        self.counts = Counter()
+        self.origins = {}
+        self.lock = threading.Lock()
+
+    def record(self, sql):
+        if not sql.lstrip()[:6].upper() == 'SELECT':
+            return
+        shape = query_shape(sql)
+        with self.lock:
+            self.counts[shape] += 1
+            repeated = self.counts[shape] == self.threshold + 1
+        if repeated:
+            frame = sys._getframe(1)
+            self.origins[shape] = (_template_line(frame), _project_stack(frame))
+
+    def report(self):
+        lines = []
+        for shape, (template, stack) in self.origins.items():
+            lines.append(f'N+1 in {self.name}: {self.counts[shape]} x {shape}')
+            if template:
+                lines.append(f'    template {template}')
+            lines.extend(f'    {entry}' for entry in stack)
+        return '\n'.join(lines)
+
+
+_scope = ContextVar('nplusone_scope', default=None)
+
+
+def _record(execute, sql, params, many, context):
+    scope = _scope.get()
+    if scope is not None:
+        scope.record(sql)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install(connection, **kwargs):
+    """
+        Dołącza wykrywanie N+1 do połączenia z bazą danych (odbiornik sygnału connection_created).
+
+        Argumenty:
+            connection (DatabaseWrapper): Połączenie z bazą danych.
+    """
+    # Na początek listy, ponieważ execute_wrapper() zdejmuje ostatni element
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record)
+
+
+@contextmanager
+def detect(name):
+    """
+        Wykrywa zapytania N+1 w bloku with (np. w obsłudze jednego żądania).
+
+        Argumenty:
+            name (str): Nazwa bloku w raporcie (np. metoda i adres żądania).
+
+        Wyjątki:
+            NPlusOneError: Jeśli NPLUSONE_ACTION = 'raise', a zapytanie SELECT o tym samym kształcie
+            (query_shape) wykonano więcej niż NPLUSONE_THRESHOLD razy.
+
+        Opis działania:
+            Kształty zapytań zliczane są we wszystkich wątkach, do których przekazywany jest
+            kontekst bloku (sync_to_async, database_sync_to_async). Przy przekroczeniu progu
+            zapamiętywany jest wiersz szablonu, którego renderowanie wykonało zapytanie, oraz
+            ramki stosu kodu projektu. Przy NPLUSONE_ACTION = 'log' raport jest logowany,
+            a bez ustawienia wykrywanie jest wyłączone. Bloki zagnieżdżone należą do zewnętrznego.
+    """
+    action = getattr(settings, 'NPLUSONE_ACTION', None)
+    if not action or _scope.get() is not None:
+        yield
+        return
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+    scope = _Scope(name, settings.NPLUSONE_THRESHOLD)
+    token = _scope.set(scope)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+    if scope.origins:
+        if action == 'raise':
+            raise NPlusOneError(scope.report())
+        logger.warning(scope.report())
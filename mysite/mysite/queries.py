@@ -0,0 +1,103 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+class QueryRecorder:
+    """
+        Zlicza zapytania do bazy danych wykonane w bloku with.
+
+        Argumenty:
+            using (Iterable[str]): Aliasy baz danych (domyślnie wszystkie z ustawienia DATABASES).
+
+        Atrybuty:
+            count (int): Liczba zapytań.
+            duration (float): Łączny czas wykonywania zapytań (w sekundach).
+            duplicates (int): Liczba zapytań powtórzonych z tymi samymi parametrami.
+
+        Opis działania:
+            Zapytania przechwytywane są przez execute_wrapper połączeń bieżącego wątku,
+            więc - w przeciwieństwie do connection.queries - liczone są również przy DEBUG = False.
+    """
+    def __init__(self, using=None):
+        self.using = list(using or connections)
+        self.count = 0
+        self.duration = 0.0
+        self.duplicates = 0
+        self._seen = Counter()
+        self._stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            key = (sql, repr(params))
+            if self._seen[key]:
+                self.duplicates += 1
+            self._seen[key] += 1
+
+    def __enter__(self):
+        for alias in self.using:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def duplicated(self):
+        """
+            Zwraca zapytania wykonane więcej niż raz z tymi samymi parametrami.
+
+            Zwraca:
+                list: Pary (treść zapytania SQL, liczba wykonań), od najczęstszych.
+        """
+        return [(sql, n) for (sql, params), n in self._seen.most_common() if n > 1]
+
+
+def query_budget(view_name):
+    """
+        Zwraca maksymalną liczbę zapytań do bazy danych dla widoku.
+
+        Argumenty:
+            view_name (str): Nazwa adresu URL widoku (np. 'course_detail').
+
+        Zwraca:
+            int: Limit z ustawienia QUERY_BUDGETS lub QUERY_BUDGET_DEFAULT.
+    """
+    return settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+class QueryBudgetMixin:
+    """
+        Domieszka klas testów sprawdzająca limity zapytań widoków.
+
+        Metody:
+            assertQueryBudget(self, view_name, using=None): Sprawdza, czy blok with nie przekracza
+            limitu zapytań widoku i nie powtarza zapytań.
+    """
+    @contextmanager
+    def assertQueryBudget(self, view_name, using=None):
+        """
+            Sprawdza, czy blok with mieści się w limicie zapytań widoku.
+
+            Argumenty:
+                view_name (str): Nazwa adresu URL widoku, którego limit jest sprawdzany (query_budget).
+                using (Iterable[str]): Aliasy baz danych (domyślnie wszystkie).
+
+            Wyjątki:
+                AssertionError: Jeśli liczba zapytań przekracza limit widoku lub to samo zapytanie
+                zostało wykonane więcej niż raz z tymi samymi parametrami.
+        """
+        with QueryRecorder(using) as recorder:
+            yield recorder
+        budget = query_budget(view_name)
+        self.assertLessEqual(recorder.count, budget,
+                             f'{view_name} executed {recorder.count} queries, over its budget of {budget}.')
+        self.assertEqual(recorder.duplicates, 0,
+                         f'{view_name} repeated queries: {recorder.duplicated()}')
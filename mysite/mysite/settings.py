@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mysite.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,6 +62,35 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Maximum number of database queries per request, by URL name (mysite.middleware.QueryBudgetMiddleware).
+# Requests over budget or repeating a query are logged; tests enforce the same budgets
+# with mysite.queries.QueryBudgetMixin.assertQueryBudget.
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    'index': 3,
+    'courses': 5,
+    'course_detail': 10,
+    'create-course': 8,
+    'create-assignments': 6,
+    'assignment-submit': 6,
+    'assignment-rate': 8,
+    'topic-update': 6,
+    'add-topic': 6,
+    'chat': 6,
+    'thread_messages': 4,
+    'mark_thread_read': 4,
+    'search': 5,
+}
+
+# N+1 detection (mysite.nplusone): a SELECT of the same shape (parameters stripped) executed
+# more than NPLUSONE_THRESHOLD times in one request or consumer event is reported with the
+# template line or stack that ran it. 'log' logs the report, 'raise' fails with NPlusOneError
+# (set by the test runner) and None turns detection off and leaves its middleware out.
+NPLUSONE_THRESHOLD = 3
+NPLUSONE_ACTION = 'log' if DEBUG else None
+if NPLUSONE_ACTION:
+    MIDDLEWARE.insert(1, 'mysite.middleware.NPlusOneMiddleware')
+
 ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
@@ -88,12 +119,26 @@ load_dotenv()
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # Connections are returned to the process-wide pool at the end of every request and
+        # database_sync_to_async call, so they are reused across the threads ASGI runs sync code in
+        'ENGINE': 'mysite.db.backends.postgresql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        'CONN_MAX_AGE': 0,
+        # ASGI runs the sync code of every request in its own thread (asgiref gives each request
+        # a thread-sensitive executor), so the thread count is not bounded. MAX_SIZE is the real
+        # limit on concurrent database work per worker process: requests beyond it wait up to
+        # TIMEOUT seconds and then fail with OperationalError. Keep MAX_SIZE times the number of
+        # worker processes below the server's max_connections. Usage: /admin/db-pool/.
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'TIMEOUT': 30,
+            'MAX_LIFETIME': 30 * 60,
+            'HEALTH_CHECK_AFTER': 30,
+        },
     }
 }
 
@@ -161,20 +206,77 @@ GS_FILE_OVERWRITE = False
 GS_CREDENTIALS = service_account.Credentials.from_service_account_file(
     os.path.join(BASE_DIR, 'credential.json'))
 
+# Maximum size of a submission or course file. Larger uploads are aborted while streaming
+# (cez.uploads.LimitedUploadHandler) instead of after the whole request has been received.
+FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+
+# How files under MEDIA_URL are sent after the access check (cez.media.serve): None sends
+# local files from Django (in chunks under ASGI, os.sendfile through wsgi.file_wrapper under
+# WSGI), 'x-accel-redirect' hands the transfer to nginx and 'x-sendfile' to Apache.
+# Use 'x-accel-redirect' in production, so downloads do not occupy the ASGI worker.
+MEDIA_OFFLOAD = None
+# nginx `internal` location aliased to the media directory, used with X-Accel-Redirect.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Two-tier cache (mysite.cache.TieredCache): a per-process LRU in front of a cache shared
+# by all processes on the host. Writes go through to the shared tier; other processes see
+# them after at most L1_TIMEOUT seconds. The file-based shared tier lists its directory on
+# every write (FileBasedCache._cull), so MAX_ENTRIES is kept small; swap it for Redis or
+# Memcached when one is available. A database cache is not used, as its reads would count
+# against the per-view query budgets.
+CACHES = {
+    'default': {
+        'BACKEND': 'mysite.cache.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': 5000,
+            'L1_MAX_BYTES': 16 * 1024 * 1024,
+            'L1_TIMEOUT': 5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'szkieletowe-cache')),
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Replaces the shared cache tier with a per-process one for the test run, so tests never
+# read, write or clear the entries of a server running on the same host.
+TEST_RUNNER = 'mysite.test_runner.TestRunner'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Messages between ASGI worker processes are fanned out with PostgreSQL LISTEN/NOTIFY
+# (chat.layers.PostgresChannelLayer), using the default database connection settings.
+# `manage.py benchmark_channel_layer` against a local PostgreSQL 16 (1 CPU, 1000 group
+# messages) delivered every message; p50/p99 latency and deliveries/s were:
+#   1 worker 0.5/1.4 ms, ~1500-1800/s; 4 workers 0.9-1.0/2.7-6.5 ms, ~3000-3400/s;
+#   16 workers 3.6-3.8/9.5-10.8 ms, ~2600-2700/s.
 CHANNEL_LAYERS = {
     'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'BACKEND': 'chat.layers.PostgresChannelLayer',
+        'CONFIG': {
+            'prefix': 'mysite_channels',
+            'group_expiry': 86400,
+        },
+        # 'BACKEND': 'channels.layers.InMemoryChannelLayer',
         # 'CONFIG':{
         #     'host': [('127.0.0.1', 6379)],
         # }
     }
 }
 
+# Write-behind batching of chat messages (chat.buffer.MessageBuffer): messages are broadcast
+# immediately and inserted once CHAT_WRITE_BEHIND_ROWS rows are buffered or after
+# CHAT_WRITE_BEHIND_DELAY seconds. A crashed process loses its unflushed batch.
+CHAT_WRITE_BEHIND = False
+CHAT_WRITE_BEHIND_ROWS = 100
+CHAT_WRITE_BEHIND_DELAY = 0.05
+
 FORMATTERS = (
     {
         "verbose": {
@@ -0,0 +1,43 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction, close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+# Pula wątków wykonujących zadania w tle (np. przetwarzanie obrazów)
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+    thread_name_prefix='background-task',
+)
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f'Background task {func.__name__} failed.')
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+        Zleca wykonanie funkcji w tle po zatwierdzeniu bieżącej transakcji.
+
+        Argumenty:
+            func (callable): Funkcja do wykonania.
+            *args: Argumenty pozycyjne funkcji.
+            **kwargs: Argumenty nazwane funkcji.
+
+        Opis działania:
+            Zadanie trafia do puli wątków dopiero po zatwierdzeniu transakcji, dzięki czemu
+            widzi zapisane dane. Przy ustawieniu BACKGROUND_TASKS_EAGER = True zadanie
+            wykonywane jest od razu w bieżącym wątku (np. w testach).
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+    else:
+        transaction.on_commit(lambda: _executor.submit(_run, func, args, kwargs))
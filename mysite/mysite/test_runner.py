@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Importowany przed utworzeniem połączeń testowej bazy danych, aby obejmował je odbiornik
+# connection_created
+from mysite import nplusone  # noqa: F401
+
+NPLUSONE_MIDDLEWARE = 'mysite.middleware.NPlusOneMiddleware'
+
+# Warstwa L2 pamięci podręcznej używana podczas testów zamiast skonfigurowanej
+TEST_SHARED_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'test-shared',
+}
+
+
+class TestRunner(DiscoverRunner):
+    """
+        Uruchamia testy z prywatną pamięcią podręczną i wykrywaniem zapytań N+1.
+
+        Opis działania:
+            Warstwa L2 pamięci podręcznej (mysite.cache.TieredCache) jest wspólna dla procesów
+            na tym samym komputerze, dlatego na czas testów zastępowana jest pamięcią procesu
+            (TEST_SHARED_CACHE). Testy nie odczytują, nie zapisują ani nie czyszczą wpisów
+            działającego serwera, a procesy testów równoległych (--parallel) nie widzą nawzajem
+            swoich wpisów. Zapytania N+1 wykryte podczas obsługi żądania lub zdarzenia konsumera
+            (mysite.nplusone) powodują błąd testu, również gdy ustawienia nie włączają wykrywania.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._private_caches = override_settings(CACHES={**settings.CACHES, 'shared': TEST_SHARED_CACHE})
+        self._private_caches.enable()
+        settings.NPLUSONE_ACTION = 'raise'
+        if NPLUSONE_MIDDLEWARE not in settings.MIDDLEWARE:
+            settings.MIDDLEWARE = [settings.MIDDLEWARE[0], NPLUSONE_MIDDLEWARE, *settings.MIDDLEWARE[1:]]
+
+    def teardown_test_environment(self, **kwargs):
+        self._private_caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -19,7 +19,8 @@ from django.urls import include, path
 from django.contrib.auth import views as auth_views
 from users import views as user_views
 from django.conf import settings
-from django.conf.urls.static import static
+from cez import views as cez_views
+from mysite import views as mysite_views
 
 urlpatterns = [
     path("", include("cez.urls")),
@@ -31,7 +32,9 @@ urlpatterns = [
     path('degrees/<int:course_id>/', user_views.degrees_course, name='degrees_course'),
     path('update-profile/', user_views.update_profile, name='update-profile'),
     path("logout/", auth_views.LogoutView.as_view(template_name='users/logout.html'), name="logout"),
+    path("admin/db-pool/", mysite_views.db_pool, name="db-pool"),
     path("admin/", admin.site.urls),
     path('activate/(?P<uidb64>[0-9A-Za-z_\-]+)/(?P<token>[0-9A-Za-z]{1,13}-[0-9A-Za-z]{1,20})/', user_views.activate, name='activate'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", cez_views.media, name='media'),
+]
 
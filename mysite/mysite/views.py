@@ -0,0 +1,23 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .db.pool import pool_stats
+
+
+@staff_member_required
+def db_pool(request):
+    """
+        Widok statystyk pul połączeń z bazą danych bieżącego procesu.
+
+        Wymagane uprawnienia:
+            - Użytkownik musi należeć do personelu (is_staff).
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+
+        Zwraca:
+            JsonResponse: Statystyki puli (mysite.db.pool.ConnectionPool.stats) dla aliasów baz
+            danych, m.in. liczba aktywnych, bezczynnych i oczekujących połączeń, czas oczekiwania
+            na połączenie oraz liczba przekroczeń czasu oczekiwania.
+    """
+    return JsonResponse({alias: stats for (alias, name), stats in pool_stats().items()})
@@ -41,7 +41,6 @@ const sendSearchData = (users) => {
             'users': users,
         },
         success: (res) => {
-            console.log(res.data)
             const data = res.data
             if (Array.isArray(data)) {
                 resultsBox.innerHTML = ""
@@ -71,19 +70,44 @@ const sendSearchData = (users) => {
     })
 }
 
+/**
+ * Czas (w milisekundach) od ostatniego wciśnięcia klawisza, po którym wysyłane jest wyszukiwanie.
+ * @type {number}
+ */
+const SEARCH_DELAY = 250
+
+/**
+ * Identyfikator zaplanowanego wyszukiwania.
+ * @type {number}
+ */
+let searchTimeout = null
+
+/**
+ * Ostatnio wysłane wyszukiwanie.
+ * @type {string}
+ */
+let lastSearch = null
+
 /**
  * Obsługuje zdarzenie wciśnięcia klawisza podczas wprowadzania tekstu wyszukiwania.
+ * Wyszukiwanie wysyłane jest dopiero po SEARCH_DELAY ms bez kolejnego wciśnięcia klawisza.
  * @event keyup
  * @memberof HTMLInputElement
  * @name searchInput
  * @param {KeyboardEvent} e - Obiekt zdarzenia klawisza.
  */
 searchInput.addEventListener('keyup', e=> {
-    console.log(e.target.value)
-
     if (resultsBox.classList.contains('not-visible')) {
         resultsBox.classList.remove('not-visible')
     }
 
-    sendSearchData(e.target.value)
+    clearTimeout(searchTimeout)
+    searchTimeout = setTimeout(() => {
+        let value = e.target.value.trim()
+        if (value === lastSearch) {
+            return
+        }
+        lastSearch = value
+        sendSearchData(value)
+    }, SEARCH_DELAY)
 })
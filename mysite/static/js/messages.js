@@ -107,25 +107,31 @@ socket.onclose = async function(e){
 }
 
 /**
- * Dodaje nową wiadomość do okna czatu.
+ * Zamienia znaki specjalne HTML na encje.
+ * @param {string} text - Tekst do wyświetlenia.
+ * @returns {string} - Bezpieczny tekst.
+ */
+function escapeHtml(text) {
+    return $('<div>').text(text).html()
+}
+
+/**
+ * Tworzy element HTML pojedynczej wiadomości.
  * @param {string} message - Treść wiadomości.
  * @param {string} send_by_id - ID wysyłającego użytkownika.
- * @param {string} thread_id - ID wątku.
  * @param {Object} userData - Dane użytkownika.
+ * @returns {jQuery} - Element wiadomości.
  */
-function newMessage(message, send_by_id, thread_id, userData) {
-	if ($.trim(message) === '') {
-		return false;
-	}
+function messageElement(message, send_by_id, userData) {
     let message_element;
-    let chat_id = 'chat_' + thread_id
+    let name = escapeHtml(userData.first_name + ' ' + userData.last_name)
     if (send_by_id == USER_ID) {
         message_element = `
 			<div class="my_message">
                   <div class="message_content">
-                      <h6>${userData.first_name} ${userData.last_name}</h6>
+                      <h6>${name}</h6>
                       <div class="message">
-                          <p>${message}</p>
+                          <p>${escapeHtml(message)}</p>
                       </div>
                   </div>
                   <img src="${userData.profile_picture}" alt="">
@@ -137,23 +143,111 @@ function newMessage(message, send_by_id, thread_id, userData) {
 			 <div class="recipent_message">
                     <img src="${userData.profile_picture}" alt="">
                     <div class="message_content">
-                        <h6>${userData.first_name} ${userData.last_name}</h6>
+                        <h6>${name}</h6>
                         <div class="message">
-                            <p>${message}</p>
+                            <p>${escapeHtml(message)}</p>
                         </div>
                     </div>
                 </div>
 	    `
     }
+    return $(message_element)
+}
 
+/**
+ * Dodaje nową wiadomość do okna czatu.
+ * @param {string} message - Treść wiadomości.
+ * @param {string} send_by_id - ID wysyłającego użytkownika.
+ * @param {string} thread_id - ID wątku.
+ * @param {Object} userData - Dane użytkownika.
+ */
+function newMessage(message, send_by_id, thread_id, userData) {
+	if ($.trim(message) === '') {
+		return false;
+	}
+    let chat_id = 'chat_' + thread_id
 	let message_body = $('.chat[chat-id="' + chat_id + '"] .msg_card_body')
-	message_body.append($(message_element))
+	message_body.append(messageElement(message, send_by_id, userData))
+    updateContact(chat_id, message, send_by_id)
     message_body.animate({
         scrollTop: $(document).height()
     }, 100);
 	input_message.val(null);
 }
 
+/**
+ * Przenosi wątek na początek listy kontaktów i aktualizuje podgląd oraz licznik nieprzeczytanych wiadomości.
+ * @param {string} chat_id - ID wątku w postaci "chat_<id>".
+ * @param {string} message - Treść wiadomości.
+ * @param {string} send_by_id - ID wysyłającego użytkownika.
+ */
+function updateContact(chat_id, message, send_by_id) {
+    let contact = $('.contact-li[chat-id="' + chat_id + '"]')
+    contact.find('.last_message').text(message.length > 40 ? message.slice(0, 39) + '…' : message)
+    contact.prependTo('.contacts')
+    if (send_by_id == USER_ID) {
+        return
+    }
+    if ($('.chat.is_active').attr('chat-id') === chat_id) {
+        markRead(contact)
+    } else {
+        let unread = contact.find('.unread_count')
+        unread.text((parseInt(unread.text()) || 0) + 1).removeClass('not-visible')
+    }
+}
+
+/**
+ * Oznacza wątek jako przeczytany.
+ * @param {jQuery} contact - Element wątku na liście kontaktów (.contact-li).
+ */
+function markRead(contact) {
+    contact.find('.unread_count').text('0').addClass('not-visible')
+    $.ajax({
+        url: contact.attr('data-read-url'),
+        type: 'POST',
+        headers: {'X-CSRFToken': $('input[name=csrfmiddlewaretoken]').val()},
+    })
+}
+
+/**
+ * Pobiera kolejną (starszą) stronę historii wątku i dodaje ją na początku okna czatu.
+ * @param {jQuery} chat - Element wątku (.chat).
+ */
+function loadHistory(chat) {
+    if (chat.data('loading') || (chat.attr('data-loaded') && !chat.attr('data-cursor'))) {
+        return
+    }
+    chat.data('loading', true)
+    let url = chat.attr('data-history-url')
+    let cursor = chat.attr('data-cursor')
+    if (cursor) {
+        url += '?before=' + encodeURIComponent(cursor)
+    }
+    let message_body = chat.find('.msg_card_body')
+    $.getJSON(url, function (data) {
+        let height = message_body[0].scrollHeight
+        let elements = data.messages.map(function (item) {
+            return messageElement(item.message, item.send_by, item.user_data)
+        })
+        message_body.prepend(elements)
+        // Zachowanie pozycji przewijania po dodaniu starszych wiadomości
+        message_body.scrollTop(message_body[0].scrollHeight - height + message_body.scrollTop())
+        chat.attr('data-loaded', 'true')
+        chat.attr('data-cursor', data.next || '')
+    }).always(function () {
+        chat.data('loading', false)
+    })
+}
+
+/**
+ * Pobiera starsze wiadomości po przewinięciu okna czatu do początku.
+ */
+$('.msg_card_body').on('scroll', function () {
+    if ($(this).scrollTop() === 0) {
+        loadHistory($(this).closest('.chat'))
+    }
+})
+
 /**
  * Obsługuje kliknięcie na kontakt w liście kontaktów.
  */
@@ -163,7 +257,14 @@ $('.contact-li').on('click', function (){
 
     let chat_id = $(this).attr('chat-id')
     $('.chat.is_active').removeClass('is_active')
-    $('.chat[chat-id="' + chat_id +'"]').addClass('is_active')
+    let chat = $('.chat[chat-id="' + chat_id +'"]')
+    chat.addClass('is_active')
+    if (!$(this).find('.unread_count').hasClass('not-visible')) {
+        markRead($(this))
+    }
+    if (!chat.attr('data-loaded')) {
+        loadHistory(chat)
+    }
 })
 
 /**
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from users.models import Profile, DEFAULT_PROFILE_PIC
+from users.tasks import render_profile_thumbnail
+
+
+class Command(BaseCommand):
+    """
+        Polecenie tworzące brakujące miniatury zdjęć profilowych.
+
+        Przydatne po wdrożeniu miniatur dla profili, których zdjęcia zostały
+        przesłane wcześniej. Nowe zdjęcia przetwarzane są automatycznie w tle.
+    """
+    help = 'Renders missing 256px profile picture thumbnails.'
+
+    def handle(self, *args, **options):
+        profiles = (Profile.objects.filter(thumbnail='')
+                    .exclude(profile_pic=DEFAULT_PROFILE_PIC)
+                    .values_list('pk', 'profile_pic'))
+        count = 0
+        for profile_id, profile_pic in profiles.iterator():
+            try:
+                render_profile_thumbnail(profile_id, profile_pic)
+                count += 1
+            except Exception as e:
+                self.stderr.write(f'Profile {profile_id}: {e}')
+        self.stdout.write(f'Processed {count} profile pictures.')
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import deliver_outbox, OUTBOX_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    """
+        Polecenie wysyłające wiadomości email ze skrzynki nadawczej.
+
+        Bez opcji --loop wysyła wszystkie oczekujące wiadomości i kończy działanie
+        (np. z harmonogramu cron). Z opcją --loop działa jako proces roboczy, sprawdzający
+        skrzynkę co --interval sekund.
+    """
+    help = 'Sends pending emails from the outbox, reusing one SMTP connection per batch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver_outbox(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent + failed < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(f'Sent {total_sent} emails, {total_failed} failed.')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_profile_profile_pic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='profile_pics/thumbs'),
+        ),
+    ]
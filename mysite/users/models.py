@@ -1,8 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
-from PIL import Image
-from django.core.files.storage import default_storage as storage
-from io import BytesIO
+from mysite.tasks import run_in_background
+
+# Domyślne zdjęcie profilowe, dla którego nie jest tworzona miniatura
+DEFAULT_PROFILE_PIC = "default.png"
 
 class Profile(models.Model):
 	"""
@@ -11,26 +13,89 @@ class Profile(models.Model):
 	    Atrybuty:
 	        user (OneToOneField): Pole do powiązania profilu z użytkownikiem.
 	        profile_pic (ImageField): Pole do przechowywania zdjęcia profilowego.
+	        thumbnail (ImageField): Zapisana miniatura zdjęcia profilowego (maksymalnie 256x256 px).
 
 	    Metody:
 	        __str__(): Zwraca reprezentację tekstową profilu.
+	        avatar_url: Zwraca adres miniatury lub, jeśli jej jeszcze nie ma, oryginalnego zdjęcia.
+	        profile_pic_changed(): Sprawdza, czy zdjęcie profilowe zostało zmienione.
+	        save(): Zleca utworzenie miniatury w tle, jeśli zdjęcie profilowe zostało zmienione.
 
 	"""
 	user = models.OneToOneField(User, on_delete=models.CASCADE)
-	profile_pic = models.ImageField(default="default.png", upload_to="profile_pics")
+	profile_pic = models.ImageField(default=DEFAULT_PROFILE_PIC, upload_to="profile_pics")
+	thumbnail = models.ImageField(upload_to="profile_pics/thumbs", blank=True)
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self._saved_profile_pic = self.profile_pic.name
 
 	def __str__(self):
 		return f"{self.user.first_name} {self.user.last_name}"
 
+	@property
+	def avatar_url(self):
+		return (self.thumbnail or self.profile_pic).url
+
+	def profile_pic_changed(self):
+		"""
+		    Sprawdza, czy zdjęcie profilowe zmieniło się od wczytania lub ostatniego zapisu profilu.
+
+		    Zwraca:
+		        bool: True, jeśli profil jest nowy lub zdjęcie zostało zmienione.
+		"""
+		return self._state.adding or self.profile_pic.name != self._saved_profile_pic
+
 	def save(self, *args, **kwargs):
+		changed = self.profile_pic_changed()
+		if changed:
+			self.thumbnail = ""
+			update_fields = kwargs.get("update_fields")
+			if update_fields is not None:
+				kwargs["update_fields"] = set(update_fields) | {"thumbnail"}
+
 		super(Profile, self).save(*args, **kwargs)
+		self._saved_profile_pic = self.profile_pic.name
+
+		if changed and self.profile_pic.name and self.profile_pic.name != DEFAULT_PROFILE_PIC:
+			from .tasks import render_profile_thumbnail
+			run_in_background(render_profile_thumbnail, self.pk, self.profile_pic.name)
+
 
+class OutboxEmail(models.Model):
+	"""
+	    Model przechowujący wiadomość email oczekującą na wysłanie (skrzynka nadawcza).
+
+	    Atrybuty:
+	        subject (CharField): Temat wiadomości.
+	        body (TextField): Treść wiadomości.
+	        from_email (CharField): Adres nadawcy (pusty oznacza DEFAULT_FROM_EMAIL).
+	        to (JSONField): Lista adresów odbiorców.
+	        created (DateTimeField): Data dodania wiadomości.
+	        attempts (PositiveSmallIntegerField): Liczba nieudanych prób wysłania.
+	        next_attempt (DateTimeField): Termin kolejnej próby (None po wyczerpaniu prób).
+	        sent (DateTimeField): Data wysłania (None dla wiadomości niewysłanych).
+	        last_error (TextField): Opis ostatniego błędu wysyłania.
+
+	    Metody:
+	        __str__(): Zwraca temat i odbiorców wiadomości.
+
+	"""
+	subject = models.CharField(max_length=255)
+	body = models.TextField()
+	from_email = models.CharField(max_length=254, blank=True)
+	to = models.JSONField(default=list)
+	created = models.DateTimeField(auto_now_add=True)
+	attempts = models.PositiveSmallIntegerField(default=0)
+	next_attempt = models.DateTimeField(default=timezone.now, null=True, blank=True)
+	sent = models.DateTimeField(null=True, blank=True)
+	last_error = models.TextField(blank=True)
 
-		image_read = storage.open(self.profile_pic.name, "r")
-		img = Image.open(image_read)
+	class Meta:
+		indexes = [
+			models.Index(fields=["next_attempt"], condition=models.Q(sent__isnull=True),
+			             name="users_outbox_pending_idx"),
+		]
 
-		if img.height > 256 or img.width > 256:
-			imageBuffer = BytesIO()
-			output_size = (256, 256)
-			img.thumbnail(output_size)
-			img.save(imageBuffer, img.format)
\ No newline at end of file
+	def __str__(self):
+		return f"{self.subject} -> {', '.join(self.to)}"
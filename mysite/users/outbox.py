@@ -0,0 +1,120 @@
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Liczba wiadomości wysyłanych przez jedno połączenie SMTP
+OUTBOX_BATCH_SIZE = 50
+
+# Liczba prób wysłania wiadomości, po której wysyłanie jest wstrzymywane
+OUTBOX_MAX_ATTEMPTS = 8
+
+# Opóźnienie pierwszej ponownej próby (w sekundach); każda kolejna czeka dwa razy dłużej
+OUTBOX_RETRY_DELAY = 60
+
+# Maksymalne opóźnienie ponownej próby (w sekundach)
+OUTBOX_MAX_RETRY_DELAY = 6 * 60 * 60
+
+
+def enqueue_email(subject, body, to, from_email=''):
+    """
+        Dodaje wiadomość email do skrzynki nadawczej.
+
+        Argumenty:
+            subject (str): Temat wiadomości.
+            body (str): Treść wiadomości.
+            to (list): Adresy odbiorców.
+            from_email (str): Adres nadawcy (domyślnie DEFAULT_FROM_EMAIL).
+
+        Zwraca:
+            OutboxEmail: Zapisana wiadomość.
+
+        Opis działania:
+            Wiadomość jest tylko zapisywana w bazie danych (w bieżącej transakcji), a wysyła
+            ją polecenie send_outbox. Czas odpowiedzi nie zależy więc od serwera SMTP, a jego
+            awaria nie powoduje błędu żądania.
+    """
+    return OutboxEmail.objects.create(subject=subject, body=body, to=list(to), from_email=from_email)
+
+
+def retry_delay(attempts):
+    """
+        Zwraca opóźnienie kolejnej próby wysłania wiadomości.
+
+        Argumenty:
+            attempts (int): Liczba dotychczasowych nieudanych prób.
+
+        Zwraca:
+            timedelta: Opóźnienie rosnące wykładniczo, ograniczone do OUTBOX_MAX_RETRY_DELAY.
+    """
+    return timedelta(seconds=min(OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_DELAY))
+
+
+def _failed(email, error, now):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.next_attempt = None
+        logger.error(f'Giving up on email {email.pk} to {email.to} after {email.attempts} attempts: {error}')
+    else:
+        email.next_attempt = now + retry_delay(email.attempts)
+        logger.warning(f'Sending email {email.pk} failed, retrying at {email.next_attempt}: {error}')
+
+
+def deliver_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    """
+        Wysyła jedną porcję oczekujących wiadomości ze skrzynki nadawczej.
+
+        Argumenty:
+            batch_size (int): Maksymalna liczba wysyłanych wiadomości.
+
+        Zwraca:
+            tuple: Liczba wysłanych wiadomości i liczba nieudanych prób.
+
+        Opis działania:
+            Wiadomości, których termin kolejnej próby minął, są blokowane (SELECT ... FOR UPDATE
+            SKIP LOCKED), dzięki czemu kilka procesów send_outbox nie wyśle tej samej wiadomości.
+            Cała porcja wysyłana jest przez jedno połączenie SMTP. Po nieudanej próbie termin
+            kolejnej jest odsuwany wykładniczo (retry_delay), a po OUTBOX_MAX_ATTEMPTS próbach
+            wiadomość pozostaje niewysłana z opisem błędu w polu last_error.
+    """
+    sent = failed = 0
+    with transaction.atomic():
+        now = timezone.now()
+        batch = list(OutboxEmail.objects.select_for_update(skip_locked=True)
+                     .filter(sent__isnull=True, next_attempt__lte=now)
+                     .order_by('next_attempt', 'pk')[:batch_size])
+        if not batch:
+            return sent, failed
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for email in batch:
+                _failed(email, e, now)
+            failed = len(batch)
+        else:
+            try:
+                for email in batch:
+                    message = EmailMessage(email.subject, email.body, email.from_email or None, email.to,
+                                           connection=connection)
+                    try:
+                        message.send()
+                    except Exception as e:
+                        _failed(email, e, now)
+                        failed += 1
+                    else:
+                        email.sent = timezone.now()
+                        sent += 1
+            finally:
+                connection.close()
+        OutboxEmail.objects.bulk_update(batch, ['attempts', 'next_attempt', 'sent', 'last_error'])
+    logger.info(f'Outbox batch: {sent} emails sent, {failed} failed.')
+    return sent, failed
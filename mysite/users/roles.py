@@ -0,0 +1,156 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+
+# Nazwa grupy nauczycieli nadawanej przez administratora
+TEACHER_GROUP = 'Nauczyciel'
+
+# Czas życia wpisu z grupami użytkownika we współdzielonej pamięci podręcznej (w sekundach)
+ROLE_CACHE_TIMEOUT = 60 * 60
+
+
+def role_cache_key(user_id):
+    """
+        Zwraca klucz pamięci podręcznej przechowujący grupy użytkownika.
+
+        Argumenty:
+            user_id (int): Identyfikator użytkownika.
+
+        Zwraca:
+            str: Klucz pamięci podręcznej.
+    """
+    return f'roles:user:{user_id}'
+
+
+def get_group_names(user):
+    """
+        Zwraca nazwy grup, do których należy użytkownik.
+
+        Argumenty:
+            user (User): Użytkownik (również anonimowy).
+
+        Zwraca:
+            frozenset: Zbiór nazw grup użytkownika.
+
+        Opis działania:
+            Grupy są wczytywane co najwyżej raz na żądanie - wynik zapamiętywany jest
+            na obiekcie użytkownika. Jeśli grupy zostały wcześniej pobrane przez
+            prefetch_related('groups'), są używane bez dodatkowego zapytania.
+            W przeciwnym razie wynik pochodzi ze współdzielonej pamięci podręcznej,
+            a dopiero przy jej braku z bazy danych. Wpis jest unieważniany przez
+            sygnały zmian User.groups (users.signals).
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    names = getattr(user, '_group_names', None)
+    if names is not None:
+        return names
+
+    prefetched = getattr(user, '_prefetched_objects_cache', {}).get('groups')
+    if prefetched is not None:
+        names = frozenset(group.name for group in prefetched)
+    else:
+        key = role_cache_key(user.pk)
+        names = cache.get(key)
+        if names is None:
+            names = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, names, ROLE_CACHE_TIMEOUT)
+
+    user._group_names = names
+    return names
+
+
+def has_role(user, group_name):
+    """
+        Sprawdza, czy użytkownik należy do grupy o podanej nazwie.
+
+        Argumenty:
+            user (User): Użytkownik.
+            group_name (str): Nazwa grupy.
+
+        Zwraca:
+            bool: True, jeśli użytkownik należy do grupy.
+    """
+    return group_name in get_group_names(user)
+
+
+def is_teacher(user):
+    """
+        Sprawdza, czy użytkownik jest nauczycielem.
+
+        Argumenty:
+            user (User): Użytkownik.
+
+        Zwraca:
+            bool: True, jeśli użytkownik należy do grupy "Nauczyciel".
+    """
+    return has_role(user, TEACHER_GROUP)
+
+
+def invalidate_roles(user_ids):
+    """
+        Usuwa z pamięci podręcznej zapamiętane grupy podanych użytkowników.
+
+        Argumenty:
+            user_ids (Iterable[int]): Identyfikatory użytkowników.
+    """
+    keys = [role_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+# Dekorator widoków dostępnych wyłącznie dla nauczycieli
+teacher_required = user_passes_test(is_teacher)
+
+
+def _load_user(request):
+    user = request.user
+    if user.is_authenticated:
+        # Profil (zdjęcie w pasku nawigacji) i grupy używane są przy renderowaniu szablonów
+        user.profile
+        get_group_names(user)
+    return user
+
+
+async def aget_user(request):
+    """
+        Wczytuje zalogowanego użytkownika w widoku asynchronicznym.
+
+        Argumenty:
+            request (HttpRequest): Obiekt żądania HTTP.
+
+        Zwraca:
+            User: Użytkownik żądania (request.user), również anonimowy.
+
+        Opis działania:
+            request.user wczytywany jest leniwie, a zapytania do bazy danych nie mogą być
+            wykonywane w pętli zdarzeń. Sesja, użytkownik, jego profil i grupy wczytywane są
+            więc jednym wywołaniem w wątku (sync_to_async), po którym szablony i is_teacher
+            korzystają z nich bez dodatkowych zapytań.
+    """
+    return await sync_to_async(_load_user)(request)
+
+
+def async_login_required(view):
+    """
+        Dekorator asynchronicznych widoków dostępnych wyłącznie dla zalogowanych użytkowników.
+
+        Argumenty:
+            view (coroutine function): Widok asynchroniczny.
+
+        Zwraca:
+            coroutine function: Widok przekierowujący niezalogowanych użytkowników na stronę
+            logowania (tak jak login_required, który w Django 4.2 nie obsługuje widoków
+            asynchronicznych).
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
-from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.contrib.auth.models import User, Group
 from django.dispatch import receiver
 from .models import Profile
+from .roles import invalidate_roles
 
 
 @receiver(post_save, sender=User)
@@ -28,6 +29,67 @@ def save_profile(sender, instance, **kwargs):
             sender (Model): Klasa modelu, która wysyła sygnał.
             instance (User): Instancja modelu User, która została zapisana.
 
-    """
+        Opis działania:
+            Częściowe zapisy użytkownika (update_fields), np. aktualizacja last_login
+            przy każdym logowaniu, nie dotyczą profilu i są pomijane.
 
+    """
+    if kwargs.get('update_fields'):
+        return
     instance.profile.save()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+        Unieważnia zapamiętane grupy użytkowników po zmianie relacji User.groups.
+
+        Argumenty:
+            sender (Model): Model pośredni relacji User.groups.
+            instance (User | Group): Instancja, której relacja została zmieniona.
+            action (str): Rodzaj zmiany (pre_add, post_add, pre_remove, post_remove, pre_clear, post_clear).
+            reverse (bool): True, jeśli zmiana nastąpiła od strony grupy (group.user_set).
+            pk_set (set): Identyfikatory obiektów po drugiej stronie relacji.
+
+    """
+    if reverse and action == 'pre_clear':
+        instance._role_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        user_ids = pk_set if action != 'post_clear' else getattr(instance, '_role_user_ids', [])
+    else:
+        user_ids = [instance.pk]
+        instance.__dict__.pop('_group_names', None)
+    invalidate_roles(user_ids)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """
+        Unieważnia zapamiętane grupy członków grupy po jej zmianie nazwy lub usunięciu.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (Group): Zmieniona lub usuwana grupa.
+
+    """
+    if kwargs.get('created'):
+        return
+    invalidate_roles(instance.user_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def delete_user_roles(sender, instance, **kwargs):
+    """
+        Usuwa z pamięci podręcznej grupy usuniętego użytkownika.
+
+        Argumenty:
+            sender (Model): Klasa modelu, która wysyła sygnał.
+            instance (User): Usunięty użytkownik.
+
+    """
+    invalidate_roles([instance.pk])
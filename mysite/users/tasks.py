@@ -0,0 +1,52 @@
+import logging
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage as storage
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+# Maksymalny rozmiar miniatury zdjęcia profilowego
+THUMBNAIL_SIZE = (256, 256)
+
+
+def render_profile_thumbnail(profile_id, source_name):
+    """
+        Tworzy i zapisuje miniaturę zdjęcia profilowego.
+
+        Argumenty:
+            profile_id (int): Identyfikator profilu.
+            source_name (str): Nazwa pliku zdjęcia, dla którego zlecono utworzenie miniatury.
+
+        Opis działania:
+            Zadanie wykonywane jest w tle (mysite.tasks.run_in_background). Zdjęcie jest
+            odczytywane z magazynu plików i dekodowane tylko raz. Jeśli jest większe niż
+            256x256 px, zmniejszona kopia zapisywana jest w katalogu profile_pics/thumbs,
+            a jej nazwa trafia do pola thumbnail. Aktualizacja wykonywana jest tylko wtedy,
+            gdy profil nadal wskazuje na to samo zdjęcie - zmiana zdjęcia w trakcie
+            przetwarzania nie zostanie nadpisana starą miniaturą.
+    """
+    with storage.open(source_name, "rb") as image_read:
+        img = Image.open(image_read)
+        image_format = img.format
+        if img.width <= THUMBNAIL_SIZE[0] and img.height <= THUMBNAIL_SIZE[1]:
+            return
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(THUMBNAIL_SIZE)
+
+    if image_format == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    image_buffer = BytesIO()
+    img.save(image_buffer, image_format)
+
+    stem, ext = os.path.splitext(os.path.basename(source_name))
+    thumbnail_name = storage.save(f"profile_pics/thumbs/{stem}_256{ext}", ContentFile(image_buffer.getvalue()))
+    updated = Profile.objects.filter(pk=profile_id, profile_pic=source_name).update(thumbnail=thumbnail_name)
+    if updated:
+        logger.info(f'Profile thumbnail {thumbnail_name} rendered for profile {profile_id}.')
+    else:
+        storage.delete(thumbnail_name)
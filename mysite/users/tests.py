@@ -1,3 +1,253 @@
-from django.test import TestCase
+import socketserver
+import threading
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User, Group, AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from django_recaptcha.client import RecaptchaResponse
+
+from .roles import get_group_names, has_role, is_teacher, role_cache_key, TEACHER_GROUP
+from .models import OutboxEmail
+from .outbox import enqueue_email, deliver_outbox
+
+
+class RolesTest(TestCase):
+    """
+        Testy jednostkowe warstwy rozwiązywania ról użytkowników.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca użytkownika i grupę nauczycieli.
+            test_anonymous_user_has_no_roles(self): Sprawdza, czy użytkownik anonimowy nie ma ról.
+            test_groups_loaded_once_per_user(self): Sprawdza, czy grupy są pobierane jednym zapytaniem.
+            test_shared_cache_used_between_requests(self): Sprawdza, czy kolejne żądania korzystają z pamięci podręcznej.
+            test_cache_invalidated_on_group_add(self): Sprawdza unieważnienie po dodaniu grupy.
+            test_cache_invalidated_on_reverse_clear(self): Sprawdza unieważnienie po wyczyszczeniu członków grupy.
+            test_prefetched_groups_are_used(self): Sprawdza wykorzystanie grup pobranych przez prefetch_related.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca użytkownika i grupę nauczycieli.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username='teacher', password='password')
+        self.group = Group.objects.create(name=TEACHER_GROUP)
+
+    def test_anonymous_user_has_no_roles(self):
+        """
+                Sprawdza, czy użytkownik anonimowy nie ma ról.
+        """
+        with self.assertNumQueries(0):
+            self.assertFalse(is_teacher(AnonymousUser()))
+
+    def test_groups_loaded_once_per_user(self):
+        """
+                Sprawdza, czy grupy są pobierane jednym zapytaniem.
+        """
+        self.user.groups.add(self.group)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            for _ in range(10):
+                self.assertTrue(has_role(user, TEACHER_GROUP))
+                self.assertFalse(has_role(user, 'Student'))
+
+    def test_shared_cache_used_between_requests(self):
+        """
+                Sprawdza, czy kolejne żądania korzystają z pamięci podręcznej.
+        """
+        self.user.groups.add(self.group)
+        is_teacher(User.objects.get(pk=self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_teacher(user))
+
+    def test_cache_invalidated_on_group_add(self):
+        """
+                Sprawdza unieważnienie po dodaniu grupy.
+        """
+        self.assertFalse(is_teacher(User.objects.get(pk=self.user.pk)))
+        self.user.groups.add(self.group)
+        self.assertIsNone(cache.get(role_cache_key(self.user.pk)))
+        self.assertTrue(is_teacher(User.objects.get(pk=self.user.pk)))
+
+    def test_cache_invalidated_on_reverse_clear(self):
+        """
+                Sprawdza unieważnienie po wyczyszczeniu członków grupy.
+        """
+        self.group.user_set.add(self.user)
+        self.assertTrue(is_teacher(User.objects.get(pk=self.user.pk)))
+        self.group.user_set.clear()
+        self.assertFalse(is_teacher(User.objects.get(pk=self.user.pk)))
+
+    def test_prefetched_groups_are_used(self):
+        """
+                Sprawdza wykorzystanie grup pobranych przez prefetch_related.
+        """
+        self.user.groups.add(self.group)
+        user = User.objects.prefetch_related('groups').get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_names(user), frozenset([TEACHER_GROUP]))
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ProfileThumbnailTest(TestCase):
+    """
+        Testy jednostkowe tworzenia miniatur zdjęć profilowych.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, tworząca użytkownika.
+            test_user_save_does_not_process_image(self): Sprawdza, czy zapis użytkownika nie przetwarza zdjęcia.
+            test_thumbnail_rendered_after_change(self): Sprawdza utworzenie miniatury po zmianie zdjęcia.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, tworząca użytkownika.
+        """
+        self.user = User.objects.create_user(username='user', password='password')
+
+    def _image(self, size):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile('avatar.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_user_save_does_not_process_image(self):
+        """
+                Sprawdza, czy zapis użytkownika (np. przy logowaniu) nie przetwarza zdjęcia.
+        """
+        with mock.patch('users.models.run_in_background') as run:
+            self.assertTrue(self.client.login(username='user', password='password'))
+            self.user.first_name = 'Jan'
+            self.user.save()
+        run.assert_not_called()
+
+    def test_thumbnail_rendered_after_change(self):
+        """
+                Sprawdza utworzenie miniatury po zmianie zdjęcia.
+        """
+        profile = self.user.profile
+        profile.profile_pic = self._image((600, 400))
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        profile.refresh_from_db()
+        self.assertTrue(profile.thumbnail.name.startswith('profile_pics/thumbs/'))
+        self.assertEqual(profile.avatar_url, profile.thumbnail.url)
+        with profile.thumbnail.open('rb') as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (256, 171))
+
+        with mock.patch('users.models.run_in_background') as run:
+            profile.save()
+        run.assert_not_called()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    # Minimalny serwer SMTP zapisujący odebrane wiadomości (zastępuje smtp.gmail.com w testach)
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 localhost ready\r\n')
+        data = None
+        for line in self.rfile:
+            if data is not None:
+                if line in (b'.\r\n', b'.\n'):
+                    self.server.messages.append(b''.join(data))
+                    data = None
+                    self.wfile.write(b'250 OK\r\n')
+                else:
+                    data.append(line)
+                continue
+            command = line.strip().upper()
+            if command.startswith((b'EHLO', b'HELO')):
+                self.wfile.write(b'250 localhost\r\n')
+            elif command == b'DATA':
+                data = []
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                break
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class OutboxTest(TestCase):
+    """
+        Testy jednostkowe skrzynki nadawczej wiadomości email.
+
+        Metody:
+            setUp(self): Metoda konfiguracyjna, uruchamiająca lokalny serwer SMTP.
+            test_register_only_queues_email(self): Sprawdza, czy rejestracja tylko zapisuje wiadomość.
+            test_batch_sent_over_one_connection(self): Sprawdza wysłanie porcji przez jedno połączenie SMTP.
+            test_failed_delivery_retried_with_backoff(self): Sprawdza ponawianie wysyłki z rosnącym opóźnieniem.
+
+    """
+    def setUp(self):
+        """
+                Metoda konfiguracyjna, uruchamiająca lokalny serwer SMTP.
+        """
+        self.smtp = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTPHandler)
+        self.smtp.daemon_threads = True
+        self.smtp.connections, self.smtp.messages = 0, []
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        settings = override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                                     EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.smtp.server_address[1],
+                                     EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+                                     EMAIL_TIMEOUT=5)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_register_only_queues_email(self):
+        """
+                Sprawdza, czy rejestracja zapisuje link aktywacyjny w skrzynce bez łączenia z serwerem SMTP.
+        """
+        data = {'username': 'new', 'email': 'new@example.com', 'first_name': 'Jan', 'last_name': 'Nowak',
+                'password1': 'Str0ng-Passw0rd', 'password2': 'Str0ng-Passw0rd', 'g-recaptcha-response': 'ok'}
+        with mock.patch('django_recaptcha.fields.client.submit', return_value=RecaptchaResponse(is_valid=True)):
+            response = self.client.post(reverse('register-users'), data)
+        self.assertRedirects(response, reverse('login'))
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ['new@example.com'])
+        self.assertIn('/activate/', email.body)
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertFalse(User.objects.get(username='new').is_active)
+
+    def test_batch_sent_over_one_connection(self):
+        """
+                Sprawdza, czy polecenie send_outbox wysyła wszystkie wiadomości przez jedno połączenie.
+        """
+        for number in range(3):
+            enqueue_email(f'Subject {number}', 'Body', [f'user{number}@example.com'])
+        call_command('send_outbox', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(len(self.smtp.messages), 3)
+        self.assertIn(b'Subject: Subject 0', self.smtp.messages[0])
+        self.assertFalse(OutboxEmail.objects.filter(sent__isnull=True).exists())
+        self.assertEqual(deliver_outbox(), (0, 0))
+
+    def test_failed_delivery_retried_with_backoff(self):
+        """
+                Sprawdza, czy po awarii serwera SMTP wiadomość jest ponawiana z rosnącym opóźnieniem.
+        """
+        email = enqueue_email('Subject', 'Body', ['user@example.com'])
+        with self.settings(EMAIL_PORT=1):
+            self.assertEqual(deliver_outbox(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 1)
+            self.assertIsNone(email.sent)
+            self.assertGreater(email.next_attempt, timezone.now() + timedelta(seconds=50))
+            self.assertEqual(deliver_outbox(), (0, 0))
+            OutboxEmail.objects.update(next_attempt=timezone.now())
+            deliver_outbox()
+            email.refresh_from_db()
+            self.assertGreater(email.next_attempt, timezone.now() + timedelta(seconds=110))
+        OutboxEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(deliver_outbox(), (1, 0))
+        self.assertEqual(len(self.smtp.messages), 1)
@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .forms import UserRegisterForm, UserUpdateForm, ProfileUpdateForm
-from django.core.mail import EmailMessage
+from django.db import transaction
 from .token import account_activation_token
 from django.contrib.sites.shortcuts import get_current_site
 from django.utils.encoding import force_bytes, force_str
@@ -11,11 +11,28 @@ from django.template.loader import render_to_string
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 from .models import Profile
-from django.db.models import Q
-from cez.models import Course, Enrollment, Topic, Assignment, RateSubmission, Submission
+from .outbox import enqueue_email
+from cez.models import Course
+from cez.gradebook import student_grades
+from mysite.cache import cached_query
 
 from django.http import HttpResponse
 
+def enrolled_courses(user_id):
+    """
+        Zwraca kursy, na które zapisany jest użytkownik.
+
+        Argumenty:
+            user_id (int): Identyfikator użytkownika.
+
+        Zwraca:
+            list: Kursy. Lista jest zapamiętywana (mysite.cache.cached_query) do zmiany zapisów
+            użytkownika lub dowolnego kursu.
+    """
+    return cached_query('enrollment', 'courses', lambda: list(Course.objects.filter(enrollment__student_id=user_id)
+                                                             .distinct().order_by('pk')),
+                        scope=user_id, depends=('course',))
+
 # Create your views here.
 def register(request):
     """
@@ -27,29 +44,27 @@ def register(request):
         POST:
             Sprawdza poprawność danych wprowadzonych do formularza rejestracji.
             Jeśli formularz jest poprawny, tworzy nowego użytkownika, oznacza go jako nieaktywnego
-            i wysyła link aktywacyjny na podany adres email.
+            i dodaje wiadomość z linkiem aktywacyjnym do skrzynki nadawczej (wysyła ją polecenie send_outbox).
             Po wysłaniu wiadomości, wyświetla komunikat informujący o konieczności potwierdzenia adresu email.
             Przekierowuje użytkownika na stronę logowania.
     """
     if request.method == 'POST':
         form = UserRegisterForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            user.is_active = False
-            user.save()
-            current_site = get_current_site(request)
-            mail_subject = 'Activation link has been sent to your email id'
-            message = render_to_string('users/acc_active_email.html', {
-                'user': user,
-                'domain': current_site.domain,
-                'uid': urlsafe_base64_encode(force_bytes(user.pk)),
-                'token': account_activation_token.make_token(user),
-            })
-            to_email = form.cleaned_data.get('email')
-            email = EmailMessage(
-                mail_subject, message, to=[to_email]
-            )
-            email.send()
+            with transaction.atomic():
+                user = form.save()
+                user.is_active = False
+                user.save()
+                current_site = get_current_site(request)
+                mail_subject = 'Activation link has been sent to your email id'
+                message = render_to_string('users/acc_active_email.html', {
+                    'user': user,
+                    'domain': current_site.domain,
+                    'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+                    'token': account_activation_token.make_token(user),
+                })
+                to_email = form.cleaned_data.get('email')
+                enqueue_email(mail_subject, message, [to_email])
             messages.success(request, 'Please confirm your email address to complete the registration')
             return redirect('login')
     else:
@@ -102,8 +117,7 @@ def profile(request):
         Zwraca:
             Renderuje szablon profilu użytkownika z listą kursów, do których jest zapisany.
     """
-    enrollments = Enrollment.objects.filter(student_id=request.user).values_list('course_id', flat=True)
-    course = Course.objects.filter(pk__in=enrollments)
+    course = enrolled_courses(request.user.pk)
     return render(request, 'users/profile.html', {'courses': course})
 
 @login_required
@@ -117,8 +131,7 @@ def degrees(request):
        Zwraca:
            Renderuje szablon stopni użytkownika z listą kursów, do których jest zapisany.
     """
-    enrollments = Enrollment.objects.filter(student_id=request.user).values_list('course_id', flat=True)
-    course = Course.objects.filter(pk__in=enrollments)
+    course = enrolled_courses(request.user.pk)
     return render(request, 'users/degrees.html', {'courses': course})
 
 @login_required
@@ -132,43 +145,13 @@ def degrees_course(request, course_id):
 
         Zwraca:
             Renderuje szablon stopni kursu użytkownika z przypisanymi zadaniami i ocenami.
+
+        Opis działania:
+            Oceny pobierane są z zapamiętanego dziennika ocen kursu (cez.gradebook).
     """
 
-    topics = Topic.objects.filter(course=course_id)
-    assignments = Assignment.objects.filter(topic__in=topics)
-    prof = Profile.objects.get(user_id=request.user.id)
-    submission = Submission.objects.filter(Q(student_id=prof.id) & Q(assignment__in=assignments))
-
-    # mapping = {}
-    # for assignment in assignments:
-    #     rateSubmission = RateSubmission.objects.filter(assignment_id=assignment.id,
-    #                                                               student_id=request.user.id).first()
-    #     grade = None
-    #     try:
-    #         grade = rateSubmission.grade
-    #     except:
-    #         pass
-    #     mapping[assignment.title] = grade
-    #
-    # print(mapping)
-    mapping = []
-
-    for assignment in assignments:
-        rateSubmission = RateSubmission.objects.filter(assignment_id=assignment.id,
-                                                                      student_id=request.user.id).first()
-        grade = None
-        try:
-            grade = rateSubmission.grade
-        except:
-            pass
-        mapping.append((assignment, grade))
-
-    # gradees = []
-    # for assignment in assignments:
-    #     gradees.append(RateSubmission.objects.filter(submission_id))
-    #gradees = RateSubmission.objects.filter(submission_id__in=submission).values_list('grade', flat=True)
-
-    return render(request, 'users/degrees_course.html', {'maps': mapping})#, 'gradees': gradees})
+    mapping = student_grades(course_id, request.user.id)
+    return render(request, 'users/degrees_course.html', {'maps': mapping})
 
 @login_required
 def update_profile(request):